@@ -0,0 +1,320 @@
+# ai_model/artifacts.py
+"""
+모델 가중치 아티팩트 관리.
+
+- 모든 가중치는 하나의 로컬 캐시 디렉터리(MODEL_CACHE_DIR, 기본: ai_model/)에서만 찾습니다.
+- 실행 중에는 네트워크에 접근하지 않습니다 (HF hub / ultralytics 온라인 기능 비활성화, 파일이 없으면 즉시 오류).
+- artifacts.json 매니페스트의 sha256 과 비교해 검증하고, 검증 결과는 (크기, mtime) 기준으로
+  .verified.json 에 기록해 다음 시작부터는 다시 해시하지 않습니다.
+  sha256 이 기록되지 않은(unpinned) 아티팩트는 로드하지 않습니다 (개발 중에만 MODEL_ALLOW_UNPINNED=1 로 허용).
+- export 한 아티팩트는 safetensors 로 읽기 전용 메모리 맵 로드합니다 (MODEL_WEIGHTS_FORMAT=pt 로 끌 수 있음).
+  가중치가 페이지 캐시를 그대로 가리키므로 같은 호스트의 워커들이 한 벌의 물리 메모리를 공유합니다.
+
+운영 절차 (네트워크가 되는 곳에서 받아 둔 가중치를 복사):
+
+    python -m ai_model.artifacts import --from /mnt/weights   # 캐시로 복사 + sha256 기록
+    python -m ai_model.artifacts export                        # .pt → .safetensors (+ 모델 구조 yaml)
+    python -m ai_model.artifacts verify                        # 전체 재해시 검증
+    python -m ai_model.artifacts status
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import threading
+from typing import Dict, Optional
+
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts.json")
+YOLO_ARTIFACTS = ("disease", "hygiene", "tooth_number", "xray", "legacy_camera")
+VERIFIED_STAMP = ".verified.json"
+
+_lock = threading.Lock()
+_manifest: Optional[Dict] = None
+_verified: Dict[tuple, bool] = {}
+
+
+class ArtifactError(RuntimeError):
+    """가중치 파일이 없거나 체크섬이 맞지 않을 때."""
+
+
+def enforce_offline():
+    """가중치 로드 경로에서 네트워크를 쓰지 않도록 라이브러리 설정을 고정합니다."""
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    os.environ.setdefault("YOLO_OFFLINE", "true")
+
+
+def _manifest_path() -> str:
+    return os.getenv("MODEL_MANIFEST") or MANIFEST_PATH
+
+
+def cache_dir() -> str:
+    return os.path.abspath(os.getenv("MODEL_CACHE_DIR") or os.path.dirname(MANIFEST_PATH))
+
+
+def allow_unpinned() -> bool:
+    """MODEL_ALLOW_UNPINNED=1 이면 sha256 이 없는 아티팩트도 검증 없이 사용 (개발용)."""
+    return os.getenv("MODEL_ALLOW_UNPINNED", "0") == "1"
+
+
+def weights_format() -> str:
+    """'auto' (export 된 safetensors 가 있으면 사용) 또는 'pt'."""
+    return os.getenv("MODEL_WEIGHTS_FORMAT", "auto").lower()
+
+
+def manifest() -> Dict:
+    global _manifest
+    if _manifest is None:
+        with open(_manifest_path(), encoding="utf-8") as f:
+            _manifest = json.load(f)
+    return _manifest
+
+
+def _entry(name: str) -> Dict:
+    try:
+        return manifest()["artifacts"][name]
+    except KeyError:
+        raise ArtifactError(f"매니페스트에 없는 아티팩트: {name}")
+
+
+def _target(name: str, mapped: bool) -> Dict:
+    entry = _entry(name)
+    if not mapped:
+        return entry
+    if not entry.get("mapped"):
+        raise ArtifactError(f"{name} 는 safetensors 로 export 되지 않았습니다 (python -m ai_model.artifacts export {name})")
+    return entry["mapped"]
+
+
+def path(name: str, mapped: bool = False) -> str:
+    """캐시 디렉터리 기준 절대 경로 (존재/체크섬 확인 없음)."""
+    return os.path.join(cache_dir(), _target(name, mapped)["file"])
+
+
+def use_mapped(name: str) -> bool:
+    return weights_format() != "pt" and bool(_entry(name).get("mapped"))
+
+
+def sha256sum(file_path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stamp_path() -> str:
+    return os.path.join(cache_dir(), VERIFIED_STAMP)
+
+
+def _read_stamps() -> Dict:
+    try:
+        with open(_stamp_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_stamps(stamps: Dict):
+    try:
+        tmp = _stamp_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(stamps, f, indent=2)
+        os.replace(tmp, _stamp_path())
+    except OSError:
+        pass  # 읽기 전용 캐시면 매번 해시 (정확성에는 영향 없음)
+
+
+def verify(name: str, force: bool = False, mapped: bool = False) -> str:
+    """파일 존재와 sha256 을 확인하고 절대 경로를 반환합니다."""
+    entry = _target(name, mapped)
+    file_path = path(name, mapped)
+    if not os.path.isfile(file_path):
+        raise ArtifactError(
+            f"{name} 가중치가 캐시에 없습니다: {file_path} "
+            f"(python -m ai_model.artifacts import --from <dir> 로 먼저 복사하세요)"
+        )
+    expected = entry.get("sha256")
+    if not expected:
+        if allow_unpinned():
+            return file_path
+        raise ArtifactError(
+            f"{name} 의 sha256 이 매니페스트에 없습니다 "
+            f"(python -m ai_model.artifacts import --from <dir> 로 기록, 개발 중에만 MODEL_ALLOW_UNPINNED=1)"
+        )
+
+    stat = os.stat(file_path)
+    key = [stat.st_size, stat.st_mtime_ns, expected]
+    with _lock:
+        stamps = _read_stamps()
+        if not force and stamps.get(entry["file"]) == key:
+            return file_path
+        actual = sha256sum(file_path)
+        if actual != expected:
+            raise ArtifactError(f"{name} 체크섬 불일치: {file_path} (expected {expected}, got {actual})")
+        stamps[entry["file"]] = key
+        _write_stamps(stamps)
+    return file_path
+
+
+def resolve(name: str, mapped: bool = False) -> str:
+    """모델 로더용: 오프라인 설정 후 검증된 절대 경로를 반환합니다 (프로세스당 한 번 검증)."""
+    enforce_offline()
+    if not _verified.get((name, mapped)):
+        verify(name, mapped=mapped)
+        _verified[(name, mapped)] = True
+    return path(name, mapped)
+
+
+def load_state_dict(name: str, map_location=None):
+    """
+    state_dict 를 메모리 맵으로 읽습니다 (전체 파일을 한 번에 읽어 복사하지 않음).
+    모델에 넣을 때 load_state_dict(..., assign=True) 로 넣어야 매핑된 텐서가 그대로 파라미터가 됩니다.
+    """
+    import torch
+    if use_mapped(name):
+        from safetensors.torch import load_file
+        return load_file(resolve(name, mapped=True), device=str(map_location or "cpu"))
+    return torch.load(resolve(name), map_location=map_location, mmap=True, weights_only=True)
+
+
+def load_yolo(name: str):
+    """ultralytics YOLO 모델. export 되어 있으면 yaml 로 구조만 만들고 safetensors 가중치를 assign 합니다."""
+    from ultralytics import YOLO
+    if not use_mapped(name):
+        return YOLO(resolve(name))
+
+    mapped = _entry(name)["mapped"]
+    yolo = YOLO(os.path.join(cache_dir(), mapped["config"]), task=mapped["task"])
+    net = yolo.model
+    if mapped.get("fused"):
+        net.fuse(verbose=False)  # 저장된 state_dict 가 Conv+BN 병합 후 구조이므로 먼저 같은 구조로 맞춤
+    net.load_state_dict(load_state_dict(name), strict=True, assign=True)
+    net.names = {int(k): v for k, v in mapped["names"].items()}
+    net.requires_grad_(False)
+    net.eval()
+    return yolo
+
+
+def export_safetensors(name: str) -> Dict:
+    """캐시의 .pt 를 <stem>.safetensors 로 변환하고 매니페스트의 mapped 항목을 반환합니다."""
+    import torch
+    from safetensors.torch import save_file
+
+    src = resolve(name)
+    stem = os.path.splitext(os.path.basename(src))[0]
+    mapped = {"file": f"{stem}.safetensors"}
+    if name in YOLO_ARTIFACTS:
+        import yaml
+        from ultralytics import YOLO
+        net = YOLO(src).model.float().fuse(verbose=False)
+        # yaml 파일명에서 모델 크기(n/s/m/l/x)를 추정하므로 원래 구조 이름(yolo11x-seg 등)을 붙여 둠
+        arch = os.path.splitext(os.path.basename(net.yaml.get("yaml_file", "model.yaml")))[0]
+        mapped["config"] = f"{stem}.{arch}.yaml"
+        with open(os.path.join(cache_dir(), mapped["config"]), "w", encoding="utf-8") as f:
+            yaml.safe_dump(net.yaml, f, sort_keys=False, allow_unicode=True)
+        mapped["task"] = net.task if hasattr(net, "task") else "detect"
+        mapped["names"] = {str(k): v for k, v in net.names.items()}
+        mapped["fused"] = True
+        state = net.state_dict()
+    else:
+        state = torch.load(src, map_location="cpu", weights_only=True)
+    dst = os.path.join(cache_dir(), mapped["file"])
+    save_file({k: v.detach().contiguous() for k, v in state.items()}, dst + ".tmp")
+    os.replace(dst + ".tmp", dst)
+    mapped["sha256"] = sha256sum(dst)
+    mapped["size"] = os.path.getsize(dst)
+    return mapped
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+def _save_manifest(data: Dict):
+    tmp = _manifest_path() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp, _manifest_path())
+
+
+def _cmd_status(args):
+    for name, entry in manifest()["artifacts"].items():
+        file_path = path(name)
+        exists = os.path.isfile(file_path)
+        size = f"{os.path.getsize(file_path) / 1e6:.1f}MB" if exists else "-"
+        pinned = "pinned" if entry.get("sha256") else "unpinned"
+        mapped = "safetensors" if entry.get("mapped") else "pt"
+        print(f"{name:<14} {'OK ' if exists else 'MISSING'} {size:>10} {pinned:<9} {mapped:<11} {file_path}")
+
+
+def _cmd_verify(args):
+    failed = False
+    for name in args.names or manifest()["artifacts"]:
+        try:
+            verify(name, force=True)
+            if _entry(name).get("mapped"):
+                verify(name, force=True, mapped=True)
+            print(f"✅ {name}")
+        except ArtifactError as e:
+            print(f"❌ {e}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+def _cmd_import(args):
+    data = manifest()
+    os.makedirs(cache_dir(), exist_ok=True)
+    for name in args.names or data["artifacts"]:
+        entry = data["artifacts"][name]
+        src = os.path.join(args.source, entry["file"])
+        if not os.path.isfile(src):
+            print(f"⚠️ {name}: {src} 없음 (건너뜀)")
+            continue
+        digest = sha256sum(src)
+        if entry.get("sha256") and entry["sha256"] != digest and not args.repin:
+            print(f"❌ {name}: 매니페스트 체크섬과 다름 (--repin 으로 갱신)")
+            sys.exit(1)
+        dst = path(name)
+        if os.path.abspath(src) != dst:
+            tmp = dst + ".tmp"
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        entry["sha256"] = digest
+        entry["size"] = os.path.getsize(dst)
+        print(f"✅ {name}: {dst} ({digest[:12]})")
+    _save_manifest(data)
+
+
+def _cmd_export(args):
+    data = manifest()
+    for name in args.names or data["artifacts"]:
+        try:
+            data["artifacts"][name]["mapped"] = export_safetensors(name)
+        except ArtifactError as e:
+            print(f"⚠️ {e} (건너뜀)")
+            continue
+        print(f"✅ {name}: {data['artifacts'][name]['mapped']['file']}")
+    _save_manifest(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="모델 가중치 캐시 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status")
+    p_verify = sub.add_parser("verify")
+    p_verify.add_argument("names", nargs="*")
+    p_import = sub.add_parser("import", help="로컬 디렉터리에서 캐시로 복사하고 sha256 을 매니페스트에 기록")
+    p_import.add_argument("--from", dest="source", required=True)
+    p_import.add_argument("--repin", action="store_true", help="체크섬이 달라도 매니페스트를 갱신")
+    p_import.add_argument("names", nargs="*")
+    p_export = sub.add_parser("export", help="캐시의 .pt 를 메모리 맵 가능한 safetensors 로 변환")
+    p_export.add_argument("names", nargs="*")
+    args = parser.parse_args(argv)
+    commands = {"status": _cmd_status, "verify": _cmd_verify, "import": _cmd_import, "export": _cmd_export}
+    commands[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
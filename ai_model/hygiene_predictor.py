@@ -1,16 +1,21 @@
 import os
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional
 
 import numpy as np
 import torch
 from PIL import Image
-from ultralytics import YOLO
 from ultralytics.data.augment import LetterBox
 from ultralytics.utils.ops import scale_masks
+from services.metrics import model_phase, count_detections
+from ai_model.lazy import LazyModel
+from ai_model import artifacts, rle
 
 # ── 모델 경로 및 로드 ───────────────────────────────────────────────────────────
-MODEL_PATH = os.path.join(os.path.dirname(__file__), 'hygiene0728_best.pt')
-model = YOLO(MODEL_PATH)
+MODEL_PATH = artifacts.path('hygiene')
+_model = LazyModel('hygiene', lambda: artifacts.load_yolo('hygiene'))
+
+def get_model():
+    return _model.get()
 
 # ── 클래스 ID → 이름 매핑 ──────────────────────────────────────────────────────
 YOLO_CLASS_MAP: Dict[int, str] = {
@@ -46,71 +51,91 @@ def _prepare_image_for_yolo(pil_img: Image.Image, imgsz: int = 640):
     img_lb = lb(image=img_np)
     return img_lb, lb
 
+def compose_overlay(size: Tuple[int, int], detections: List[Dict]) -> Image.Image:
+    """투명 배경에 탐지별 마스크를 클래스 색으로 합성 (mask_array 또는 저장된 mask_rle 사용)."""
+    overlay_img = Image.new("RGBA", size, (0, 0, 0, 0))
+    for det in detections:
+        color = PALETTE.get(det["class_id"], (255, 255, 255, 128))
+        mask = det.get("mask_array")
+        if mask is None:
+            mask = rle.decode(det["mask_rle"])
+        mask_img = Image.fromarray((mask * 255).astype(np.uint8))
+        color_layer = Image.new("RGBA", size, color)
+        colored = Image.composite(color_layer, Image.new("RGBA", size, (0, 0, 0, 0)), mask_img)
+        overlay_img = Image.alpha_composite(overlay_img, colored)
+    return overlay_img
+
 def predict_mask_and_overlay_with_all(
     pil_img: Image.Image,
-    overlay_save_path: str
+    overlay_save_path: Optional[str] = None,
+    render_overlay: bool = True,
 ) -> Tuple[
-    Image.Image,
+    Optional[Image.Image],
     List[Dict],
     float,
     str,
     str,
 ]:
+    # render_overlay=False 면 마스크 합성을 건너뛰고 오버레이 자리에 None (벡터 오버레이 응답)
     orig_w, orig_h = pil_img.size
-    img_np = np.array(pil_img.convert("RGB"))
 
     # LetterBox 전처리
-    lb = LetterBox(new_shape=(640, 640))
-    img_lb = lb(image=img_np)
-    img_tensor = torch.from_numpy(img_lb).permute(2, 0, 1).float().unsqueeze(0) / 255.0
+    with model_phase('hygiene', 'preprocess'):
+        img_np = np.array(pil_img.convert("RGB"))
+        lb = LetterBox(new_shape=(640, 640))
+        img_lb = lb(image=img_np)
+        img_tensor = torch.from_numpy(img_lb).permute(2, 0, 1).float().unsqueeze(0) / 255.0
 
     # 추론
-    results = model(img_tensor, verbose=False)
+    with _model.lease() as model, model_phase('hygiene', 'infer'):
+        results = model(img_tensor, verbose=False)
     r = results[0]
 
     # 탐지 없으면 완전 투명 PNG 저장
     if r.masks is None or len(r.boxes.cls) == 0:
         empty = Image.new("RGBA", (orig_w, orig_h), (0, 0, 0, 0))
-        empty.save(overlay_save_path, format="PNG")
-        return empty, [], 0.0, os.path.basename(MODEL_PATH), "감지되지 않음"
-
-    # 마스크 크기 원본으로 복원
-    masks_data = r.masks.data
-    if masks_data.ndim == 3:
-        masks_data = masks_data[:, None, :, :]
-    elif masks_data.ndim == 4 and masks_data.shape[1] != 1:
-        masks_data = masks_data[:, :1, :, :]
-
-    r.masks.data = scale_masks(masks_data, (orig_h, orig_w))
-    masks_scaled = r.masks.data.squeeze(1)
-
-    # 투명 배경에서 시작
-    overlay_img = Image.new("RGBA", (orig_w, orig_h), (0, 0, 0, 0))
+        if overlay_save_path:
+            with model_phase('hygiene', 'png_encode'):
+                empty.save(overlay_save_path, format="PNG")
+        return (empty if render_overlay else None), [], 0.0, os.path.basename(MODEL_PATH), "감지되지 않음"
 
+    # 마스크 크기 원본으로 복원 + 디텍션 기록
     detections: List[Dict] = []
-    for seg, cls_t, conf_t, box in zip(masks_scaled, r.boxes.cls, r.boxes.conf, r.boxes.xyxy):
-        cls_id = int(cls_t.item())
-        color = PALETTE.get(cls_id, (255, 255, 255, 128))
-
-        # 마스크 합성
-        mask = seg.cpu().numpy()
-        mask_img = Image.fromarray((mask * 255).astype(np.uint8))
-        color_layer = Image.new("RGBA", (orig_w, orig_h), color)
-        colored = Image.composite(color_layer, Image.new("RGBA", (orig_w, orig_h), (0, 0, 0, 0)), mask_img)
-        overlay_img = Image.alpha_composite(overlay_img, colored)
-
-        # 디텍션 기록
-        x1, y1, x2, y2 = map(float, box.tolist())
-        detections.append({
-            "class_id": cls_id,
-            "label": YOLO_CLASS_MAP.get(cls_id, "Unknown"),
-            "confidence": float(conf_t.item()),
-            "bbox": [x1, y1, x2, y2],
-            "mask_array": mask, # 마스크 데이터 추가
-        })
-
-    # 투명 PNG 저장
-    overlay_img.save(overlay_save_path, format="PNG")
+    with model_phase('hygiene', 'postprocess'):
+        masks_data = r.masks.data
+        if masks_data.ndim == 3:
+            masks_data = masks_data[:, None, :, :]
+        elif masks_data.ndim == 4 and masks_data.shape[1] != 1:
+            masks_data = masks_data[:, :1, :, :]
+
+        r.masks.data = scale_masks(masks_data, (orig_h, orig_w))
+        masks_scaled = r.masks.data.squeeze(1)
+
+        for seg, cls_t, conf_t, box in zip(masks_scaled, r.boxes.cls, r.boxes.conf, r.boxes.xyxy):
+            cls_id = int(cls_t.item())
+
+            # 디텍션 기록
+            x1, y1, x2, y2 = map(float, box.tolist())
+            detections.append({
+                "class_id": cls_id,
+                "label": YOLO_CLASS_MAP.get(cls_id, "Unknown"),
+                "confidence": float(conf_t.item()),
+                "bbox": [x1, y1, x2, y2],
+                "mask_array": seg.cpu().numpy(), # 마스크 데이터 추가
+            })
+
+    # 투명 배경에서 마스크 합성
+    overlay_img = None
+    if render_overlay or overlay_save_path:
+        with model_phase('hygiene', 'overlay_render'):
+            overlay_img = compose_overlay((orig_w, orig_h), detections)
+
+    # 투명 PNG 저장 (None 이면 호출 측에서 저장)
+    if overlay_save_path:
+        with model_phase('hygiene', 'png_encode'):
+            overlay_img.save(overlay_save_path, format="PNG")
+
+    count_detections('hygiene', [det["label"] for det in detections])
 
     # 평균 confidence
     avg_confidence = float(r.boxes.conf.mean().item()) if r.boxes.conf is not None else 0.0
@@ -0,0 +1,79 @@
+# ai_model/lazy.py
+"""
+모델 지연 로딩.
+
+각 ai_model 모듈은 import 시점이 아니라 첫 추론 시점에 가중치를 로드합니다.
+추론 워커처럼 미리 올려두고 싶은 경우 preload_models() 를 호출합니다 (app.py 의 LAZY_STARTUP=0).
+로드된 모델은 레플리카 풀(ai_model/pool.py)로 관리되며, 추론은 lease() 로 빌린 레플리카로 합니다.
+"""
+import time
+import logging
+import importlib
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+from services.metrics import mark_model_loaded
+from ai_model.pool import ModelPool
+
+logger = logging.getLogger(__name__)
+
+# 모델 이름 → 모듈 (preload 순서)
+MODEL_MODULES: Dict[str, str] = {
+    "disease": "ai_model.predictor",
+    "hygiene": "ai_model.hygiene_predictor",
+    "tooth_number": "ai_model.tooth_number_predictor",
+    "xray": "ai_model.xray_detector",
+    "implant": "ai_model.predict_implant_manufacturer",
+    "legacy_camera": "ai_model.model",
+}
+
+
+class LazyModel:
+    """첫 사용 때 factory 로 레플리카 풀을 한 번만 만들어 캐시합니다 (스레드 안전)."""
+
+    def __init__(self, name: str, factory: Callable):
+        self.name = name
+        self._factory = factory
+        self._pool: Optional[ModelPool] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._pool is not None
+
+    def pool(self) -> ModelPool:
+        if self._pool is not None:
+            return self._pool
+        with self._lock:
+            if self._pool is None:
+                start = time.perf_counter()
+                pool = ModelPool(self.name, self._factory)
+                mark_model_loaded(self.name, pool.primary is not None)
+                logger.info(f"모델 로드 완료: {self.name} x{pool.size} ({int((time.perf_counter() - start) * 1000)}ms)")
+                self._pool = pool
+        return self._pool
+
+    def get(self):
+        """첫 번째 레플리카 (preload / 메타데이터 조회용 — 추론에는 lease() 사용)."""
+        return self.pool().primary
+
+    def lease(self, timeout: Optional[float] = None):
+        """with model.lease() as replica: ... — 레플리카 하나를 독점해서 사용합니다."""
+        return self.pool().lease(timeout)
+
+    def reset(self):
+        """다음 사용 시 다시 로드하도록 풀을 비웁니다."""
+        with self._lock:
+            self._pool = None
+            mark_model_loaded(self.name, False)
+
+
+def preload_models(names: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """지정한(기본: 전체) 모델을 import + 로드하고, 모델별 소요 시간(ms)을 반환합니다."""
+    elapsed = {}
+    for name in (names or MODEL_MODULES):
+        start = time.perf_counter()
+        module = importlib.import_module(MODEL_MODULES[name])
+        module.get_model()
+        elapsed[name] = int((time.perf_counter() - start) * 1000)
+    return elapsed
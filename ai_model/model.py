@@ -3,16 +3,23 @@ import json
 import cv2
 import numpy as np
 from datetime import datetime
-from ultralytics import YOLO
+from ai_model.lazy import LazyModel
+from ai_model import artifacts
 
 # === [YOLO 모델 로딩] ==============================
-MODEL_PATH = os.path.join(os.path.dirname(__file__), 'best.pt')
-_model = None
+MODEL_PATH = artifacts.path('legacy_camera')
 
-try:
-    _model = YOLO(MODEL_PATH)
-except Exception as e:
-    _model = None
+def _load_model():
+    try:
+        return artifacts.load_yolo('legacy_camera')
+    except Exception as e:
+        return None
+
+# 첫 추론 시 로드 (로드 실패 시 None)
+_model = LazyModel('legacy_camera', _load_model)
+
+def get_model():
+    return _model.get()
 
 # === [AI 추론 함수] =================================
 def perform_inference(image_path, processed_output_dir):
@@ -20,7 +27,7 @@ def perform_inference(image_path, processed_output_dir):
     주어진 이미지에 대해 YOLOv11-seg 추론을 수행하고,
     결과가 그려진 이미지를 저장하고 JSON 데이터를 반환합니다.
     """
-    if _model is None:
+    if get_model() is None:
         return {
             "error": "AI 모델이 로드되지 않았습니다.",
             "prediction": "N/A",
@@ -34,7 +41,8 @@ def perform_inference(image_path, processed_output_dir):
 
     try:
         # 추론 수행
-        results = _model(image_path, conf=0.25, iou=0.7, save=False)
+        with _model.lease() as model:
+            results = model(image_path, conf=0.25, iou=0.7, save=False)
         annotated_img = results[0].plot()
 
         # 처리된 이미지 저장
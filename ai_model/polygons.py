@@ -0,0 +1,48 @@
+# ai_model/polygons.py
+"""
+세그멘테이션 마스크 → 단순화된 다각형 (벡터 오버레이 응답용).
+
+업로드 요청에 overlay_mode=vector 를 주면 질병/위생 결과를 마스크 PNG 대신 탐지별 다각형으로 돌려주고,
+클라이언트가 직접 그립니다 (서버는 합성/PNG 인코딩을 하지 않음).
+
+- 원본 해상도로 복원한 마스크(predictor 의 mask_array)에서 외곽선을 찾고(cv2.findContours, 구멍 무시)
+  Douglas-Peucker(cv2.approxPolyDP)로 tolerance 픽셀 이내에서 점을 줄입니다.
+  (ultralytics masks.xy 는 LetterBox 된 640 입력 기준 좌표라 원본 좌표로 다시 옮겨야 하므로 쓰지 않음)
+- 좌표는 원본 이미지 픽셀 정수, 델타 인코딩한 평평한 리스트입니다.
+      [x0, y0, x1 - x0, y1 - y0, x2 - x1, y2 - y1, ...]
+  디코딩은 짝수/홀수 위치별 누적합 (delta_decode).
+- 한 탐지의 마스크가 여러 조각이면 다각형도 여러 개, min_area 픽셀 미만 조각은 버립니다.
+"""
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+def delta_encode(points: np.ndarray) -> List[int]:
+    """(N, 2) 정수 좌표 → [x0, y0, dx1, dy1, ...]."""
+    pts = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+    deltas = np.vstack([pts[:1], np.diff(pts, axis=0)])
+    return deltas.ravel().tolist()
+
+
+def delta_decode(flat: Sequence[int]) -> List[Tuple[int, int]]:
+    """delta_encode 의 역변환 → [(x, y), ...]."""
+    deltas = np.asarray(flat, dtype=np.int64).reshape(-1, 2)
+    return [tuple(p) for p in np.cumsum(deltas, axis=0).tolist()]
+
+
+def mask_to_polygons(mask: np.ndarray, tolerance: float = 1.5, min_area: float = 16.0) -> List[List[int]]:
+    """0~1 마스크 (H, W) → 델타 인코딩된 다각형 목록."""
+    binary = (np.asarray(mask) > 0.5).astype(np.uint8)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    polygons = []
+    for contour in contours:
+        if cv2.contourArea(contour) < min_area:
+            continue
+        if tolerance > 0:
+            contour = cv2.approxPolyDP(contour, tolerance, True)
+        if len(contour) < 3:
+            continue
+        polygons.append(delta_encode(contour.reshape(-1, 2)))
+    return polygons
@@ -0,0 +1,90 @@
+# ai_model/pool.py
+"""
+모델 레플리카 풀.
+
+ultralytics 예측기는 재진입이 보장되지 않으므로 한 레플리카는 한 번에 한 요청만 사용합니다.
+모델마다 MODEL_POOL_SIZE 개의 레플리카를 만들어 두고 lease() 로 빌려 쓰며,
+빈 레플리카가 없으면 MODEL_POOL_TIMEOUT 초까지 기다린 뒤 PoolTimeout 을 냅니다.
+
+torch intra-op 스레드 수는 프로세스 전역 설정이라 레플리카별로 따로 줄 수 없으므로,
+(코어 수 / 레플리카 수) 를 한 번만 설정해 동시에 도는 forward 전체가 코어 수를 넘지 않게 합니다.
+(MODEL_POOL_THREADS 로 직접 지정 가능)
+"""
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from services.metrics import (
+    MODEL_POOL_WAIT_SECONDS, MODEL_POOL_IN_USE, MODEL_POOL_SIZE, MODEL_POOL_BUSY_SECONDS, MODEL_POOL_TIMEOUTS,
+)
+
+logger = logging.getLogger(__name__)
+
+_threads_lock = threading.Lock()
+_threads_configured = False
+
+
+class PoolTimeout(RuntimeError):
+    """MODEL_POOL_TIMEOUT 안에 빈 레플리카를 얻지 못했을 때."""
+
+
+def pool_size() -> int:
+    return max(1, int(os.getenv("MODEL_POOL_SIZE", "1")))
+
+
+def pool_timeout() -> float:
+    return float(os.getenv("MODEL_POOL_TIMEOUT", "30"))
+
+
+def configure_threads(replicas: int):
+    """torch intra-op 스레드 수를 프로세스당 한 번 설정합니다."""
+    global _threads_configured
+    with _threads_lock:
+        if _threads_configured:
+            return
+        torch = sys.modules.get("torch")
+        if torch is None:
+            return  # 모델 로드 후(= torch import 후) 다시 호출됨
+        threads = int(os.getenv("MODEL_POOL_THREADS", "0")) or max(1, (os.cpu_count() or 1) // replicas)
+        torch.set_num_threads(threads)
+        _threads_configured = True
+        logger.info(f"torch intra-op threads = {threads} (replicas={replicas})")
+
+
+class ModelPool:
+    def __init__(self, name: str, factory: Callable, size: Optional[int] = None):
+        self.name = name
+        self.size = size or pool_size()
+        self.replicas: List = [factory() for _ in range(self.size)]
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        for replica in self.replicas:
+            self._idle.put(replica)
+        configure_threads(self.size)
+        MODEL_POOL_SIZE.labels(model=name).set(self.size)
+
+    @property
+    def primary(self):
+        return self.replicas[0]
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        start = time.perf_counter()
+        try:
+            replica = self._idle.get(timeout=pool_timeout() if timeout is None else timeout)
+        except queue.Empty:
+            MODEL_POOL_TIMEOUTS.labels(model=self.name).inc()
+            raise PoolTimeout(f"{self.name} 모델 레플리카 대기 시간 초과")
+        leased = time.perf_counter()
+        MODEL_POOL_WAIT_SECONDS.labels(model=self.name).observe(leased - start)
+        MODEL_POOL_IN_USE.labels(model=self.name).inc()
+        try:
+            yield replica
+        finally:
+            MODEL_POOL_IN_USE.labels(model=self.name).dec()
+            MODEL_POOL_BUSY_SECONDS.labels(model=self.name).inc(time.perf_counter() - leased)
+            self._idle.put(replica)
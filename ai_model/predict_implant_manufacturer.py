@@ -1,5 +1,6 @@
 import os
 import sys
+from typing import Dict, List, Optional
 import torch
 import torch.nn.functional as F
 from torchvision import transforms
@@ -7,6 +8,9 @@ from PIL import Image, ImageDraw, ImageFont
 import timm
 import ttach as tta
 from ai_model.xray_detector import detect_xray  # YOLO 탐지 결과 사용 (박스 정보만 활용)
+from services.metrics import model_phase, count_detections
+from ai_model.lazy import LazyModel
+from ai_model import artifacts
 
 # 클래스 수
 NUM_CLASSES = 42
@@ -27,7 +31,7 @@ MANUFACTURER_MAP = {
     39: '덴츠플라이 Xive', 40: 'xi', 41: 'xin'
 }
 
-MODEL_PATH = "./ai_model/dm_nfnet_f0_best_acc_model_state.pt"
+MODEL_PATH = artifacts.path('implant')
 MODEL_NAME = "dm_nfnet_f0"
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
@@ -37,39 +41,58 @@ transform = transforms.Compose([
     transforms.Normalize([0.5, 0.5, 0.5], [0.5, 0.5, 0.5])
 ])
 
-model = timm.create_model(MODEL_NAME, pretrained=True, num_classes=NUM_CLASSES)
-model.load_state_dict(torch.load(MODEL_PATH, map_location=DEVICE))
-model = model.to(DEVICE)
-model.eval()
+def _load_model():
+    # ImageNet 가중치는 곧바로 덮어쓰므로 받지 않음 (pretrained=False → 허브 접근 없음)
+    model = timm.create_model(MODEL_NAME, pretrained=False, num_classes=NUM_CLASSES)
+    # assign=True: 메모리 맵된 텐서를 복사하지 않고 그대로 파라미터로 사용
+    model.load_state_dict(artifacts.load_state_dict('implant', map_location=DEVICE), assign=True)
+    model = model.to(DEVICE)
+    model.eval()
+    return model
+
+# ✅ 모델 로드 (첫 추론 시 로드)
+_model = LazyModel('implant', _load_model)
+
+def get_model():
+    return _model.get()
 
 tta_transforms = tta.Compose([])
 
 def predict_crop_image(image: Image.Image):
-    image_tensor = transform(image).unsqueeze(0).to(DEVICE)
-    with torch.no_grad():
+    with model_phase('implant', 'preprocess'):
+        image_tensor = transform(image).unsqueeze(0).to(DEVICE)
+    with _model.lease() as model, model_phase('implant', 'infer'), torch.no_grad():
         outputs = model(image_tensor)
         probs = F.softmax(outputs, dim=1)
         pred_class = probs.argmax(dim=1).item()
         confidence = probs[0][pred_class].item()
     return pred_class, confidence
 
-def classify_implants_from_xray(xray_image_path: str):
+def classify_implants_from_xray(xray_image_path: Optional[str] = None, image: Optional[Image.Image] = None,
+                                detections: Optional[List[Dict]] = None, save_overlay: bool = True):
+    """
+    image 를 넘기면 파일을 다시 열지 않고, detections(detect_xray 결과)를 넘기면 탐지를 다시 돌리지 않습니다.
+    save_overlay=False 면 분류 결과 이미지(<원본>_implant_classified.png)를 그리거나 저장하지 않습니다.
+    """
     try:
+        # 임플란트 분류 이미지를 그릴 베이스로 원본 X-ray 이미지를 로드합니다.
+        if image is None:
+            image = Image.open(xray_image_path).convert("RGB")
+
         # detect_xray를 호출하여 임플란트 박스 정보를 얻습니다.
         # 이 단계에서 생성되는 이미지는 사용하지 않습니다.
-        result_from_detector = detect_xray(xray_image_path) 
-        
-        # 임플란트 분류 이미지를 그릴 베이스로 원본 X-ray 이미지를 로드합니다.
-        image = Image.open(xray_image_path).convert("RGB") 
+        if detections is None:
+            detections = detect_xray(xray_image_path, image=image, save_overlay=False)['detections']
     except Exception as e:
         print(f"❌ 오류: {e}")
         return [], None # 빈 리스트와 None을 반환
 
     predictions = []
+    save_overlay = save_overlay and xray_image_path is not None
     
     # 임플란트 박스와 클래스 번호를 그릴 Image 객체 (원본 이미지를 복사하여 사용)
-    implant_overlay_image = image.copy() 
-    draw = ImageDraw.Draw(implant_overlay_image)
+    implant_overlay_image = image.copy() if save_overlay else None
+    draw = ImageDraw.Draw(implant_overlay_image) if save_overlay else None
 
     # 폰트 설정 (흰색 배경에 잘 보이도록 검은색 폰트 사용)
     try:
@@ -78,7 +101,7 @@ def classify_implants_from_xray(xray_image_path: str):
     except IOError:
         font = ImageFont.load_default() # 폰트 로드 실패 시 기본 폰트 사용
 
-    for obj in result_from_detector['detections']: # xray_detector의 탐지 결과 사용
+    for obj in detections: # xray_detector의 탐지 결과 사용
         if obj['class_name'] != IMPLANT_CLASS_NAME:
             continue
 
@@ -91,27 +114,28 @@ def classify_implants_from_xray(xray_image_path: str):
             print(f"❌ 임플란트 예측 실패: {e}")
             continue
 
-        # ✅ 박스 위에 클래스 번호만 그리기 (검은색 글씨)
-        label_text = str(pred_class) # 클래스 번호만
+        if draw is not None:
+            # ✅ 박스 위에 클래스 번호만 그리기 (검은색 글씨)
+            label_text = str(pred_class) # 클래스 번호만
         
-        # 텍스트 크기를 얻어 텍스트 박스 위치 계산
-        # draw.textbbox((x, y), text, font)는 폰트에 따라 텍스트의 바운딩 박스를 반환합니다.
-        # y1 - 22는 텍스트가 박스 위에 위치하도록 조정하는 예시이며, 폰트 크기에 따라 조정 필요
-        text_bbox = draw.textbbox((x1, y1 - 22), label_text, font=font) 
-        text_width = text_bbox[2] - text_bbox[0]
-        text_height = text_bbox[3] - text_bbox[1]
-
-        # 텍스트 배경 (박스 위에 라벨이 잘 보이도록)
-        # 텍스트가 시작되는 x1, y1-22에서 텍스트의 폭과 높이를 고려하여 배경 박스를 그립니다.
-        text_bg_x1 = x1
-        text_bg_y1 = y1 - text_height - 5 # 텍스트가 박스 바로 위에 위치하도록 y 좌표 조정
-        text_bg_x2 = x1 + text_width + 5
-        text_bg_y2 = y1 - 5 # 텍스트 박스 아래쪽 y 좌표 조정
+            # 텍스트 크기를 얻어 텍스트 박스 위치 계산
+            # draw.textbbox((x, y), text, font)는 폰트에 따라 텍스트의 바운딩 박스를 반환합니다.
+            # y1 - 22는 텍스트가 박스 위에 위치하도록 조정하는 예시이며, 폰트 크기에 따라 조정 필요
+            text_bbox = draw.textbbox((x1, y1 - 22), label_text, font=font) 
+            text_width = text_bbox[2] - text_bbox[0]
+            text_height = text_bbox[3] - text_bbox[1]
+
+            # 텍스트 배경 (박스 위에 라벨이 잘 보이도록)
+            # 텍스트가 시작되는 x1, y1-22에서 텍스트의 폭과 높이를 고려하여 배경 박스를 그립니다.
+            text_bg_x1 = x1
+            text_bg_y1 = y1 - text_height - 5 # 텍스트가 박스 바로 위에 위치하도록 y 좌표 조정
+            text_bg_x2 = x1 + text_width + 5
+            text_bg_y2 = y1 - 5 # 텍스트 박스 아래쪽 y 좌표 조정
         
-        # 임플란트 박스 자체는 빨간색 유지, 텍스트 배경은 노란색, 글씨는 검은색
-        draw.rectangle([x1, y1, x2, y2], outline="red", width=2) # 임플란트 박스 (빨간색)
-        draw.rectangle([text_bg_x1, text_bg_y1, text_bg_x2, text_bg_y2], fill="yellow") # 텍스트 배경 (노란색)
-        draw.text((text_bg_x1 + 2, text_bg_y1), label_text, font=font, fill=(0, 0, 0)) # 텍스트 (검은색)
+            # 임플란트 박스 자체는 빨간색 유지, 텍스트 배경은 노란색, 글씨는 검은색
+            draw.rectangle([x1, y1, x2, y2], outline="red", width=2) # 임플란트 박스 (빨간색)
+            draw.rectangle([text_bg_x1, text_bg_y1, text_bg_x2, text_bg_y2], fill="yellow") # 텍스트 배경 (노란색)
+            draw.text((text_bg_x1 + 2, text_bg_y1), label_text, font=font, fill=(0, 0, 0)) # 텍스트 (검은색)
 
         predictions.append({
             "original_image": xray_image_path,
@@ -123,8 +147,12 @@ def classify_implants_from_xray(xray_image_path: str):
     
     # 임플란트 박스와 클래스 번호가 그려진 이미지를 반환 (경로와 Image 객체 모두)
     # 임플란트 전용 이미지 저장 경로
-    implant_output_path = xray_image_path.replace(".png", "_implant_classified.png").replace(".jpg", "_implant_classified.jpg")
-    implant_overlay_image.save(implant_output_path)
+    implant_output_path = None
+    if save_overlay:
+        implant_output_path = xray_image_path.replace(".png", "_implant_classified.png").replace(".jpg", "_implant_classified.jpg")
+        with model_phase('implant', 'png_encode'):
+            implant_overlay_image.save(implant_output_path)
+    count_detections('implant', [p['predicted_manufacturer_name'] for p in predictions])
 
     return predictions, implant_output_path # 예측 결과와 새로운 이미지 경로를 튜플로 반환
 
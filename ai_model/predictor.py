@@ -2,12 +2,14 @@ import os
 from PIL import Image
 import numpy as np
 import torch
-from ultralytics import YOLO
 from ultralytics.data.augment import LetterBox
 from ultralytics.utils.ops import scale_masks
 import time
 import logging
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+from services.metrics import model_phase, count_detections
+from ai_model.lazy import LazyModel
+from ai_model import artifacts, rle
 
 # Set up logging
 predictor_logger = logging.getLogger("predictor_logger")
@@ -21,9 +23,12 @@ if not predictor_logger.handlers:
     fh.setFormatter(formatter)
     predictor_logger.addHandler(fh)
 
-# ✅ 모델 로드
-MODEL_PATH = os.path.join(os.path.dirname(__file__), 'disease0728_best.pt')
-model = YOLO(MODEL_PATH)
+# ✅ 모델 로드 (첫 추론 시 로드)
+MODEL_PATH = artifacts.path('disease')
+_model = LazyModel('disease', lambda: artifacts.load_yolo('disease'))
+
+def get_model():
+    return _model.get()
 
 # ✅ 클래스 이름 (YOLO class index 기준)
 YOLO_CLASS_MAP = {
@@ -53,67 +58,89 @@ PALETTE = {
     8: (  0, 255,   0, 220), # 치주질환 말기  (초록)
 }
 
-def predict_overlayed_image(pil_img: Image.Image, overlay_save_path: str) -> Tuple[
-    Image.Image,
+def compose_overlay(size: Tuple[int, int], detections: List[Dict]) -> Image.Image:
+    """투명 배경에 탐지별 마스크를 클래스 색으로 합성 (mask_array 또는 저장된 mask_rle 사용)."""
+    overlay_img = Image.new("RGBA", size, (0, 0, 0, 0))
+    for det in detections:
+        color = PALETTE.get(det["class_id"], (255, 255, 255, 128))
+        mask = det.get("mask_array")
+        if mask is None:
+            mask = rle.decode(det["mask_rle"])
+        mask_img = Image.fromarray((mask * 255).astype(np.uint8))
+
+        # 오버레이 이미지 생성
+        color_layer = Image.new("RGBA", size, color)
+        colored = Image.composite(color_layer, Image.new("RGBA", size, (0, 0, 0, 0)), mask_img)
+        overlay_img = Image.alpha_composite(overlay_img, colored)
+    return overlay_img
+
+def predict_overlayed_image(pil_img: Image.Image, overlay_save_path: Optional[str] = None,
+                            render_overlay: bool = True) -> Tuple[
+    Optional[Image.Image],
     List[Dict],
     float,
     str,
     str
 ]:
+    # render_overlay=False 면 마스크 합성을 건너뛰고 오버레이 자리에 None (벡터 오버레이 응답: mask_array 로 다각형 생성)
     start_time = time.perf_counter()
     orig_w, orig_h = pil_img.size
-    img_np = np.array(pil_img.convert("RGB"))
 
     # ✅ LetterBox 전처리
-    lb = LetterBox(new_shape=(640, 640))
-    img_lb = lb(image=img_np)
-    img_tensor = torch.from_numpy(img_lb).permute(2, 0, 1).float().unsqueeze(0) / 255.0
+    with model_phase('disease', 'preprocess'):
+        img_np = np.array(pil_img.convert("RGB"))
+        lb = LetterBox(new_shape=(640, 640))
+        img_lb = lb(image=img_np)
+        img_tensor = torch.from_numpy(img_lb).permute(2, 0, 1).float().unsqueeze(0) / 255.0
 
     # ✅ 추론
-    results = model(img_tensor, verbose=False)
+    with _model.lease() as model, model_phase('disease', 'infer'):
+        results = model(img_tensor, verbose=False)
     r = results[0]
 
     # ✅ 탐지 없으면 투명 PNG 저장 후 반환
     if r.masks is None or len(r.boxes.cls) == 0:
-        Image.new("RGBA", (orig_w, orig_h), (0, 0, 0, 0)).save(overlay_save_path, format="PNG")
+        if overlay_save_path:
+            with model_phase('disease', 'png_encode'):
+                Image.new("RGBA", (orig_w, orig_h), (0, 0, 0, 0)).save(overlay_save_path, format="PNG")
         
         elapsed = int((time.perf_counter() - start_time) * 1000)
         predictor_logger.info(f"모델1 추론 (감지 없음): {elapsed}ms")
 
-        return pil_img.copy(), [], 0.0, os.path.basename(MODEL_PATH), "감지되지 않음"
-
-    # ✅ 마스크 복원
-    masks_data = r.masks.data
-    if masks_data.ndim == 3:
-        masks_data = masks_data[:, None, :, :]
-    masks_scaled = scale_masks(masks_data, (orig_h, orig_w)).squeeze(1)
+        return (pil_img.copy() if render_overlay else None), [], 0.0, os.path.basename(MODEL_PATH), "감지되지 않음"
 
-    # ✅ 완전 투명 배경에서 시작
-    overlay_img = Image.new("RGBA", (orig_w, orig_h), (0, 0, 0, 0))
-
-    # ✅ 마스크 부분만 색상 합성
+    # ✅ 마스크 복원 + 디텍션 정보 정리
     detected_results = []
-    for seg, cls_t, conf_t, box in zip(masks_scaled, r.boxes.cls, r.boxes.conf, r.boxes.xyxy):
-        cls_id = int(cls_t.item())
-        color = PALETTE.get(cls_id, (255, 255, 255, 128))
-        mask = seg.cpu().numpy()
-        mask_img = Image.fromarray((mask * 255).astype(np.uint8))
-        
-        # 오버레이 이미지 생성
-        color_layer = Image.new("RGBA", (orig_w, orig_h), color)
-        colored = Image.composite(color_layer, Image.new("RGBA", (orig_w, orig_h), (0, 0, 0, 0)), mask_img)
-        overlay_img = Image.alpha_composite(overlay_img, colored)
-
-        # 디텍션 정보 저장
-        detected_results.append({
-            "label": YOLO_CLASS_MAP.get(cls_id, "Unknown"),
-            "confidence": float(conf_t.item()),
-            "mask_array": mask, # 마스크 데이터 추가
-            "bbox": box.tolist(), # 바운딩 박스 정보 추가
-        })
-
-    # ✅ overlay만 PNG로 저장
-    overlay_img.save(overlay_save_path, format="PNG")
+    with model_phase('disease', 'postprocess'):
+        masks_data = r.masks.data
+        if masks_data.ndim == 3:
+            masks_data = masks_data[:, None, :, :]
+        masks_scaled = scale_masks(masks_data, (orig_h, orig_w)).squeeze(1)
+
+        for seg, cls_t, conf_t, box in zip(masks_scaled, r.boxes.cls, r.boxes.conf, r.boxes.xyxy):
+            cls_id = int(cls_t.item())
+
+            # 디텍션 정보 저장
+            detected_results.append({
+                "class_id": cls_id,
+                "label": YOLO_CLASS_MAP.get(cls_id, "Unknown"),
+                "confidence": float(conf_t.item()),
+                "mask_array": seg.cpu().numpy(), # 마스크 데이터 추가
+                "bbox": box.tolist(), # 바운딩 박스 정보 추가
+            })
+
+    # ✅ 완전 투명 배경에서 마스크 부분만 색상 합성
+    overlay_img = None
+    if render_overlay or overlay_save_path:
+        with model_phase('disease', 'overlay_render'):
+            overlay_img = compose_overlay((orig_w, orig_h), detected_results)
+
+    # ✅ overlay만 PNG로 저장 (None 이면 호출 측에서 저장)
+    if overlay_save_path:
+        with model_phase('disease', 'png_encode'):
+            overlay_img.save(overlay_save_path, format="PNG")
+
+    count_detections('disease', [det["label"] for det in detected_results])
 
     elapsed = int((time.perf_counter() - start_time) * 1000)
     predictor_logger.info(f"모델1 추론 완료: {elapsed}ms, 감지된 객체 수: {len(detected_results)}")
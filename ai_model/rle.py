@@ -0,0 +1,79 @@
+# ai_model/rle.py
+"""
+세그멘테이션 마스크 ↔ RLE (탐지 결과와 함께 Mongo 에 저장, 오버레이 지연 렌더링용).
+
+COCO(pycocotools) 의 압축 RLE 와 같은 형식입니다.
+    {"size": [H, W], "counts": "<문자열>"}
+- 0~1 마스크를 0.5 기준으로 이진화한 뒤 열 우선(column-major) 순서로 0/1 연속 길이를 셉니다.
+  첫 길이는 항상 0 의 개수입니다 (첫 픽셀이 1 이면 0).
+- 길이 목록은 두 칸 앞 값과의 차이를 5비트씩 나눠 ASCII 로 적습니다 (pycocotools 의 rleToString).
+  치아/병변 마스크는 원본 해상도에서도 보통 수 KB 입니다.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+
+def _counts(mask: np.ndarray) -> List[int]:
+    flat = (np.asarray(mask) > 0.5).ravel(order="F").astype(np.int8)
+    if flat.size == 0:
+        return []
+    change = np.flatnonzero(np.diff(flat)) + 1
+    bounds = np.concatenate([[0], change, [flat.size]])
+    counts = np.diff(bounds).tolist()
+    if flat[0] == 1:
+        counts.insert(0, 0)
+    return counts
+
+
+def _to_string(counts: List[int]) -> str:
+    out = []
+    for i, x in enumerate(counts):
+        if i > 2:
+            x -= counts[i - 2]
+        more = True
+        while more:
+            c = x & 0x1F
+            x >>= 5
+            more = x != -1 if c & 0x10 else x != 0
+            if more:
+                c |= 0x20
+            out.append(chr(c + 48))
+    return "".join(out)
+
+
+def _from_string(s: str) -> List[int]:
+    counts: List[int] = []
+    p = 0
+    while p < len(s):
+        x = 0
+        k = 0
+        more = True
+        while more:
+            c = ord(s[p]) - 48
+            x |= (c & 0x1F) << (5 * k)
+            more = bool(c & 0x20)
+            p += 1
+            k += 1
+            if not more and c & 0x10:
+                x |= -1 << (5 * k)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return counts
+
+
+def encode(mask: np.ndarray) -> Dict:
+    """0~1 마스크 (H, W) → {"size": [H, W], "counts": str}."""
+    h, w = np.asarray(mask).shape[:2]
+    return {"size": [int(h), int(w)], "counts": _to_string(_counts(mask))}
+
+
+def decode(rle: Dict) -> np.ndarray:
+    """encode 의 역변환 → uint8 (H, W) 마스크 (0/1)."""
+    h, w = rle["size"]
+    counts = _from_string(rle["counts"])
+    values = np.zeros(len(counts), dtype=np.uint8)
+    values[1::2] = 1
+    flat = np.repeat(values, counts)
+    return flat.reshape((w, h)).T
@@ -1,13 +1,16 @@
-import os
 import numpy as np
 from PIL import Image
-from ultralytics import YOLO
 from typing import List, Dict
+from services.metrics import model_phase, observe_ultralytics_speed, count_detections
+from ai_model.lazy import LazyModel
+from ai_model import artifacts, rle
 
 # ✅ 설정
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-MODEL_PATH = os.path.join(BASE_DIR, "ai_model", "number_x_250806.pt")
-model = YOLO(MODEL_PATH)
+MODEL_PATH = artifacts.path('tooth_number')
+_model = LazyModel('tooth_number', lambda: artifacts.load_yolo('tooth_number'))
+
+def get_model():
+    return _model.get()
 
 # ✅ FDI 치아 번호 매핑
 FDI_CLASS_MAP = {
@@ -17,25 +20,77 @@ FDI_CLASS_MAP = {
     24: '41', 25: '42', 26: '43', 27: '44', 28: '45', 29: '46', 30: '47', 31: '48'
 }
 
-# ✅ 예측 + 오버레이 이미지 저장
-def predict_mask_and_overlay_only(pil_img, overlay_save_path):
+# ✅ 예측 + 오버레이 이미지 저장 (overlay_save_path=None 이면 저장하지 않고 이미지만 반환)
+def predict_mask_and_overlay_only(pil_img, overlay_save_path=None):
     rgb_img = np.array(pil_img.convert("RGB"))
-    results = model.predict(rgb_img, conf=0.25, imgsz=640)
+    with _model.lease() as model:
+        results = model.predict(rgb_img, conf=0.25, imgsz=640)
     result = results[0]
 
     if result is None:
         print("❌ 예측 결과 없음")
         return None
+    observe_ultralytics_speed('tooth_number', result)
 
-    overlay_img = Image.fromarray(result.plot()).resize(pil_img.size, Image.NEAREST)
-    overlay_img.save(overlay_save_path, format="PNG")
+    with model_phase('tooth_number', 'overlay_render'):
+        overlay_img = Image.fromarray(result.plot()).resize(pil_img.size, Image.NEAREST)
+    if overlay_save_path:
+        with model_phase('tooth_number', 'png_encode'):
+            overlay_img.save(overlay_save_path, format="PNG")
     return overlay_img
 
+# ✅ 한 번의 추론으로 탐지 목록 + 마스크(RLE) 반환 (오버레이는 render_overlay 로 필요할 때 그림)
+def predict_teeth(pil_img) -> List[Dict]:
+    # mask_rle 는 모델 입력 해상도(letterbox) 마스크 그대로: result.plot() 이 그 해상도에서 합성하므로 원본 크기로 늘리지 않음
+    rgb_img = np.array(pil_img.convert("RGB"))
+    with _model.lease() as model:
+        results = model.predict(rgb_img, conf=0.25, imgsz=640)
+    result = results[0]
+    observe_ultralytics_speed('tooth_number', result)
+
+    teeth = []
+    if result.masks is None or len(result.boxes.cls) == 0:
+        return teeth
+
+    with model_phase('tooth_number', 'postprocess'):
+        masks = result.masks.data.cpu().numpy()
+        for i in range(len(result.boxes.cls)):
+            class_id = int(result.boxes.cls[i].item())
+            teeth.append({
+                "class_id": class_id,
+                "confidence": float(result.boxes.conf[i].item()),
+                "tooth_number_fdi": FDI_CLASS_MAP.get(class_id, "Unknown"),
+                "bbox": result.boxes.xyxy[i].tolist(),
+                "name": result.names[class_id],  # plot() 라벨
+                "mask_rle": rle.encode(masks[i]),
+            })
+
+    count_detections('tooth_number', [tooth["tooth_number_fdi"] for tooth in teeth])
+    return teeth
+
+# ✅ predict_teeth 결과로 predict_mask_and_overlay_only 와 같은 오버레이를 다시 그림 (모델 불필요)
+def render_overlay(pil_img, teeth: List[Dict]):
+    import torch
+    from ultralytics.engine.results import Results
+
+    rgb_img = np.array(pil_img.convert("RGB"))
+    with model_phase('tooth_number', 'overlay_render'):
+        if not teeth:
+            return Image.fromarray(rgb_img).resize(pil_img.size, Image.NEAREST)
+        result = Results(
+            rgb_img, path="", names={tooth["class_id"]: tooth["name"] for tooth in teeth},
+            boxes=torch.tensor([tooth["bbox"] + [tooth["confidence"], tooth["class_id"]] for tooth in teeth]),
+            masks=torch.from_numpy(np.stack([rle.decode(tooth["mask_rle"]) for tooth in teeth]).astype(np.float32)),
+        )
+        return Image.fromarray(result.plot()).resize(pil_img.size, Image.NEAREST)
+
 # ✅ 모든 클래스 ID, confidence, FDI 번호, bbox 반환
 def get_all_class_info_json(pil_img) -> List[Dict]:
     rgb_img = np.array(pil_img.convert("RGB"))
-    results = model.predict(rgb_img, conf=0.25, imgsz=640)
+    with _model.lease() as model:
+        results = model.predict(rgb_img, conf=0.25, imgsz=640)
     result = results[0]
+    observe_ultralytics_speed('tooth_number', result)
 
     class_info_list = []
 
@@ -55,4 +110,5 @@ def get_all_class_info_json(pil_img) -> List[Dict]:
             "bbox": bbox, # bbox 추가
         })
 
+    count_detections('tooth_number', [info["tooth_number_fdi"] for info in class_info_list])
     return class_info_list
\ No newline at end of file
@@ -1,10 +1,18 @@
-from ultralytics import YOLO
+import os
 from PIL import Image, ImageDraw, ImageFont
 import torch
+import time
+from typing import Optional
+from services.metrics import MODEL_STAGE_SECONDS, model_phase, observe_ultralytics_speed, count_detections
+from ai_model.lazy import LazyModel
+from ai_model import artifacts
 
-# ✅ 모델 로드
-model_path = 'ai_model/xray_detect_best.pt'
-model = YOLO(model_path)
+# ✅ 모델 로드 (첫 추론 시 로드)
+model_path = artifacts.path('xray')
+_model = LazyModel('xray', lambda: artifacts.load_yolo('xray'))
+
+def get_model():
+    return _model.get()
 
 # 클래스 ID와 이름 매핑
 CLASS_NAMES = [
@@ -21,25 +29,34 @@ CLASS_COLORS = {
     '상실치아': (0, 0, 0)       # ✅ 검은색으로 변경
 }
 
-def detect_xray(image_path: str):
+def detect_xray(image_path: Optional[str] = None, image: Optional[Image.Image] = None, save_overlay: bool = True):
     """
     X-ray 이미지를 받아 YOLOv11x 모델로 탐지 수행하고, 결과를 이미지에 그립니다.
     이 버전에서는 박스만 표시하고 라벨과 신뢰도는 표시하지 않습니다.
+    image 를 넘기면 파일을 다시 열지 않고 그 이미지로 추론합니다 (업로드 요청에서 디코딩한 이미지).
+    save_overlay=False 면 박스 이미지(<원본>_detected.png)를 그리거나 저장하지 않습니다.
     """
-    # YOLO 모델 추론. 결과는 결과 객체의 리스트를 반환함.
-    results = model(image_path, conf=0.3)
+    if image is None:
+        image = Image.open(image_path).convert("RGB")
+
+    # YOLO 모델 추론. 결과는 결과 객체의 리스트를 반환함. (PIL 이미지는 ultralytics 가 BGR 로 변환)
+    with _model.lease() as model:
+        results = model(image, conf=0.3)
+    observe_ultralytics_speed('xray', results[0])
     
     # 첫 번째 이미지의 결과 객체에서 boxes 속성을 가져옵니다.
     boxes = results[0].boxes
 
     predictions = []
 
-    # 이미지 로드 및 그리기 객체 생성
-    image = Image.open(image_path).convert("RGB")
-    draw = ImageDraw.Draw(image)
+    # 그리기용 복사본 (호출 측 이미지는 변경하지 않음)
+    save_overlay = save_overlay and image_path is not None
+    overlay = image.copy() if save_overlay else None
+    draw = ImageDraw.Draw(overlay) if save_overlay else None
 
     line_thickness = 4
 
+    render_start = time.perf_counter()
     for box in boxes:
         cls_id = int(box.cls.item())
         
@@ -58,7 +75,8 @@ def detect_xray(image_path: str):
         # ✅ 박스만 그리기 (라벨 및 컨피던스 그리는 코드 제거)
         # 폰트 관련 설정 및 라벨 텍스트/배경 그리는 코드가 모두 제거되었습니다.
         color = CLASS_COLORS.get(class_name, (255, 255, 255)) # 클래스에 맞는 색상, 없으면 흰색
-        draw.rectangle([x1, y1, x2, y2], outline=color, width=line_thickness)
+        if draw is not None:
+            draw.rectangle([x1, y1, x2, y2], outline=color, width=line_thickness)
 
         predictions.append({
             'class_id': cls_id,
@@ -67,12 +85,18 @@ def detect_xray(image_path: str):
             'bbox': coords
         })
 
+    MODEL_STAGE_SECONDS.labels(model='xray', phase='overlay_render').observe(time.perf_counter() - render_start)
+    count_detections('xray', [p['class_name'] for p in predictions])
+
     # 변경된 이미지를 새로운 파일로 저장
-    output_path = image_path.replace(".png", "_detected.png").replace(".jpg", "_detected.jpg")
-    image.save(output_path)
+    output_path = None
+    if save_overlay:
+        output_path = image_path.replace(".png", "_detected.png").replace(".jpg", "_detected.jpg")
+        with model_phase('xray', 'png_encode'):
+            overlay.save(output_path)
 
     return {
         'image_path': output_path, # 저장된 새 이미지 경로 반환
         'detections': predictions,
-        'model': model_path
+        'model': os.path.basename(model_path)
     }
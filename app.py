@@ -4,11 +4,13 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from config import DevelopmentConfig
 from models.model import db, MongoDBClient
+from services import (
+    consult_stats, derivatives, image_delivery, image_store, metrics, mongo_indexes, overlay_format, overlay_render,
+    upload_ingest, write_behind,
+)
+from services.gemini import LazyGenerativeModel
 
-# ✅ Vertex AI 및 dotenv
-import vertexai
-from vertexai.preview.generative_models import GenerativeModel
-import google.generativeai as genai
+# ✅ dotenv
 from dotenv import load_dotenv
 
 # ✅ JWT
@@ -20,6 +22,9 @@ app.config.from_object(DevelopmentConfig)
 app.config["SERVER_BASE_URL"] = None  # ✅ 최초에는 None으로 초기화
 CORS(app)
 
+# ✅ 업로드 파일 파트는 수신 중에 크기/형식 검사 + sha256 (services/upload_ingest)
+upload_ingest.init_app(app)
+
 # ✅ .env 설정 로드
 load_dotenv()
 
@@ -28,17 +33,12 @@ app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'super-secret-key')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 3600
 jwt = JWTManager(app)
 
-# ✅ Gemini API 키 설정 및 모델 로드
+# ✅ Gemini API 키 확인 (google.generativeai import 와 모델 생성은 첫 호출 시)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise ValueError("Gemini API 키가 .env에 없습니다.")
-genai.configure(api_key=GEMINI_API_KEY)
 
-try:
-    gemini_model = genai.GenerativeModel("models/gemini-2.5-flash")
-    # print(f"✅ Gemini 모델 'gemini-2.5-flash' 로드 성공.")
-except Exception as e:
-    raise ValueError(f"Gemini 모델 로드 실패: {e}")
+gemini_model = LazyGenerativeModel("models/gemini-2.5-flash")
 
 # ✅ 폴더 생성
 os.makedirs(app.config['UPLOAD_FOLDER_ORIGINAL'], exist_ok=True)
@@ -50,7 +50,7 @@ os.makedirs(app.config['PROCESSED_FOLDER_XMODEL2'], exist_ok=True)
 
 # ✅ DB 초기화 및 Mongo 연결
 db.init_app(app)
-mongo_client = MongoDBClient(uri=app.config['MONGO_URI'], db_name=app.config['MONGO_DB_NAME'])
+mongo_client = MongoDBClient.from_config(app.config)
 
 try:
     mongo_client.client.admin.command('ping')
@@ -66,6 +66,35 @@ app.extensions['gemini_model'] = gemini_model
 
 with app.app_context():
     db.create_all()
+    # create_all 은 이미 있는 테이블에 새 인덱스를 추가하지 않으므로 모델에 선언한 인덱스를 따로 확인
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+# ✅ 진료 신청 일별 집계 (비어 있으면 consult_request 에서 채움)
+consult_stats.init_app(app)
+
+# ✅ MongoDB 인덱스 (inference_results 의 user_id/timestamp, original_image_path 조회)
+mongo_indexes.init_app(app, mongo_client)
+
+# ✅ Prometheus 메트릭 (HTTP 요청 시간 + MySQL 쿼리 시간)
+metrics.init_app(app, db)
+
+# ✅ 오버레이 저장 형식 (OVERLAY_FORMAT)
+overlay_format.init_app(app)
+
+# ✅ 썸네일/파생본 디스크 캐시 + 이미지 응답(캐시 헤더, X-Accel-Redirect/X-Sendfile)
+derivatives.init_app(app)
+image_delivery.init_app(app)
+
+# ✅ 이미지 저장소 (해시 샤딩 + Mongo 인덱스, 이전 전 파일은 기존 폴더에서 조회)
+image_store.init_app(app, mongo_client)
+
+# ✅ 추론 후 저장(write-behind): 블루프린트 등록 전에 만들어 두어야 upload_bp 가 regenerator 를 등록함
+write_behind.init_app(app, mongo_client)
+
+# ✅ 오버레이 지연 렌더링 (OVERLAY_RENDER=lazy 결과를 첫 요청 시 그려 OVERLAY_CACHE_DIR 에 캐시)
+overlay_render.init_app(app, mongo_client)
 
 # ✅ 최초 요청 시 host_url을 캐싱
 @app.before_request
@@ -87,6 +116,8 @@ from routes.chatbot_routes_medgemma import chatbot_med_bp
 from routes.multimodal_gemini_route import multimodal_gemini_bp
 from routes.multimodal_gemini_xray_route import multimodal_gemini_xray_bp  # ✅ 추가
 from routes.xray_implant_classify_route import xray_implant_bp
+from routes.metrics_routes import metrics_bp
+from routes.profile_routes import profile_bp
 
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(image_bp)
@@ -100,6 +131,19 @@ app.register_blueprint(chatbot_med_bp, url_prefix='/api')
 app.register_blueprint(multimodal_gemini_bp, url_prefix='/api')
 app.register_blueprint(multimodal_gemini_xray_bp, url_prefix='/api')  # ✅ 추가
 app.register_blueprint(xray_implant_bp, url_prefix='/api')
+app.register_blueprint(metrics_bp)
+app.register_blueprint(profile_bp, url_prefix='/api')
+
+# ✅ AI 모델 미리 로드 (LAZY_STARTUP=1 이면 첫 추론 요청 시 로드)
+if not app.config['LAZY_STARTUP']:
+    import gc
+    from ai_model.lazy import preload_models
+    preload_models()
+    # gunicorn --preload 로 fork 할 때 워커가 부모 객체를 건드려 COW 페이지가 복사되지 않도록
+    gc.freeze()
+
+# ✅ write-behind 시작 (이전 프로세스가 남긴 미완료 저널 재생 포함)
+app.extensions['write_behind'].start()
 
 # ✅ 기본 라우트
 @app.route('/')
@@ -0,0 +1,275 @@
+# benchmarks/bench_ai_model.py
+"""
+ai_model 엔트리포인트 벤치마크.
+
+실제 가중치 대신 무작위 초기화된 소형 모델(stand-in)과 합성 이미지를 사용하므로
+가중치 파일/네트워크/GPU 없이도 같은 조건으로 재현할 수 있습니다.
+
+    python -m benchmarks.bench_ai_model
+    python -m benchmarks.bench_ai_model --sizes 640x480,1920x1440 --iterations 30
+    python -m benchmarks.bench_ai_model --compare benchmarks/results/ai_model_20250101000000.json
+
+측정 항목 (이미지 크기 × 단계별)
+- 지연시간 p50/p90/p95/p99 (ms)
+- 처리량 (images/s, 평균 지연 기준)
+- 메모리 피크 (tracemalloc 기준 Python/NumPy 할당 피크, 프로세스 RSS 최고치, CUDA 피크)
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+from unittest import mock
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from benchmarks.common import (
+    summarize, sync_cuda, save_results, load_results, print_comparison, print_table,
+)
+
+DEFAULT_SIZES = "640x480,1280x960,1920x1440"
+
+# 가중치 파일명 → (task, 클래스 수). 실제 모델과 같은 헤드 구성을 갖도록 맞춥니다.
+YOLO_STANDIN_SPECS: Dict[str, Tuple[str, int]] = {
+    "disease0728_best.pt": ("segment", 9),
+    "hygiene0728_best.pt": ("segment", 9),
+    "number_x_250806.pt": ("segment", 32),
+    "xray_detect_best.pt": ("detect", 6),
+    "best.pt": ("segment", 80),
+}
+IMPLANT_WEIGHTS_NAME = "dm_nfnet_f0_best_acc_model_state.pt"
+
+
+# ── stand-in 모델 ───────────────────────────────────────────────────────────────
+def build_standin_yolo(weights_path: str, scale: str = "n", max_det: int = 20, force_detections: bool = True):
+    """가중치 파일 대신 yaml 로 무작위 초기화된 YOLO11 모델을 만듭니다 (네트워크 접근 없음)."""
+    # ultralytics.YOLO 는 import 패치 대상이므로 실제 클래스는 ultralytics.models 에서 가져옵니다.
+    from ultralytics.models import YOLO
+    from ultralytics.nn.tasks import DetectionModel, SegmentationModel
+
+    task, nc = YOLO_STANDIN_SPECS.get(os.path.basename(str(weights_path)), ("segment", 9))
+    cfg = f"yolo11{scale}-seg.yaml" if task == "segment" else f"yolo11{scale}.yaml"
+
+    yolo = YOLO(cfg, task=task)
+    net_cls = SegmentationModel if task == "segment" else DetectionModel
+    net = net_cls(cfg, nc=nc, verbose=False)
+    net.names = {i: f"class_{i}" for i in range(nc)}
+    net.args = yolo.model.args
+    net.eval()
+
+    if force_detections:
+        # 무작위 초기화 모델은 신뢰도가 임계값(0.25~0.3)을 넘지 않아 후처리 경로가 측정되지 않습니다.
+        # 분류 헤드 bias 를 0 으로 맞춰 sigmoid≈0.5 → 탐지가 발생하도록 하고, max_det 로 개수를 제한합니다.
+        head = net.model[-1]
+        for branch in head.cv3:
+            branch[-1].bias.data.fill_(0.0)
+    yolo.model = net
+    yolo.overrides["max_det"] = max_det
+    return yolo
+
+
+@contextmanager
+def standin_models(scale: str = "n", max_det: int = 20, force_detections: bool = True, implant_arch: str = "resnet18"):
+    """
+    ai_model 모듈의 모델 로드를 stand-in 으로 대체합니다.
+    (모델은 첫 get_model() 때 artifacts.load_yolo / load_state_dict 로 로드하므로 preload 동안만 패치)
+    """
+    import torch
+    import timm
+    import ultralytics
+
+    real_create_model = timm.create_model
+    real_torch_load = torch.load
+    created = {}
+
+    def fake_yolo(path, *args, **kwargs):
+        return build_standin_yolo(path, scale=scale, max_det=max_det, force_detections=force_detections)
+
+    def fake_create_model(name, pretrained=False, num_classes=1000, **kwargs):
+        model = real_create_model(implant_arch, pretrained=False, num_classes=num_classes)
+        created["implant"] = model
+        return model
+
+    def fake_torch_load(f, *args, **kwargs):
+        if str(f).endswith(IMPLANT_WEIGHTS_NAME) and "implant" in created:
+            return created["implant"].state_dict()
+        return real_torch_load(f, *args, **kwargs)
+
+    from ai_model import artifacts
+
+    # 가중치 파일이 없어도 되도록 캐시 존재/체크섬 확인을 건너뜀
+    with mock.patch.object(ultralytics, "YOLO", fake_yolo), \
+            mock.patch.object(timm, "create_model", fake_create_model), \
+            mock.patch.object(torch, "load", fake_torch_load), \
+            mock.patch.object(artifacts, "resolve", artifacts.path):
+        yield
+
+
+# ── 합성 이미지 ─────────────────────────────────────────────────────────────────
+def synthetic_image(width: int, height: int, seed: int = 0, grayscale: bool = False) -> Image.Image:
+    """치아 사진과 비슷한 밝기 분포(배경 그라디언트 + 밝은 타원)를 가진 합성 이미지."""
+    rng = np.random.default_rng(seed)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    base = (60 + 80 * y + 40 * x)[..., None] * np.ones((1, 1, 3), dtype=np.float32)
+    noise = rng.normal(0, 12, size=(height, width, 3)).astype(np.float32)
+    img = Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8), "RGB")
+
+    draw = ImageDraw.Draw(img)
+    for _ in range(16):
+        cx, cy = rng.integers(0, width), rng.integers(0, height)
+        rw, rh = rng.integers(width // 30 + 1, width // 10 + 2), rng.integers(height // 20 + 1, height // 6 + 2)
+        shade = int(rng.integers(170, 250))
+        draw.ellipse([cx - rw, cy - rh, cx + rw, cy + rh], fill=(shade, shade, int(shade * 0.95)))
+    return img.convert("L").convert("RGB") if grayscale else img
+
+
+def parse_sizes(spec: str) -> List[Tuple[int, int]]:
+    sizes = []
+    for token in spec.split(","):
+        w, h = token.lower().split("x")
+        sizes.append((int(w), int(h)))
+    return sizes
+
+
+# ── 측정 ───────────────────────────────────────────────────────────────────────
+def _rss_peak_mb() -> float:
+    # Linux: KB, macOS: bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure_stage(fn: Callable, iterations: int, warmup: int) -> Dict:
+    for _ in range(warmup):
+        fn()
+        sync_cuda()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        sync_cuda()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    # 메모리 피크는 추적 오버헤드가 지연시간에 섞이지 않도록 별도 1회 실행으로 측정
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.reset_peak_memory_stats()
+    tracemalloc.start()
+    fn()
+    sync_cuda()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latency = summarize(samples)
+    result = {
+        "latency_ms": latency,
+        "throughput_ips": round(1000.0 / latency["mean"], 3) if latency.get("mean") else 0.0,
+        "tracemalloc_peak_mb": round(traced_peak / (1024 * 1024), 2),
+        "rss_peak_mb": _rss_peak_mb(),
+    }
+    if torch is not None and torch.cuda.is_available():
+        result["cuda_peak_mb"] = round(torch.cuda.max_memory_allocated() / (1024 * 1024), 1)
+    return result
+
+
+def build_stages(width: int, height: int, workdir: str, seed: int) -> Tuple[Dict[str, Callable], Dict[str, int]]:
+    from ai_model import predictor, hygiene_predictor, tooth_number_predictor
+    from ai_model.combiner import combine_results
+    from ai_model.xray_detector import detect_xray
+    from ai_model.predict_implant_manufacturer import classify_implants_from_xray
+
+    image = synthetic_image(width, height, seed=seed)
+    xray_path = os.path.join(workdir, f"xray_{width}x{height}.png")
+    synthetic_image(width, height, seed=seed + 1, grayscale=True).save(xray_path)
+
+    overlay = lambda name: os.path.join(workdir, f"{name}_{width}x{height}.png")
+
+    # combine_results 입력은 실제 파이프라인과 같은 형태로 한 번 만들어 둡니다.
+    _, disease_dets, *_ = predictor.predict_overlayed_image(image, overlay("model1"))
+    _, hygiene_dets, *_ = hygiene_predictor.predict_mask_and_overlay_with_all(image, overlay("model2"))
+    tooth_info = tooth_number_predictor.get_all_class_info_json(image)
+
+    def pipeline_normal():
+        _, d, *_ = predictor.predict_overlayed_image(image, overlay("model1"))
+        _, h, *_ = hygiene_predictor.predict_mask_and_overlay_with_all(image, overlay("model2"))
+        tooth_number_predictor.predict_mask_and_overlay_only(image, overlay("model3"))
+        t = tooth_number_predictor.get_all_class_info_json(image)
+        combine_results(image.size, d, h, t)
+
+    stages = {
+        "predict_overlayed_image": lambda: predictor.predict_overlayed_image(image, overlay("model1")),
+        "predict_mask_and_overlay_with_all": lambda: hygiene_predictor.predict_mask_and_overlay_with_all(image, overlay("model2")),
+        "tooth_predict_mask_and_overlay_only": lambda: tooth_number_predictor.predict_mask_and_overlay_only(image, overlay("model3")),
+        "tooth_get_all_class_info_json": lambda: tooth_number_predictor.get_all_class_info_json(image),
+        "combine_results": lambda: combine_results(image.size, disease_dets, hygiene_dets, tooth_info),
+        "detect_xray": lambda: detect_xray(xray_path),
+        "classify_implants_from_xray": lambda: classify_implants_from_xray(xray_path),
+        "pipeline_normal": pipeline_normal,
+    }
+    counts = {
+        "predict_overlayed_image": len(disease_dets),
+        "predict_mask_and_overlay_with_all": len(hygiene_dets),
+        "tooth_get_all_class_info_json": len(tooth_info),
+        "combine_results": len(combine_results(image.size, disease_dets, hygiene_dets, tooth_info)),
+    }
+    return stages, counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ai_model 엔트리포인트 벤치마크 (합성 이미지 + stand-in 모델)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="WxH 목록 (쉼표 구분)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--stages", default="", help="측정할 단계 이름 (쉼표 구분, 비우면 전체)")
+    parser.add_argument("--yolo-scale", default="n", choices=list("nsmlx"), help="stand-in YOLO11 크기")
+    parser.add_argument("--implant-arch", default="resnet18", help="stand-in timm 분류기 (예: dm_nfnet_f0)")
+    parser.add_argument("--max-det", type=int, default=20, help="stand-in 모델의 이미지당 최대 탐지 수")
+    parser.add_argument("--no-detections", action="store_true", help="탐지 없는 경로만 측정")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op 스레드 수 (0=기본값)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    import torch
+    torch.manual_seed(args.seed)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    with standin_models(scale=args.yolo_scale, max_det=args.max_det,
+                        force_detections=not args.no_detections, implant_arch=args.implant_arch):
+        from ai_model.lazy import preload_models
+        preload_models(["disease", "hygiene", "tooth_number", "xray", "implant"])
+
+    selected = {s for s in args.stages.split(",") if s}
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench_ai_model_") as workdir:
+        for width, height in parse_sizes(args.sizes):
+            stages, counts = build_stages(width, height, workdir, args.seed)
+            for name, fn in stages.items():
+                if selected and name not in selected:
+                    continue
+                result = measure_stage(fn, args.iterations, args.warmup)
+                rows.append({"size": f"{width}x{height}", "stage": name, "detections": counts.get(name), **result})
+                print(f"  {width}x{height} {name}: p50={result['latency_ms']['p50']}ms "
+                      f"p95={result['latency_ms']['p95']}ms {result['throughput_ips']} img/s")
+
+    payload = {"config": vars(args), "results": rows}
+    path = save_results("ai_model", payload, args.output)
+    print()
+    print_table(rows)
+    print(f"\n결과 저장: {path}")
+
+    if args.compare:
+        print(f"\n비교 기준: {args.compare}")
+        print_comparison(load_results(args.compare), load_results(path))
+
+
+if __name__ == "__main__":
+    main()
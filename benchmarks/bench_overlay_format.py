@@ -0,0 +1,153 @@
+# benchmarks/bench_overlay_format.py
+"""
+오버레이 저장 형식 벤치마크 (services/overlay_format).
+
+실제 파이프라인과 같은 방식으로 만든 합성 오버레이에 대해 형식/압축 수준별로
+인코딩 시간, 파일 크기, 디코딩 시간을 잽니다. (모델/가중치 불필요)
+
+오버레이 종류
+- mask   : 투명 배경 + PALETTE 색 마스크 합성 (질병/위생, images/model1·2)
+- plot   : 사진 위에 박스/라벨을 그린 RGB (치아번호 result.plot(), images/model3)
+- xray   : 흑백 사진 위 박스 (images/xmodel1·2)
+
+    python -m benchmarks.bench_overlay_format
+    python -m benchmarks.bench_overlay_format --sizes 1920x1440 --png-levels 1,6 --webp-methods 0,4
+"""
+import io
+import time
+import argparse
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, features
+
+from benchmarks.common import summarize, save_results, load_results, print_table, print_comparison
+from benchmarks.bench_ai_model import synthetic_image, parse_sizes
+from services import overlay_format
+
+DEFAULT_SIZES = "640x480,1280x960,1920x1440"
+
+
+# ── 합성 오버레이 ───────────────────────────────────────────────────────────────
+def mask_overlay(width: int, height: int, seed: int = 0, masks: int = 12) -> Image.Image:
+    """predictor / hygiene_predictor 와 같은 합성 방식 (겹친 영역은 합성색이 생김)."""
+    from ai_model.predictor import PALETTE
+    rng = np.random.default_rng(seed)
+    overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    for _ in range(masks):
+        mask = Image.new("L", (width, height), 0)
+        cx, cy = rng.integers(0, width), rng.integers(0, height)
+        rw, rh = rng.integers(width // 20 + 1, width // 6 + 2), rng.integers(height // 20 + 1, height // 6 + 2)
+        ImageDraw.Draw(mask).ellipse([cx - rw, cy - rh, cx + rw, cy + rh], fill=255)
+        color = PALETTE[int(rng.integers(0, len(PALETTE)))]
+        colored = Image.composite(Image.new("RGBA", (width, height), color),
+                                  Image.new("RGBA", (width, height), (0, 0, 0, 0)), mask)
+        overlay = Image.alpha_composite(overlay, colored)
+    return overlay
+
+
+def boxed_overlay(width: int, height: int, seed: int = 0, grayscale: bool = False, boxes: int = 16) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    image = synthetic_image(width, height, seed=seed, grayscale=grayscale)
+    draw = ImageDraw.Draw(image)
+    for i in range(boxes):
+        x1, y1 = int(rng.integers(0, width - 40)), int(rng.integers(0, height - 40))
+        x2, y2 = x1 + int(rng.integers(20, width // 8 + 21)), y1 + int(rng.integers(20, height // 8 + 21))
+        draw.rectangle([x1, y1, x2, y2], outline="blue", width=2)
+        draw.text((x1, max(y1 - 12, 0)), f"class_{i} 0.{int(rng.integers(30, 99))}", fill="blue")
+    return image
+
+
+OVERLAYS: Dict[str, Callable[[int, int, int], Image.Image]] = {
+    "mask": lambda w, h, seed: mask_overlay(w, h, seed),
+    "plot": lambda w, h, seed: boxed_overlay(w, h, seed),
+    "xray": lambda w, h, seed: boxed_overlay(w, h, seed, grayscale=True),
+}
+
+
+# ── 측정 ───────────────────────────────────────────────────────────────────────
+def variants(png_levels: List[int], webp_methods: List[int], webp_effort: int) -> List[Tuple[str, str, Dict]]:
+    """(이름, 형식, configure 인자) 목록."""
+    rows = [(f"png-l{lvl}", "png", {"png_compress_level": lvl}) for lvl in png_levels]
+    rows += [(f"png-palette-l{lvl}", "png-palette", {"png_compress_level": lvl}) for lvl in png_levels]
+    if features.check("webp"):
+        rows += [(f"webp-m{m}", "webp", {"webp_method": m, "webp_effort": webp_effort}) for m in webp_methods]
+    else:
+        print("Pillow 에 WebP 지원이 없어 webp 는 건너뜁니다.")
+    return rows
+
+
+def measure(image: Image.Image, fmt: str, iterations: int, warmup: int) -> Dict:
+    for _ in range(warmup):
+        overlay_format.encode(image, fmt)
+
+    encode_ms, decode_ms, data = [], [], b""
+    for _ in range(iterations):
+        start = time.perf_counter()
+        data = overlay_format.encode(image, fmt)
+        encode_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        with Image.open(io.BytesIO(data)) as decoded:
+            decoded.load()
+        decode_ms.append((time.perf_counter() - start) * 1000)
+
+    with Image.open(io.BytesIO(data)) as decoded:
+        mode = decoded.mode
+        # 무손실 확인: 알파 전체 + 보이는 픽셀(알파>0)의 RGB 가 원본과 같은지 (WebP 는 투명 픽셀 RGB 를 버림)
+        before, after = np.asarray(image.convert("RGBA")), np.asarray(decoded.convert("RGBA"))
+        visible = before[..., 3] > 0
+        lossless = np.array_equal(before[..., 3], after[..., 3]) and np.array_equal(before[visible], after[visible])
+    return {
+        "encode_ms": summarize(encode_ms),
+        "decode_ms": summarize(decode_ms),
+        "bytes": len(data),
+        "mode": mode,
+        "lossless": lossless,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오버레이 저장 형식별 인코딩/크기/디코딩 벤치마크")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="WxH 목록 (쉼표 구분)")
+    parser.add_argument("--overlays", default=",".join(OVERLAYS))
+    parser.add_argument("--png-levels", default="1,3,6,9", help="PNG compress_level 목록")
+    parser.add_argument("--webp-methods", default="0,4,6", help="무손실 WebP method 목록")
+    parser.add_argument("--webp-effort", type=int, default=80)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    formats = variants([int(v) for v in args.png_levels.split(",") if v],
+                       [int(v) for v in args.webp_methods.split(",") if v], args.webp_effort)
+    rows = []
+    for width, height in parse_sizes(args.sizes):
+        for kind in (k for k in args.overlays.split(",") if k):
+            image = OVERLAYS[kind](width, height, args.seed)
+            baseline_bytes = None
+            for name, fmt, options in formats:
+                overlay_format.configure(fmt, **options)
+                result = measure(image, fmt, args.iterations, args.warmup)
+                baseline_bytes = baseline_bytes or result["bytes"]
+                rows.append({"size": f"{width}x{height}", "overlay": kind, "variant": name, **result})
+                print(f"  {width}x{height} {kind:<5} {name:<18} encode p50={result['encode_ms']['p50']:>8}ms "
+                      f"decode p50={result['decode_ms']['p50']:>7}ms {result['bytes'] / 1024:>9.1f}KB "
+                      f"({result['bytes'] / baseline_bytes * 100:5.1f}%) {result['mode']}"
+                      f"{'' if result['lossless'] else ' (손실)'}")
+
+    path = save_results("overlay_format", {"config": vars(args), "results": rows}, args.output)
+    print()
+    print_table(rows, key_fields=("size", "overlay", "variant"), metric="encode_ms")
+    print(f"\n결과 저장: {path}")
+
+    if args.compare:
+        print(f"\n비교 기준: {args.compare}")
+        print_comparison(load_results(args.compare), load_results(path),
+                         key_fields=("size", "overlay", "variant"), metric="encode_ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/bench_startup.py
+"""
+콜드 스타트(import app) 시간 측정.
+
+새 프로세스에서 `python -X importtime` 으로 app 을 import 하고, 모듈별 누적 import 시간과
+전체 소요 시간을 기록합니다. MySQL/MongoDB 만 stand-in(SQLite, mongomock)으로 바꾸고
+ai_model / Gemini 모듈은 실제 모듈을 사용하므로, 무거운 라이브러리가 시작 시점에 끌려오는지 그대로 드러납니다.
+
+    python -m benchmarks.bench_startup                  # LAZY_STARTUP=1 (비추론 워커)
+    python -m benchmarks.bench_startup --max-seconds 2  # 초과하거나 무거운 모듈이 import 되면 종료 코드 1
+    python -m benchmarks.bench_startup --compare benchmarks/results/startup_20250101000000.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import tempfile
+from typing import Dict, List
+
+from benchmarks.common import save_results, load_results
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 비추론 워커 시작 시 import 되면 안 되는 모듈
+HEAVY_MODULES = ("torch", "ultralytics", "timm", "ttach", "google.generativeai", "vertexai")
+
+_CHILD_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+from benchmarks import standins
+standins.install(standins.StandinConfig(workdir=sys.argv[1], stub_predictors=False, fake_gemini=False))
+import app  # noqa: F401
+elapsed = time.perf_counter() - start
+heavy = [m for m in json.loads(sys.argv[2]) if m in sys.modules]
+print(json.dumps({"import_app_seconds": elapsed, "heavy_modules_loaded": heavy}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """`import time: self [us] | cumulative | imported package` 줄을 파싱합니다."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append({
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+                "self_ms": int(self_us) / 1000.0,
+                "cumulative_ms": int(cumulative_us) / 1000.0,
+            })
+        except ValueError:
+            continue
+    return rows
+
+
+def run_once(lazy: bool) -> Dict:
+    env = dict(os.environ, LAZY_STARTUP="1" if lazy else "0", PYTHONDONTWRITEBYTECODE="1")
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as workdir:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _CHILD_SCRIPT, workdir, json.dumps(HEAVY_MODULES)],
+            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        tail = "\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))[-2000:]
+        raise RuntimeError(f"app import 실패 (exit {proc.returncode}):\n{tail}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(proc.stderr)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="app 콜드 스타트 / import 시간 측정")
+    parser.add_argument("--runs", type=int, default=3, help="반복 횟수 (최솟값 기준으로 판정)")
+    parser.add_argument("--top", type=int, default=25, help="출력할 누적 import 상위 모듈 수")
+    parser.add_argument("--eager", action="store_true", help="LAZY_STARTUP=0 (모델 미리 로드) 으로 측정")
+    parser.add_argument("--max-seconds", type=float, default=0.0, help="import app 허용 시간 (0=검사 안 함)")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    runs = [run_once(lazy=not args.eager) for _ in range(args.runs)]
+    best = min(runs, key=lambda r: r["import_app_seconds"])
+    top = sorted((r for r in best["imports"] if r["depth"] == 1 or r["module"] in HEAVY_MODULES),
+                 key=lambda r: r["cumulative_ms"], reverse=True)[:args.top]
+
+    print(f"import app: {[round(r['import_app_seconds'], 3) for r in runs]} s (최솟값 {best['import_app_seconds']:.3f}s)")
+    print(f"{'module':<48} {'cumulative':>12} {'self':>10}")
+    for row in top:
+        print(f"{row['module']:<48} {row['cumulative_ms']:>10.1f}ms {row['self_ms']:>8.1f}ms")
+
+    payload = {
+        "config": vars(args),
+        "import_app_seconds": [r["import_app_seconds"] for r in runs],
+        "heavy_modules_loaded": best["heavy_modules_loaded"],
+        "top_imports": top,
+    }
+    path = save_results("startup", payload, args.output)
+    print(f"\n결과 저장: {path}")
+
+    if args.compare:
+        baseline = load_results(args.compare)
+        before, after = min(baseline["import_app_seconds"]), best["import_app_seconds"]
+        print(f"\n비교 기준: {args.compare}")
+        print(f"import app: {before:.3f}s → {after:.3f}s ({(after - before) / before * 100:+.1f}%)")
+
+    failed = False
+    if best["heavy_modules_loaded"] and not args.eager:
+        print(f"❌ 시작 시 무거운 모듈 import: {', '.join(best['heavy_modules_loaded'])}")
+        failed = True
+    if args.max_seconds and best["import_app_seconds"] > args.max_seconds:
+        print(f"❌ import app {best['import_app_seconds']:.3f}s > {args.max_seconds}s")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# benchmarks/bench_worker_memory.py
+"""
+워커 프로세스 수(1/4/8)별 모델 메모리 측정.
+
+무작위 초기화한 stand-in 가중치(.pt 와 export 한 .safetensors)를 임시 캐시에 만들고,
+실제 로딩 경로(ai_model.lazy.preload_models → artifacts.load_yolo / load_state_dict)로
+N 개의 워커를 동시에 띄워 /proc/<pid>/smaps_rollup 의 RSS / PSS / 공유 / 전용 메모리를 기록합니다.
+(Linux 전용, 네트워크/실제 가중치 불필요)
+
+모드
+- pt                 : 각 워커가 fork 후 .pt 를 직접 로드 (기존 방식)
+- pt-preload         : 부모가 .pt 를 로드한 뒤 fork (copy-on-write 공유)
+- safetensors        : 각 워커가 fork 후 safetensors 를 읽기 전용 메모리 맵으로 로드
+- safetensors-preload: 부모가 메모리 맵으로 로드한 뒤 fork
+
+    python -m benchmarks.bench_worker_memory
+    python -m benchmarks.bench_worker_memory --workers 1,4,8 --modes pt,safetensors-preload --yolo-scale x
+"""
+import os
+import gc
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import multiprocessing as mp
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.common import save_results, load_results
+
+MODELS = ["disease", "hygiene", "tooth_number", "xray", "implant"]
+MODES = ("pt", "pt-preload", "safetensors", "safetensors-preload")
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_smaps_rollup(pid="self") -> Dict[str, float]:
+    """smaps_rollup 의 주요 항목 (MB)."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in SMAPS_FIELDS:
+                values[key] = round(int(rest.split()[0]) / 1024, 1)
+    values["Shared"] = round(values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0), 1)
+    values["Private"] = round(values.get("Private_Clean", 0) + values.get("Private_Dirty", 0), 1)
+    return values
+
+
+# ── stand-in 가중치 준비 ────────────────────────────────────────────────────────
+def prepare_cache(workdir: str, yolo_scale: str) -> str:
+    """임시 캐시 디렉터리에 .pt / .safetensors 와 매니페스트를 만들고 매니페스트 경로를 반환합니다."""
+    import torch
+    import timm
+    from ai_model import artifacts
+    from benchmarks.bench_ai_model import build_standin_yolo
+
+    cache = os.path.join(workdir, "cache")
+    os.makedirs(cache, exist_ok=True)
+    manifest_path = os.path.join(workdir, "artifacts.json")
+    shutil.copyfile(artifacts.MANIFEST_PATH, manifest_path)
+    os.environ["MODEL_MANIFEST"] = manifest_path
+    os.environ["MODEL_CACHE_DIR"] = cache
+
+    for name in MODELS:
+        file_path = artifacts.path(name)
+        if name == "implant":
+            from ai_model.predict_implant_manufacturer import MODEL_NAME, NUM_CLASSES
+            torch.save(timm.create_model(MODEL_NAME, pretrained=False, num_classes=NUM_CLASSES).state_dict(), file_path)
+        else:
+            net = build_standin_yolo(file_path, scale=yolo_scale).model
+            torch.save({"model": net, "train_args": {}}, file_path)
+
+    artifacts.main(["import", "--from", cache, *MODELS])  # stand-in 가중치의 sha256 을 임시 매니페스트에 기록
+    artifacts.main(["export", *MODELS])
+    return manifest_path
+
+
+# ── 워커 ───────────────────────────────────────────────────────────────────────
+def _exercise(models: Dict[str, object]):
+    """워커가 실제로 요청을 처리한 뒤의 상태를 재기 위해 모델마다 한 번씩 추론합니다."""
+    import torch
+    image = np.full((480, 640, 3), 127, dtype=np.uint8)
+    for name, model in models.items():
+        if name == "implant":
+            with torch.no_grad():
+                model(torch.zeros(1, 3, 224, 224))
+        else:
+            model(image, verbose=False)
+
+
+def _load(names: List[str]) -> Dict[str, object]:
+    import importlib
+    from ai_model.lazy import MODEL_MODULES, preload_models
+    preload_models(names)
+    return {name: importlib.import_module(MODEL_MODULES[name]).get_model() for name in names}
+
+
+def _worker(conn, names: List[str]):
+    import torch
+    torch.set_num_threads(1)
+    models = _load(names)  # preload 모드면 부모에서 이미 로드된 인스턴스를 그대로 반환
+    _exercise(models)
+    gc.collect()
+    conn.send(read_smaps_rollup())
+    conn.recv()  # 모든 워커를 측정할 때까지 살아 있도록 대기
+
+
+def run_mode(mode: str, workers: int, names: List[str]) -> Dict:
+    """fork 컨텍스트로 워커 N 개를 동시에 띄워 메모리를 측정합니다 (모드마다 새 부모 프로세스에서 실행)."""
+    os.environ["MODEL_WEIGHTS_FORMAT"] = "pt" if mode.startswith("pt") else "auto"
+    preload = mode.endswith("-preload")
+    if preload:
+        _load(names)
+        gc.freeze()  # 부모 객체 헤더에 refcount 쓰기가 일어나 COW 페이지가 복사되는 것을 줄임
+
+    ctx = mp.get_context("fork")
+    pipes, procs = [], []
+    for _ in range(workers):
+        parent_conn, child_conn = ctx.Pipe()
+        proc = ctx.Process(target=_worker, args=(child_conn, names))
+        proc.start()
+        pipes.append(parent_conn)
+        procs.append(proc)
+
+    per_worker = [conn.recv() for conn in pipes]
+    for conn in pipes:
+        conn.send("exit")
+    for proc in procs:
+        proc.join()
+
+    total = {key: round(sum(w[key] for w in per_worker), 1) for key in per_worker[0]}
+    parent = read_smaps_rollup() if preload else None
+    if parent:
+        # 부모도 워커와 함께 떠 있으므로 호스트 전체 사용량 비교에는 부모 PSS 를 포함
+        total["Pss"] = round(total["Pss"] + parent["Pss"], 1)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "parent": parent,
+        "per_worker_mean": {key: round(value / workers, 1) for key, value in total.items()},
+        "total": total,
+    }
+
+
+def _run_isolated(mode: str, workers: int, names: List[str], manifest_path: str, cache: str) -> Dict:
+    """모드별로 깨끗한 부모 프로세스에서 측정 (preload 여부가 이전 측정에 영향을 주지 않도록)."""
+    import subprocess
+    env = dict(os.environ, MODEL_MANIFEST=manifest_path, MODEL_CACHE_DIR=cache)
+    code = (
+        "import json, sys; from benchmarks.bench_worker_memory import run_mode; "
+        "print(json.dumps(run_mode(sys.argv[1], int(sys.argv[2]), sys.argv[3].split(','))))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code, mode, str(workers), ",".join(names)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{mode} x{workers} 실패:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="워커 수별 모델 메모리(RSS/PSS/공유) 측정")
+    parser.add_argument("--workers", default="1,4,8")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--models", default=",".join(MODELS))
+    parser.add_argument("--yolo-scale", default="n", choices=list("nsmlx"))
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("smaps_rollup 이 없는 플랫폼입니다 (Linux 4.14+ 필요).")
+
+    names = [n for n in args.models.split(",") if n]
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench_worker_memory_") as workdir:
+        manifest_path = prepare_cache(workdir, args.yolo_scale)
+        cache = os.environ["MODEL_CACHE_DIR"]
+        for mode in args.modes.split(","):
+            for workers in (int(w) for w in args.workers.split(",")):
+                row = _run_isolated(mode, workers, names, manifest_path, cache)
+                rows.append(row)
+                mean, total = row["per_worker_mean"], row["total"]
+                print(f"{mode:<20} x{workers}: per-worker RSS={mean['Rss']}MB PSS={mean['Pss']}MB "
+                      f"shared={mean['Shared']}MB private={mean['Private']}MB | total PSS={total['Pss']}MB")
+
+    path = save_results("worker_memory", {"config": vars(args), "results": rows}, args.output)
+    print(f"\n결과 저장: {path}")
+
+    if args.compare:
+        baseline = {(r["mode"], r["workers"]): r for r in load_results(args.compare)["results"]}
+        print(f"\n비교 기준: {args.compare}")
+        for row in rows:
+            before = baseline.get((row["mode"], row["workers"]))
+            if before:
+                print(f"{row['mode']:<20} x{row['workers']}: total PSS "
+                      f"{before['total']['Pss']}MB → {row['total']['Pss']}MB")
+
+
+if __name__ == "__main__":
+    main()
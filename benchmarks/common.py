@@ -0,0 +1,126 @@
+# benchmarks/common.py
+# 벤치마크 스크립트 공용 유틸 (통계 요약, 결과 JSON 저장/비교)
+import os
+import sys
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """선형 보간 백분위수 (numpy.percentile 기본값과 동일)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * (p / 100.0)
+    lo, hi = math.floor(k), math.ceil(k)
+    if lo == hi:
+        return ordered[int(k)]
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """지연시간 샘플(ms) → 백분위수/평균 요약."""
+    if not samples_ms:
+        return {"n": 0}
+    summary = {
+        "n": len(samples_ms),
+        "mean": round(sum(samples_ms) / len(samples_ms), 3),
+        "min": round(min(samples_ms), 3),
+        "max": round(max(samples_ms), 3),
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}"] = round(percentile(samples_ms, p), 3)
+    return summary
+
+
+def sync_cuda():
+    """GPU 비동기 실행을 기다려 정확한 구간 시간을 잽니다 (torch 없으면 무시)."""
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.synchronize()
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(RESULTS_DIR),
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def environment_info() -> Dict:
+    """결과 비교 시 참고할 실행 환경 정보."""
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_revision": _git_revision(),
+    }
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        info["torch"] = torch.__version__
+        info["torch_threads"] = torch.get_num_threads()
+        info["cuda"] = torch.cuda.get_device_name(0) if torch.cuda.is_available() else None
+    return info
+
+
+def save_results(name: str, payload: Dict, output: Optional[str] = None) -> str:
+    """결과를 benchmarks/results/<name>_<timestamp>.json 으로 저장하고 경로를 반환합니다."""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{name}_{timestamp}.json")
+    document = {
+        "benchmark": name,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "env": environment_info(),
+        **payload,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    return output
+
+
+def load_results(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_comparison(baseline: Dict, current: Dict, key_fields=("size", "stage"), metric="latency_ms"):
+    """동일 키(size, stage 등)의 p50/p95 변화를 표로 출력합니다."""
+    def index(doc):
+        return {tuple(r.get(k) for k in key_fields): r for r in doc.get("results", [])}
+
+    base_rows, cur_rows = index(baseline), index(current)
+    print(f"{'key':<40} {'p50 base':>10} {'p50 now':>10} {'Δ%':>7} {'p95 base':>10} {'p95 now':>10} {'Δ%':>7}")
+    for key, row in cur_rows.items():
+        base = base_rows.get(key)
+        if not base:
+            continue
+        b, c = base.get(metric, {}), row.get(metric, {})
+        cols = []
+        for p in ("p50", "p95"):
+            bv, cv = b.get(p), c.get(p)
+            delta = f"{(cv - bv) / bv * 100:+.1f}" if bv and cv is not None else "-"
+            cols.extend([f"{bv if bv is not None else '-':>10}", f"{cv if cv is not None else '-':>10}", f"{delta:>7}"])
+        print(f"{'/'.join(str(k) for k in key):<40} " + " ".join(cols))
+
+
+def print_table(rows: List[Dict], key_fields=("size", "stage"), metric="latency_ms"):
+    print(f"{'key':<40} {'n':>5} {'p50':>10} {'p90':>10} {'p95':>10} {'p99':>10}")
+    for row in rows:
+        s = row.get(metric, {})
+        key = "/".join(str(row.get(k)) for k in key_fields)
+        print(f"{key:<40} {s.get('n', 0):>5} {s.get('p50', 0):>10} {s.get('p90', 0):>10} "
+              f"{s.get('p95', 0):>10} {s.get('p99', 0):>10}")
@@ -0,0 +1,297 @@
+# benchmarks/loadtest_http.py
+"""
+HTTP 부하 테스트 하네스.
+
+app.py 를 로컬 stand-in(SQLite, mongomock, 가짜 Gemini, 지연시간 조절형 예측기 stub)으로
+같은 프로세스 안에서 띄우고, 실제 HTTP 요청을 고정 요청률(open-loop)로 보냅니다.
+
+    python -m benchmarks.loadtest_http --rates 5,10,20 --duration 30
+    python -m benchmarks.loadtest_http --mix upload=1,inference_results=4,consult=2,chatbot=1 \
+        --model-latency disease=120,hygiene=100,tooth=80 --gemini-latency-ms 800
+
+- 지연시간은 "예정된 전송 시각" 기준으로 측정하므로 서버가 밀릴 때의 대기(coordinated omission)도 포함됩니다.
+- 결과는 benchmarks/results/loadtest_*.json 으로 저장됩니다.
+"""
+import io
+import time
+import random
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.common import summarize, save_results, load_results, print_comparison
+from benchmarks import standins
+
+DEFAULT_MIX = "upload=1,inference_results=4,consult=2,chatbot=1"
+DEFAULT_MODEL_LATENCY = "disease=120,hygiene=100,tooth=60,xray=150,implant=80"
+
+
+def _parse_kv(spec: str, cast=float) -> Dict[str, float]:
+    result = {}
+    for token in filter(None, (t.strip() for t in spec.split(","))):
+        key, value = token.split("=")
+        result[key.strip()] = cast(value)
+    return result
+
+
+# ── 앱 기동 ────────────────────────────────────────────────────────────────────
+class Harness:
+    def __init__(self, cfg: standins.StandinConfig, patients: int = 50, port: int = 0):
+        standins.install(cfg)
+
+        # stand-in 설치 후에 import 해야 실제 DB/모델 대신 stand-in 이 사용됩니다.
+        import app as app_module
+        from werkzeug.serving import make_server
+        from flask_jwt_extended import create_access_token
+        from models.model import db, User, Doctor
+
+        self.app = app_module.app
+        self.patients = [f"lt_patient_{i:03d}" for i in range(patients)]
+        self.doctor = "lt_doctor"
+
+        with self.app.app_context():
+            for register_id in self.patients:
+                if not User.query.filter_by(register_id=register_id).first():
+                    db.session.add(User(register_id=register_id, password="x", name=register_id,
+                                        gender="M", birth="1990-01-01", phone="010", role="P"))
+            if not Doctor.query.filter_by(register_id=self.doctor).first():
+                db.session.add(Doctor(register_id=self.doctor, password="x", name="doctor",
+                                      gender="F", birth="1980-01-01", phone="010", role="D"))
+            db.session.commit()
+            self.tokens = {rid: create_access_token(identity=rid) for rid in self.patients + [self.doctor]}
+
+        self.server = make_server("127.0.0.1", port, self.app, threaded=True)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+        # 환자별 진료 신청 시나리오가 겹치지 않도록 (중복 신청은 400 으로 거절되는 정상 동작)
+        self._patient_locks = {rid: threading.Lock() for rid in self.patients}
+        self._uploaded: Dict[str, List[str]] = defaultdict(list)
+        self._uploaded_lock = threading.Lock()
+        self._local = threading.local()
+
+    def close(self):
+        self.server.shutdown()
+
+    # ── HTTP 유틸 ──
+    def session(self):
+        import requests
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def auth(self, register_id):
+        return {"Authorization": f"Bearer {self.tokens[register_id]}"}
+
+    def remember_upload(self, patient, original_path):
+        with self._uploaded_lock:
+            self._uploaded[patient].append(original_path)
+
+    def uploaded_path(self, patient):
+        with self._uploaded_lock:
+            paths = self._uploaded.get(patient)
+            return random.choice(paths) if paths else f"/images/original/{patient}_seed.png"
+
+
+# ── 시나리오 ───────────────────────────────────────────────────────────────────
+# 각 시나리오는 (호출 이름, status_code) 목록을 반환합니다. 한 시나리오가 여러 HTTP 호출을 할 수 있습니다.
+_SAMPLE_IMAGES: Dict[Tuple[int, int, bool], bytes] = {}
+
+
+def _sample_jpeg(width=1280, height=960, grayscale=False) -> bytes:
+    key = (width, height, grayscale)
+    if key not in _SAMPLE_IMAGES:
+        from benchmarks.bench_ai_model import synthetic_image
+        buf = io.BytesIO()
+        synthetic_image(width, height, seed=width, grayscale=grayscale).save(buf, format="JPEG", quality=90)
+        _SAMPLE_IMAGES[key] = buf.getvalue()
+    return _SAMPLE_IMAGES[key]
+
+
+def scenario_upload(h: Harness, xray_ratio: float = 0.2):
+    patient = random.choice(h.patients)
+    is_xray = random.random() < xray_ratio
+    files = {"file": ("web_image.jpg", _sample_jpeg(grayscale=is_xray), "image/jpeg")}
+    data = {"image_type": "xray" if is_xray else "normal", "survey": '{"통증": "없음"}'}
+    resp = h.session().post(f"{h.base_url}/api/upload_masked_image", files=files, data=data,
+                            headers=h.auth(patient), timeout=120)
+    if resp.status_code == 200:
+        h.remember_upload(patient, resp.json().get("original_image_path"))
+    return [("upload_masked_image", resp.status_code)]
+
+
+def scenario_inference_results(h: Harness):
+    patient = random.choice(h.patients)
+    resp = h.session().get(f"{h.base_url}/api/inference_results",
+                           params={"role": "P", "user_id": patient}, timeout=60)
+    return [("inference_results", resp.status_code)]
+
+
+def scenario_consult(h: Harness):
+    """신청 → 상태 조회 → (의사 대시보드 조회) → 취소 흐름."""
+    patient = random.choice(h.patients)
+    s, calls = h.session(), []
+    with h._patient_locks[patient]:
+        image_url = h.uploaded_path(patient)
+        resp = s.post(f"{h.base_url}/api/consult", headers=h.auth(patient), timeout=60, json={
+            "user_id": patient,
+            "original_image_url": image_url,
+            "request_datetime": time.strftime("%Y%m%d%H%M%S"),
+        })
+        calls.append(("consult_create", resp.status_code))
+
+        resp = s.get(f"{h.base_url}/api/consult/status",
+                     params={"user_id": patient, "image_path": image_url}, timeout=60)
+        calls.append(("consult_status", resp.status_code))
+
+        resp = s.get(f"{h.base_url}/api/consult/list", timeout=60)
+        calls.append(("consult_list", resp.status_code))
+
+        resp = s.get(f"{h.base_url}/api/consult/today-status-counts", timeout=60)
+        calls.append(("consult_today_status_counts", resp.status_code))
+
+        resp = s.post(f"{h.base_url}/api/consult/cancel", headers=h.auth(patient), timeout=60,
+                      json={"user_id": patient, "original_image_url": image_url})
+        calls.append(("consult_cancel", resp.status_code))
+    return calls
+
+
+def scenario_chatbot(h: Harness):
+    patient = random.choice(h.patients)
+    message = random.choice(["최근 진단 결과 알려줘", "양치는 하루에 몇 번 해야 하나요?", "가장 최근 기록 사진 보여줘"])
+    resp = h.session().post(f"{h.base_url}/api/chatbot", json={"message": message},
+                            headers=h.auth(patient), timeout=120)
+    return [("chatbot", resp.status_code)]
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "upload": scenario_upload,
+    "inference_results": scenario_inference_results,
+    "consult": scenario_consult,
+    "chatbot": scenario_chatbot,
+}
+
+
+# ── 부하 생성 ──────────────────────────────────────────────────────────────────
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = defaultdict(list)       # 예정 시각 기준 (대기 포함)
+        self.service = defaultdict(list)       # 실제 전송 시각 기준
+        self.errors = defaultdict(int)
+        self.counts = defaultdict(int)
+
+    def record(self, name, scheduled, started, finished, ok):
+        with self._lock:
+            self.latency[name].append((finished - scheduled) * 1000)
+            self.service[name].append((finished - started) * 1000)
+            self.counts[name] += 1
+            if not ok:
+                self.errors[name] += 1
+
+
+def run_rate(h: Harness, mix: Dict[str, float], rate: float, duration: float, max_workers: int) -> Dict:
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    total = int(rate * duration)
+    recorder = Recorder()
+
+    def fire(scenario_name, scheduled):
+        started = time.perf_counter()
+        try:
+            calls = SCENARIOS[scenario_name](h)
+            finished = time.perf_counter()
+            for call_name, status in calls:
+                recorder.record(call_name, scheduled, started, finished, status < 400)
+            recorder.record(f"scenario:{scenario_name}", scheduled, started, finished,
+                            all(status < 400 for _, status in calls))
+        except Exception:
+            finished = time.perf_counter()
+            recorder.record(f"scenario:{scenario_name}", scheduled, started, finished, False)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, random.choices(names, weights)[0], scheduled)
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for name in sorted(recorder.counts):
+        count = recorder.counts[name]
+        rows.append({
+            "rate": rate,
+            "call": name,
+            "count": count,
+            "throughput_rps": round(count / elapsed, 3),
+            "error_rate": round(recorder.errors[name] / count, 4) if count else 0.0,
+            "latency_ms": summarize(recorder.latency[name]),
+            "service_ms": summarize(recorder.service[name]),
+        })
+    return {"rate": rate, "elapsed_s": round(elapsed, 2), "scenarios_sent": total, "rows": rows}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="stand-in 기반 Flask HTTP 부하 테스트")
+    parser.add_argument("--rates", default="5,10", help="초당 시나리오 수 목록 (쉼표 구분)")
+    parser.add_argument("--duration", type=float, default=20.0, help="요청률별 실행 시간(초)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="시나리오 가중치 (예: upload=1,chatbot=2)")
+    parser.add_argument("--model-latency", default=DEFAULT_MODEL_LATENCY, help="예측기 stub 평균 지연 ms")
+    parser.add_argument("--model-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=500.0)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--patients", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=64, help="클라이언트 동시 실행 스레드 수")
+    parser.add_argument("--xray-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    mix = _parse_kv(args.mix)
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(sorted(unknown))}")
+
+    SCENARIOS["upload"] = lambda h: scenario_upload(h, xray_ratio=args.xray_ratio)
+
+    cfg = standins.StandinConfig(
+        workdir=tempfile.mkdtemp(prefix="toothai_loadtest_"),
+        model_latency={k: standins.Latency(v, args.model_jitter_ms) for k, v in _parse_kv(args.model_latency).items()},
+        gemini_latency=standins.Latency(args.gemini_latency_ms, args.gemini_jitter_ms),
+    )
+    harness = Harness(cfg, patients=args.patients)
+    print(f"🚀 stand-in 서버 기동: {harness.base_url} (workdir={cfg.workdir})")
+
+    runs = []
+    try:
+        for rate in (float(r) for r in args.rates.split(",")):
+            print(f"\n▶ {rate} scenario/s × {args.duration}s")
+            run = run_rate(harness, mix, rate, args.duration, args.workers)
+            runs.append(run)
+            print(f"{'call':<36} {'n':>6} {'rps':>8} {'err%':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+            for row in run["rows"]:
+                lat = row["latency_ms"]
+                print(f"{row['call']:<36} {row['count']:>6} {row['throughput_rps']:>8} "
+                      f"{row['error_rate'] * 100:>6.2f} {lat.get('p50', 0):>9} {lat.get('p95', 0):>9} {lat.get('p99', 0):>9}")
+    finally:
+        harness.close()
+
+    results = [dict(row, size=row["rate"], stage=row["call"]) for run in runs for row in run["rows"]]
+    path = save_results("loadtest", {"config": vars(args), "runs": runs, "results": results}, args.output)
+    print(f"\n결과 저장: {path}")
+    if args.compare:
+        print(f"\n비교 기준: {args.compare}")
+        print_comparison(load_results(args.compare), load_results(path))
+
+
+if __name__ == "__main__":
+    main()
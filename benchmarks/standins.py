@@ -0,0 +1,346 @@
+# benchmarks/standins.py
+"""
+app.py 를 외부 의존성 없이 띄우기 위한 로컬 stand-in 모음.
+
+- MySQL   → SQLite 파일
+- MongoDB → mongomock (프로세스 내 공유 저장소)
+- Gemini  → 지연시간을 조절할 수 있는 가짜 GenerativeModel
+- ai_model 예측기 → 지연시간을 조절할 수 있는 stub (실제 가중치/torch 불필요)
+
+반드시 app / routes / models 를 import 하기 전에 install() 을 호출해야 합니다.
+"""
+import os
+import sys
+import time
+import types
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+from PIL import Image
+
+STANDIN_MODELS = ("disease", "hygiene", "tooth", "xray", "implant")
+
+
+@dataclass
+class Latency:
+    """평균 ± 지터(ms) 만큼 sleep 합니다."""
+    mean_ms: float = 0.0
+    jitter_ms: float = 0.0
+
+    def sleep(self):
+        if self.mean_ms <= 0 and self.jitter_ms <= 0:
+            return
+        delay = max(0.0, random.gauss(self.mean_ms, self.jitter_ms) if self.jitter_ms else self.mean_ms)
+        time.sleep(delay / 1000.0)
+
+
+@dataclass
+class StandinConfig:
+    workdir: str
+    model_latency: Dict[str, Latency] = field(default_factory=dict)
+    gemini_latency: Latency = field(default_factory=Latency)
+    detections_per_model: int = 4
+    # False 면 실제 모듈을 그대로 사용 (bench_startup 처럼 import 비용 자체를 재는 경우)
+    stub_predictors: bool = True
+    fake_gemini: bool = True
+
+    def latency(self, name: str) -> Latency:
+        return self.model_latency.get(name, Latency())
+
+
+# ── MongoDB ────────────────────────────────────────────────────────────────────
+def _install_mongomock():
+    import mongomock
+    import pymongo
+
+    # mongomock 클라이언트는 인스턴스마다 저장소가 따로 생기므로, 요청마다 새 클라이언트를
+    # 만드는 코드(MongoDBClient() 등)도 같은 데이터를 보도록 저장소를 공유합니다.
+    shared_store = mongomock.store.ServerStore()
+
+    def client_factory(host=None, *args, **kwargs):
+        return mongomock.MongoClient(host, tz_aware=kwargs.get("tz_aware", False), _store=shared_store)
+
+    pymongo.MongoClient = client_factory
+    return shared_store
+
+
+# ── Gemini / Vertex AI ─────────────────────────────────────────────────────────
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeChat:
+    def __init__(self, latency: Latency):
+        self._latency = latency
+
+    def send_message(self, content, request_options=None, **kwargs):
+        self._latency.sleep()
+        return _FakeResponse("(stand-in) 치아 상태에 대한 일반적인 안내입니다.")
+
+
+class FakeGenerativeModel:
+    latency = Latency()
+
+    def __init__(self, model_name=None, *args, **kwargs):
+        self.model_name = model_name
+
+    def start_chat(self, *args, **kwargs):
+        return FakeChat(self.latency)
+
+    def generate_content(self, contents, *args, **kwargs):
+        self.latency.sleep()
+        return _FakeResponse("(stand-in) AI 소견: 정기 검진을 권장합니다.")
+
+
+class _FakePart:
+    @staticmethod
+    def from_data(data=None, mime_type=None):
+        return {"data": data, "mime_type": mime_type}
+
+    @staticmethod
+    def from_text(text):
+        return {"text": text}
+
+
+def _install_fake_gemini(latency: Latency):
+    FakeGenerativeModel.latency = latency
+
+    genai = types.ModuleType("google.generativeai")
+    genai.configure = lambda *args, **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+
+    try:
+        import google
+    except ImportError:
+        google = types.ModuleType("google")
+        google.__path__ = []
+        sys.modules["google"] = google
+    google.generativeai = genai
+    sys.modules["google.generativeai"] = genai
+
+    vertexai = types.ModuleType("vertexai")
+    vertexai.__path__ = []
+    vertexai.init = lambda *args, **kwargs: None
+    preview = types.ModuleType("vertexai.preview")
+    preview.__path__ = []
+    gen_models = types.ModuleType("vertexai.preview.generative_models")
+    gen_models.GenerativeModel = FakeGenerativeModel
+    gen_models.Part = _FakePart
+    vertexai.preview = preview
+    preview.generative_models = gen_models
+    sys.modules.update({
+        "vertexai": vertexai,
+        "vertexai.preview": preview,
+        "vertexai.preview.generative_models": gen_models,
+    })
+
+
+# ── ai_model 예측기 stub ───────────────────────────────────────────────────────
+def _random_detections(size, labels, count, seed_source):
+    """combine_results 가 실제로 일을 하도록 원본 크기의 마스크/bbox 를 가진 탐지 결과를 만듭니다."""
+    w, h = size
+    rng = np.random.default_rng(abs(hash(seed_source)) % (2 ** 32))
+    detections = []
+    for i in range(count):
+        bw, bh = int(rng.integers(w // 12 + 1, w // 5 + 2)), int(rng.integers(h // 12 + 1, h // 5 + 2))
+        x1, y1 = int(rng.integers(0, max(1, w - bw))), int(rng.integers(0, max(1, h - bh)))
+        mask = np.zeros((h, w), dtype=np.float32)
+        mask[y1:y1 + bh, x1:x1 + bw] = 1.0
+        detections.append({
+            "class_id": i % len(labels),
+            "label": labels[i % len(labels)],
+            "confidence": float(rng.uniform(0.3, 0.95)),
+            "bbox": [float(x1), float(y1), float(x1 + bw), float(y1 + bh)],
+            "mask_array": mask,
+        })
+    return detections
+
+
+def _save_transparent(size, path):
+    overlay = Image.new("RGBA", size, (0, 0, 0, 0))
+    if path:
+        overlay.save(path, format="PNG")
+    return overlay
+
+
+def _install_predictor_stubs(cfg: StandinConfig):
+    import ai_model  # 네임스페이스 패키지
+    from ai_model.pool import ModelPool
+
+    count = cfg.detections_per_model
+    # 실제 모델과 같은 레플리카 풀(MODEL_POOL_SIZE)을 거치게 해 풀 대기 시간도 부하 테스트에 반영
+    pools = {name: ModelPool(name, object) for name in STANDIN_MODELS}
+
+    def _infer(name):
+        with pools[name].lease():
+            cfg.latency(name).sleep()
+
+    predictor = types.ModuleType("ai_model.predictor")
+
+    def predict_overlayed_image(pil_img, overlay_save_path=None, *args, **kwargs):
+        _infer("disease")
+        dets = _random_detections(pil_img.size, ["충치 초기", "충치 중기", "충치 말기"], count, ("d", pil_img.size))
+        overlay = _save_transparent(pil_img.size, overlay_save_path)
+        return overlay, dets, 0.5, "stub_disease.pt", dets[0]["label"] if dets else "감지되지 않음"
+
+    def compose_overlay(size, detections):
+        return Image.new("RGBA", tuple(size), (0, 0, 0, 0))
+
+    predictor.predict_overlayed_image = predict_overlayed_image
+    predictor.compose_overlay = compose_overlay
+
+    hygiene = types.ModuleType("ai_model.hygiene_predictor")
+
+    def predict_mask_and_overlay_with_all(pil_img, overlay_save_path=None, *args, **kwargs):
+        _infer("hygiene")
+        dets = _random_detections(pil_img.size, ["금니 (골드 크라운)", "은니 (메탈 크라운)", "아말감 충전재"], count, ("h", pil_img.size))
+        overlay = _save_transparent(pil_img.size, overlay_save_path)
+        return overlay, dets, 0.5, "stub_hygiene.pt", dets[0]["label"] if dets else "감지되지 않음"
+
+    hygiene.predict_mask_and_overlay_with_all = predict_mask_and_overlay_with_all
+    hygiene.compose_overlay = compose_overlay
+
+    tooth = types.ModuleType("ai_model.tooth_number_predictor")
+
+    def predict_mask_and_overlay_only(pil_img, overlay_save_path=None, *args, **kwargs):
+        _infer("tooth")
+        return _save_transparent(pil_img.size, overlay_save_path)
+
+    def get_all_class_info_json(pil_img, *args, **kwargs):
+        _infer("tooth")
+        dets = _random_detections(pil_img.size, [str(n) for n in (11, 12, 21, 22, 31, 41)], count * 2, ("t", pil_img.size))
+        return [{
+            "class_id": d["class_id"],
+            "confidence": d["confidence"],
+            "tooth_number_fdi": d["label"],
+            "bbox": d["bbox"],
+        } for d in dets]
+
+    def predict_teeth(pil_img, *args, **kwargs):
+        from ai_model import rle
+        _infer("tooth")
+        dets = _random_detections(pil_img.size, [str(n) for n in (11, 12, 21, 22, 31, 41)], count * 2, ("t", pil_img.size))
+        return [{
+            "class_id": d["class_id"],
+            "confidence": d["confidence"],
+            "tooth_number_fdi": d["label"],
+            "bbox": d["bbox"],
+            "name": d["label"],
+            "mask_rle": rle.encode(d["mask_array"]),
+        } for d in dets]
+
+    def render_overlay(pil_img, teeth):
+        return _save_transparent(pil_img.size, None)
+
+    tooth.predict_mask_and_overlay_only = predict_mask_and_overlay_only
+    tooth.get_all_class_info_json = get_all_class_info_json
+    tooth.predict_teeth = predict_teeth
+    tooth.render_overlay = render_overlay
+
+    xray = types.ModuleType("ai_model.xray_detector")
+
+    def detect_xray(image_path=None, *args, **kwargs):
+        _infer("xray")
+        size = kwargs["image"].size if kwargs.get("image") is not None else Image.open(image_path).size
+        dets = _random_detections(size, ["임플란트", "보철물", "근관치료"], count, ("x", size))
+        return {
+            "image_path": image_path,
+            "detections": [{
+                "class_id": d["class_id"],
+                "class_name": d["label"],
+                "confidence": d["confidence"],
+                "bbox": d["bbox"],
+            } for d in dets],
+            "model": "stub_xray.pt",
+        }
+
+    xray.detect_xray = detect_xray
+
+    implant = types.ModuleType("ai_model.predict_implant_manufacturer")
+
+    def classify_implants_from_xray(xray_image_path=None, *args, **kwargs):
+        _infer("implant")
+        return [{
+            "original_image": xray_image_path,
+            "bbox": [10, 10, 60, 120],
+            "predicted_manufacturer_class": 13,
+            "predicted_manufacturer_name": "오스템 GS II",
+            "confidence": 0.9,
+        }], None
+
+    implant.classify_implants_from_xray = classify_implants_from_xray
+
+    legacy = types.ModuleType("ai_model.model")
+    legacy.perform_inference = lambda image_path, processed_output_dir: {
+        "prediction": "No objects detected", "details": [], "processed_image_path": None,
+    }
+
+    for name, module in {
+        "predictor": predictor,
+        "hygiene_predictor": hygiene,
+        "tooth_number_predictor": tooth,
+        "xray_detector": xray,
+        "predict_implant_manufacturer": implant,
+        "model": legacy,
+    }.items():
+        sys.modules[f"ai_model.{name}"] = module
+        setattr(ai_model, name, module)
+
+
+# ── 설정 ───────────────────────────────────────────────────────────────────────
+def _override_config(cfg: StandinConfig):
+    from config import DevelopmentConfig
+
+    image_dir = os.path.join(cfg.workdir, "images")
+    DevelopmentConfig.DEBUG = False
+    DevelopmentConfig.LAZY_STARTUP = True  # stub 에는 get_model() 이 없고, 실제 모델은 요청 시 로드
+    DevelopmentConfig.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(cfg.workdir, 'toothai.db')}"
+    DevelopmentConfig.SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"check_same_thread": False, "timeout": 30}}
+    DevelopmentConfig.MONGO_URI = os.environ["MONGO_URI"]
+    DevelopmentConfig.MONGO_DB_NAME = os.environ["MONGO_DB_NAME"]
+    DevelopmentConfig.IMAGE_BASE_DIR = image_dir
+    DevelopmentConfig.WRITE_BEHIND_JOURNAL_DIR = os.path.join(cfg.workdir, "write_behind")
+    DevelopmentConfig.IMAGE_STORE_DIR = os.path.join(cfg.workdir, "image_store")
+    DevelopmentConfig.OVERLAY_CACHE_DIR = os.path.join(cfg.workdir, "cache", "overlays")
+    for attr, sub in (
+        ("UPLOAD_FOLDER_ORIGINAL", "original"),
+        ("PROCESSED_FOLDER_MODEL1", "model1"),
+        ("PROCESSED_FOLDER_MODEL2", "model2"),
+        ("PROCESSED_FOLDER_MODEL3", "model3"),
+        ("PROCESSED_FOLDER_XMODEL1", "xmodel1"),
+        ("PROCESSED_FOLDER_XMODEL2", "xmodel2"),
+    ):
+        setattr(DevelopmentConfig, attr, os.path.join(image_dir, sub))
+
+
+_installed: Optional[StandinConfig] = None
+_install_lock = threading.Lock()
+
+
+def install(cfg: StandinConfig) -> StandinConfig:
+    """stand-in 을 설치합니다. 프로세스당 한 번만 유효합니다."""
+    global _installed
+    with _install_lock:
+        if _installed is not None:
+            return _installed
+        if "app" in sys.modules:
+            raise RuntimeError("stand-in 은 app 을 import 하기 전에 설치해야 합니다.")
+
+        os.makedirs(cfg.workdir, exist_ok=True)
+        os.environ.setdefault("GEMINI_API_KEY", "standin-key")
+        os.environ.setdefault("JWT_SECRET_KEY", "standin-jwt-secret")
+        os.environ["MONGO_URI"] = "mongodb://standin:27017/"
+        os.environ["MONGO_DB_NAME"] = "toothai_standin"
+
+        _install_mongomock()
+        if cfg.fake_gemini:
+            _install_fake_gemini(cfg.gemini_latency)
+        if cfg.stub_predictors:
+            _install_predictor_stubs(cfg)
+        _override_config(cfg)
+        _installed = cfg
+        return cfg
@@ -19,6 +19,19 @@ class DevelopmentConfig:
     MONGO_URI = os.getenv('MONGO_URI')
     MONGO_DB_NAME = os.getenv('MONGO_DB_NAME')
     MONGO_COLLECTION = os.getenv('MONGO_COLLECTION', 'uploads')
+    # ✅ MongoDB 클라이언트 (프로세스당 하나, 워커 스레드 수보다 풀이 작으면 대기 → toothai_mongo_pool_wait_seconds)
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '2'))  # 유휴 시에도 유지할 연결 (첫 요청 연결 지연 방지)
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', '300000'))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'))  # 풀이 가득 찼을 때 대기 한도
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '30000'))
+    MONGO_WRITE_CONCERN = os.getenv('MONGO_WRITE_CONCERN', '1')  # 1 | majority
+    MONGO_WRITE_JOURNAL = os.getenv('MONGO_WRITE_JOURNAL', '0') == '1'
+    # ✅ 시작 시 인덱스 생성 (services/mongo_indexes), VERIFY=1 이면 조회 실행 계획도 확인해 COLLSCAN 을 경고
+    MONGO_ENSURE_INDEXES = os.getenv('MONGO_ENSURE_INDEXES', '1') == '1'
+    MONGO_VERIFY_INDEXES = os.getenv('MONGO_VERIFY_INDEXES', '0') == '1'
 
     # 보안 키
     SECRET_KEY = os.getenv('SECRET_KEY') or 'default_fallback_key'
@@ -34,8 +47,88 @@ class DevelopmentConfig:
     PROCESSED_FOLDER_XMODEL1 = os.path.join(IMAGE_BASE_DIR, 'xmodel1')
     PROCESSED_FOLDER_XMODEL2 = os.path.join(IMAGE_BASE_DIR, 'xmodel2')
 
+    # ✅ 이미지 저장소: 내용 sha256 앞자리로 샤딩 (IMAGE_STORE_DIR/ab/cd/<sha256>.png), URL 키 → 해시는 Mongo 인덱스
+    #    위 폴더들은 이전 전 파일 조회용 (python -m services.image_store migrate)
+    IMAGE_STORE_DIR = os.getenv('IMAGE_STORE_DIR', os.path.join(BASE_DIR, 'image_store'))
+    IMAGE_INDEX_COLLECTION = os.getenv('IMAGE_INDEX_COLLECTION', 'image_index')
+    IMAGE_INDEX_CACHE_SIZE = int(os.getenv('IMAGE_INDEX_CACHE_SIZE', '65536'))  # 프로세스별 키 → blob LRU
+    IMAGE_INDEX_MISS_TTL = float(os.getenv('IMAGE_INDEX_MISS_TTL', '5'))  # 인덱스에 없는 키를 다시 조회하지 않는 시간(초, 0 이면 끔)
+    # ✅ 저장소 백엔드: local (IMAGE_STORE_DIR) | s3 (S3 호환 버킷, 여러 API 노드가 공유. MinIO 는 ENDPOINT_URL 지정)
+    IMAGE_STORAGE_BACKEND = os.getenv('IMAGE_STORAGE_BACKEND', 'local')
+    IMAGE_S3_BUCKET = os.getenv('IMAGE_S3_BUCKET', '')
+    IMAGE_S3_PREFIX = os.getenv('IMAGE_S3_PREFIX', 'images')
+    IMAGE_S3_ENDPOINT_URL = os.getenv('IMAGE_S3_ENDPOINT_URL')  # 예: http://localhost:9000 (MinIO)
+    IMAGE_S3_REGION = os.getenv('IMAGE_S3_REGION')
+    # s3 읽기 캐시 (썸네일 생성/재생 등 파일 경로가 필요할 때 내려받아 둠, 넘으면 오래 안 쓴 것부터 삭제)
+    IMAGE_STORE_CACHE_DIR = os.getenv('IMAGE_STORE_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'images'))
+    IMAGE_STORE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_STORE_CACHE_MAX_BYTES', str(2 * 1024 * 1024 * 1024)))
+    # 다운로드: proxy (앱이 전송) | presign (s3 presigned URL 로 302, 썸네일 요청은 항상 proxy)
+    IMAGE_DOWNLOAD_MODE = os.getenv('IMAGE_DOWNLOAD_MODE', 'proxy')
+    IMAGE_PRESIGN_EXPIRES = int(os.getenv('IMAGE_PRESIGN_EXPIRES', '3600'))
+
     # 허용 확장자
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
+    # ✅ 요청 단위 프로파일링 (X-Profile-Token 헤더 또는 샘플링 비율, 기본 비활성)
+    PROFILE_ADMIN_TOKEN = os.getenv('PROFILE_ADMIN_TOKEN')
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
+
+    # ✅ 지연 시작: 1 이면 모델/Gemini 를 첫 요청 시 로드 (개발 서버 재시작용), 0 이면 시작 시 미리 로드
+    LAZY_STARTUP = os.getenv('LAZY_STARTUP', '0').lower() in ('1', 'true', 'yes')
+
+    # ✅ 추론 후 저장(write-behind): 오버레이/Mongo 저장을 응답 이후 백그라운드로 (WORKERS=0 이면 요청 안에서 저장)
+    WRITE_BEHIND_WORKERS = int(os.getenv('WRITE_BEHIND_WORKERS', '2'))
+    WRITE_BEHIND_QUEUE_SIZE = int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', '64'))
+    WRITE_BEHIND_JOURNAL_DIR = os.getenv('WRITE_BEHIND_JOURNAL_DIR', os.path.join(BASE_DIR, 'logs', 'write_behind'))
+
+    # ✅ 업로드 수신 검증 (/api/upload* 만): 파일 크기 상한(받는 도중 초과 시 413) / 헤더 기준 픽셀 수 상한 (압축 폭탄 차단)
+    UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(20 * 1024 * 1024)))
+    UPLOAD_MAX_PIXELS = int(os.getenv('UPLOAD_MAX_PIXELS', '50000000'))
+
+    # ✅ 오버레이 저장 형식: png | png-palette (256색 이하면 팔레트 PNG) | webp (무손실, .webp 파일)
+    OVERLAY_FORMAT = os.getenv('OVERLAY_FORMAT', 'png-palette')
+    OVERLAY_PNG_COMPRESS_LEVEL = int(os.getenv('OVERLAY_PNG_COMPRESS_LEVEL', '6'))  # 0~9
+    OVERLAY_WEBP_METHOD = int(os.getenv('OVERLAY_WEBP_METHOD', '4'))  # 0~6
+    OVERLAY_WEBP_EFFORT = int(os.getenv('OVERLAY_WEBP_EFFORT', '80'))  # 무손실 WebP 의 quality = 압축 노력 0~100
+
+    # ✅ 벡터 오버레이 (업로드 시 overlay_mode=vector): 마스크 → 다각형 단순화 허용 오차(픽셀), 최소 조각 넓이(픽셀²)
+    OVERLAY_POLYGON_TOLERANCE = float(os.getenv('OVERLAY_POLYGON_TOLERANCE', '1.5'))
+    OVERLAY_POLYGON_MAX_TOLERANCE = float(os.getenv('OVERLAY_POLYGON_MAX_TOLERANCE', '20'))
+    OVERLAY_POLYGON_MIN_AREA = float(os.getenv('OVERLAY_POLYGON_MIN_AREA', '16'))
+
+    # ✅ 오버레이 렌더링: lazy (업로드 때는 마스크 RLE 만 저장, /images/model1~3 첫 요청 시 그려서 캐시) | eager (업로드 때 저장)
+    OVERLAY_RENDER = os.getenv('OVERLAY_RENDER', 'lazy')
+    OVERLAY_CACHE_DIR = os.getenv('OVERLAY_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'overlays'))
+    OVERLAY_CACHE_MAX_BYTES = int(os.getenv('OVERLAY_CACHE_MAX_BYTES', str(1024 * 1024 * 1024)))
+
+    # ✅ 이미지 보존 정책 (python -m services.retention, cron 등 주기 실행)
+    # 오래된 원본은 손실 WebP 로 재압축 (RETENTION_MIN_SAVING 이상 줄 때만), 다시 그릴 수 있는 오버레이는 삭제
+    RETENTION_ORIGINAL_DAYS = int(os.getenv('RETENTION_ORIGINAL_DAYS', '180'))
+    RETENTION_ORIGINAL_QUALITY = int(os.getenv('RETENTION_ORIGINAL_QUALITY', '85'))
+    RETENTION_MIN_SAVING = float(os.getenv('RETENTION_MIN_SAVING', '0.2'))
+    RETENTION_OVERLAY_DAYS = int(os.getenv('RETENTION_OVERLAY_DAYS', '30'))
+    RETENTION_LOCK_FILE = os.getenv('RETENTION_LOCK_FILE', os.path.join(BASE_DIR, 'cache', 'retention.lock'))
+
+    # ✅ 썸네일/파생본: /images/...?w=256&fmt=webp (첫 요청 시 생성, 크기 제한 디스크 캐시 + LRU 정리)
+    DERIVATIVE_CACHE_DIR = os.getenv('DERIVATIVE_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'derivatives'))
+    DERIVATIVE_CACHE_MAX_BYTES = int(os.getenv('DERIVATIVE_CACHE_MAX_BYTES', str(1024 * 1024 * 1024)))
+    DERIVATIVE_WIDTHS = (64, 128, 256, 512, 1024)  # 요청 너비는 이 중 하나로 올림
+    DERIVATIVE_LIST_WIDTH = int(os.getenv('DERIVATIVE_LIST_WIDTH', '256'))  # 목록 API 의 썸네일 URL 너비
+    DERIVATIVE_QUALITY = int(os.getenv('DERIVATIVE_QUALITY', '80'))
+
+    # ✅ 목록 API 페이지 크기 (limit 기본값 / 상한, 커서 페이지네이션)
+    HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', '20'))  # /api/inference_results/history
+    HISTORY_PAGE_MAX = int(os.getenv('HISTORY_PAGE_MAX', '100'))
+    CONSULT_PAGE_SIZE = int(os.getenv('CONSULT_PAGE_SIZE', '50'))  # /api/consult/list
+    CONSULT_PAGE_MAX = int(os.getenv('CONSULT_PAGE_MAX', '200'))
+
+    # ✅ 이미지 응답 캐시: 파일명에 타임스탬프가 들어가 내용이 바뀌지 않으므로 1년 + immutable (ETag/304/Range 지원)
+    IMAGE_CACHE_MAX_AGE = int(os.getenv('IMAGE_CACHE_MAX_AGE', str(365 * 24 * 3600)))
+    # ✅ 파일 전송 위임: '' (Python 이 직접) | x-accel (nginx X-Accel-Redirect) | x-sendfile (Apache/lighttpd)
+    IMAGE_SENDFILE_MODE = os.getenv('IMAGE_SENDFILE_MODE', '')
+    IMAGE_ACCEL_ROOT = os.getenv('IMAGE_ACCEL_ROOT', BASE_DIR)  # 이 디렉터리 기준 상대 경로를 PREFIX 뒤에 붙임
+    IMAGE_ACCEL_PREFIX = os.getenv('IMAGE_ACCEL_PREFIX', '/_protected/')  # nginx internal location
+
     # ✅ 내부 접근용 BASE URL
     INTERNAL_BASE_URL = os.getenv('INTERNAL_BASE_URL', 'http://localhost:5000')  # 디폴트 포함
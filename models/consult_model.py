@@ -5,6 +5,16 @@ from sqlalchemy.orm import relationship
 
 class ConsultRequest(db.Model):
     __tablename__ = 'consult_request'
+    __table_args__ = (
+        # 이미지별 최신 신청 상태 (inference_routes._consult_statuses)
+        db.Index('ix_consult_request_image_path_datetime', 'image_path', 'request_datetime'),
+        # 의사 진료 목록 (consult_routes.list_consult_requests): 필터 조건 + (request_datetime, id) 최신순 커서
+        db.Index('ix_consult_request_requested_datetime', 'is_requested', 'request_datetime', 'id'),
+        db.Index('ix_consult_request_status_datetime', 'is_requested', 'is_replied', 'request_datetime', 'id'),
+        db.Index('ix_consult_request_doctor_datetime', 'doctor_id', 'request_datetime', 'id'),
+        # 날짜 범위 조회/집계 (시간대별, 날짜별 사진, 일별 집계 재계산)
+        db.Index('ix_consult_request_datetime', 'request_datetime'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.String(80), nullable=False)  # register_id 기준
@@ -15,3 +25,14 @@ class ConsultRequest(db.Model):
     reply_datetime = db.Column(DateTime, nullable=True)
     is_requested = db.Column(db.String(1), default='Y')  # Y / N
     is_replied = db.Column(db.String(1), default='N')    # Y / N
+
+
+# ✅ 진료 신청 일별 집계 (services/consult_stats): 신청 등록/답변/취소/삭제 때 같은 트랜잭션에서 증감
+class ConsultDailyStats(db.Model):
+    __tablename__ = 'consult_daily_stats'
+
+    day = db.Column(db.Date, primary_key=True)               # request_datetime 의 날짜
+    pending = db.Column(db.Integer, nullable=False, default=0)    # is_requested=Y, is_replied=N
+    completed = db.Column(db.Integer, nullable=False, default=0)  # is_requested=Y, is_replied=Y
+    canceled = db.Column(db.Integer, nullable=False, default=0)   # is_requested=N, is_replied=N
+    other = db.Column(db.Integer, nullable=False, default=0)      # 그 밖의 조합 (is_requested=N, is_replied=Y 등)
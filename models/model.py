@@ -1,26 +1,92 @@
 from flask_sqlalchemy import SQLAlchemy
 from pymongo import MongoClient
 import os
+import threading
 from dotenv import load_dotenv
+from services.metrics import MongoCommandMetrics, MongoPoolMetrics, reset_mongo_pool_metrics, stage_timer
 
 # .env 파일 로드 (MongoDB URI와 DB 이름을 가져오기 위함)
 load_dotenv()
 db = SQLAlchemy()
 
 # ✅ MongoDB 클라이언트 클래스
+# 프로세스당 하나를 만들어 app.extensions['mongo_client'] 로 공유 (pymongo.MongoClient 가 커넥션 풀과 모니터 스레드를 가짐)
+# 설정 키 → MongoClient 옵션 (값이 None 이면 pymongo 기본값)
+MONGO_CLIENT_OPTIONS = {
+    'MONGO_MAX_POOL_SIZE': 'maxPoolSize',
+    'MONGO_MIN_POOL_SIZE': 'minPoolSize',
+    'MONGO_MAX_IDLE_TIME_MS': 'maxIdleTimeMS',
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': 'waitQueueTimeoutMS',
+    'MONGO_CONNECT_TIMEOUT_MS': 'connectTimeoutMS',
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': 'serverSelectionTimeoutMS',
+    'MONGO_SOCKET_TIMEOUT_MS': 'socketTimeoutMS',
+    'MONGO_WRITE_CONCERN': 'w',
+    'MONGO_WRITE_JOURNAL': 'journal',
+}
+
+
+class _Collection:
+    """포크 이후에도 현재 프로세스의 MongoClient 를 쓰는 컬렉션 핸들 (pymongo Collection 메서드를 그대로 위임)."""
+
+    def __init__(self, owner, name):
+        self._owner = owner
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._owner.db[self.name], attr)
+
+
 class MongoDBClient:
     COLLECTION_INFERENCE_RESULTS = 'inference_results'
 
-    def __init__(self, uri=None, db_name=None):
+    def __init__(self, uri=None, db_name=None, **options):
         mongo_uri = uri or os.getenv('MONGO_URI')
         mongo_db_name = db_name or os.getenv('MONGO_DB_NAME')
 
         if not mongo_uri or not mongo_db_name:
             raise ValueError("MongoDB URI 또는 DB 이름이 설정되어 있지 않습니다.")
 
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client[mongo_db_name]
-        self.inference_results_collection = self.db[self.COLLECTION_INFERENCE_RESULTS]
+        self.uri = mongo_uri
+        self.db_name = mongo_db_name
+        self.options = {k: v for k, v in options.items() if v is not None}
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # pymongo 클라이언트는 fork 후 공유하면 안 됨 (gunicorn --preload): 자식 프로세스는 첫 사용 시 새로 연결
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        self.inference_results_collection = self.get_collection(self.COLLECTION_INFERENCE_RESULTS)
+
+    @classmethod
+    def from_config(cls, config):
+        """설정(dict 형태)의 MONGO_* 값으로 만듭니다."""
+        options = {opt: config.get(key) for key, opt in MONGO_CLIENT_OPTIONS.items()}
+        w = options.get('w')
+        if isinstance(w, str) and w.isdigit():
+            options['w'] = int(w)
+        return cls(uri=config['MONGO_URI'], db_name=config['MONGO_DB_NAME'], **options)
+
+    def _after_fork(self):
+        # 부모의 소켓/스레드는 자식에서 쓸 수 없으므로 닫지 않고 버림
+        self._client = None
+        self._lock = threading.Lock()
+        reset_mongo_pool_metrics()
+
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._client = MongoClient(
+                        self.uri, appname='toothai',
+                        event_listeners=[MongoCommandMetrics(), MongoPoolMetrics()], **self.options,
+                    )
+                    self._pid = os.getpid()
+        return self._client
+
+    @property
+    def db(self):
+        return self.client[self.db_name]
 
     def insert_result(self, result_data):
         try:
@@ -28,7 +94,8 @@ class MongoDBClient:
             if 'survey' in result_data and not isinstance(result_data['survey'], dict):
                 raise TypeError("survey 필드는 dict 타입이어야 합니다.")
 
-            result = self.inference_results_collection.insert_one(result_data)
+            with stage_timer('mongo_insert'):
+                result = self.inference_results_collection.insert_one(result_data)
             print(f"MongoDB '{self.COLLECTION_INFERENCE_RESULTS}'에 문서 삽입 성공: {result.inserted_id}")
             return result.inserted_id
         except Exception as e:
@@ -38,7 +105,8 @@ class MongoDBClient:
     def insert_into_collection(self, collection_name, document):
         try:
             collection = self.db[collection_name]
-            result = collection.insert_one(document)
+            with stage_timer('mongo_insert'):
+                result = collection.insert_one(document)
             print(f"MongoDB '{collection_name}' 컬렉션에 문서 삽입 성공: {result.inserted_id}")
             return result.inserted_id
         except Exception as e:
@@ -46,10 +114,12 @@ class MongoDBClient:
             raise
 
     def get_collection(self, collection_name):
-        return self.db[collection_name]
+        return _Collection(self, collection_name)
 
     def close(self):
-        self.client.close()
+        if self._client is not None:
+            self._client.close()
+            self._client = None
 
 # ✅ 환자용 모델 (User)
 class User(db.Model):
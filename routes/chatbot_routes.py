@@ -6,6 +6,8 @@ import logging
 import os
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from config import DevelopmentConfig
+from services.metrics import GEMINI_SECONDS, ERRORS
+from services.profiling import profiled
 
 # 챗봇 전용 로거 분리
 chatbot_logger = logging.getLogger("chatbot_logger")
@@ -35,6 +37,7 @@ def is_medical_record_query(user_message: str) -> bool:
 
 @chatbot_bp.route('/chatbot', methods=['POST'])
 @jwt_required()
+@profiled('chatbot')
 def chatbot_reply():
     start_time = time.time()
     user_message = "알 수 없는 메시지"
@@ -124,7 +127,8 @@ def chatbot_reply():
         reply = ""
         try:
             # Gemini API 호출에 타임아웃 적용 (예: 30초)
-            response = chat.send_message(prompt, request_options={'timeout': 30})
+            with GEMINI_SECONDS.labels(route='chatbot').time():
+                response = chat.send_message(prompt, request_options={'timeout': 30})
             reply = response.text
             
             # ✅ 수정: 진료기록 관련 질문일 경우에만 면책 문구 추가
@@ -135,6 +139,7 @@ def chatbot_reply():
             app.logger.info(f"[✅ Gemini 응답] 길이: {len(reply)}자 / 내용:\n{reply}")
             print(f"[✅ Gemini 응답] 길이: {len(reply)}자 / 내용:\n{reply}")
         except Exception as e:
+            ERRORS.labels(stage='gemini_chatbot').inc()
             app.logger.error(f"[❌ Gemini 오류] 응답 생성 실패: {e}", exc_info=True)
             print(f"[❌ Gemini 오류] 응답 생성 실패: {e}")
             reply = "AI 응답 생성 중 오류가 발생했습니다. 다시 시도해 주세요."
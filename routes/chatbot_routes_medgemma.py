@@ -6,7 +6,6 @@ import re
 from datetime import datetime
 from PIL import Image
 import io
-from vertexai.preview.generative_models import Part
 from config import DevelopmentConfig
 
 chatbot_med_bp = Blueprint('chatbot_medgemma', __name__)
@@ -17,10 +16,9 @@ def preprocess_image_for_medgemma(image_full_path):
         if not match:
             app.logger.error(f"이미지 URL 형식 오류: {image_full_path}")
             return None
-        relative_path = match.group(1).replace('/', os.sep)
-        image_file_path = os.path.join(app.config['UPLOAD_FOLDER_ORIGINAL'], relative_path)
-        if not os.path.exists(image_file_path):
-            app.logger.error(f"이미지 없음: {image_file_path}")
+        image_file_path = app.extensions['image_store'].path(f"original/{match.group(1)}")
+        if image_file_path is None:
+            app.logger.error(f"이미지 없음: {image_full_path}")
             return None
         img = Image.open(image_file_path).convert('RGB').resize((896, 896), Image.Resampling.LANCZOS)
         byte_arr = io.BytesIO()
@@ -82,6 +80,7 @@ def chat_with_medgemma():
         image_path = found_record.get('original_image_path', '')
         image_url = f"{DevelopmentConfig.INTERNAL_BASE_URL}{image_path}" if image_path else None
         image_bytes = preprocess_image_for_medgemma(image_path)
+        from vertexai.preview.generative_models import Part  # vertexai 는 첫 요청 시 import
         image_part = Part.from_data(data=image_bytes, mime_type="image/jpeg") if image_bytes else None
 
         # 시스템 프롬프트 구성
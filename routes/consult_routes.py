@@ -1,13 +1,13 @@
 from flask import Blueprint, request, jsonify, current_app
-from sqlalchemy import func
+from sqlalchemy import func, or_
 from models.consult_model import ConsultRequest
 from models.model import db, User, Doctor
+from services import consult_stats as daily_stats
+from services import derivatives, pagination
 from datetime import datetime, timedelta
 import json
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-# ▶ 추가: Mongo 사용을 위해
-from pymongo import MongoClient
 import os
 
 consult_bp = Blueprint('consult', __name__)
@@ -39,14 +39,10 @@ def _parse_ymd(date_str: str):
         return None
 
 # ▶ 추가: MongoDB 컬렉션 핸들러
+# 요청마다 MongoClient 를 만들지 않고 앱의 공유 클라이언트(커넥션 풀)를 씀
 def _get_mongo_collection():
-    uri = current_app.config.get('MONGO_URI')
-    dbname = current_app.config.get('MONGO_DB_NAME')
     collname = current_app.config.get('MONGO_COLLECTION', 'uploads')
-    if not uri or not dbname:
-        raise RuntimeError('MongoDB is not configured (MONGO_URI / MONGO_DB_NAME).')
-    client = MongoClient(uri)
-    return client[dbname][collname]
+    return current_app.extensions['mongo_client'].get_collection(collname)
 
 # ▶ 추가: 경로 정규화 유틸 (호스트 접두사 제거, 쿼리스트링 제거 등)
 def _normalize_path(p: str) -> str:
@@ -95,6 +91,7 @@ def create_consult():
         )
 
         db.session.add(consult)
+        daily_stats.record_change(request_datetime, after=('Y', 'N'))
         db.session.commit()
 
         return jsonify({'message': 'Consultation request created'}), 201
@@ -115,19 +112,25 @@ def cancel_consult():
     if not user_id or not image_path:
         return jsonify({'error': 'Missing parameters'}), 400
 
-    consult = ConsultRequest.query.filter_by(
-        user_id=user_id,
-        image_path=image_path,
-        is_requested='Y',
-        is_replied='N'
-    ).order_by(ConsultRequest.id.desc()).first()
+    try:
+        consult = ConsultRequest.query.filter_by(
+            user_id=user_id,
+            image_path=image_path,
+            is_requested='Y',
+            is_replied='N'
+        ).order_by(ConsultRequest.id.desc()).first()
 
-    if consult:
-        db.session.delete(consult)
-        db.session.commit()
-        return jsonify({'message': 'Request cancelled'}), 200
+        if consult:
+            daily_stats.record_change(consult.request_datetime, before=(consult.is_requested, consult.is_replied))
+            db.session.delete(consult)
+            db.session.commit()
+            return jsonify({'message': 'Request cancelled'}), 200
 
-    return jsonify({'error': 'Cannot cancel this request'}), 400
+        return jsonify({'error': 'Cannot cancel this request'}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ 취소 실패: {e}")
+        return jsonify({'error': f'Database error: {e}'}), 500
 
 # ✅ 3. 특정 이미지에 대한 신청 상태 조회
 @consult_bp.route('/status', methods=['GET'])
@@ -186,6 +189,8 @@ def doctor_reply():
         if not consult or consult.is_requested != 'Y':
             return jsonify({'error': 'Request not found or not active'}), 400
 
+        daily_stats.record_change(consult.request_datetime, before=(consult.is_requested, consult.is_replied),
+                                    after=(consult.is_requested, 'Y'))
         consult.doctor_id = doctor.register_id
         consult.doctor_comment = comment
         consult.reply_datetime = reply_dt
@@ -197,65 +202,103 @@ def doctor_reply():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-# ✅ 5. 통계 조회
+# ✅ 5. 통계 조회 (일별 집계 테이블, services/consult_stats)
 @consult_bp.route('/stats', methods=['GET'])
 def consult_stats():
     date_str = request.args.get('date')
     try:
-        date_obj = datetime.strptime(date_str, '%Y%m%d')
-        start = datetime.combine(date_obj, datetime.min.time())
-        end = start + timedelta(days=1)
-
-        all_requests = ConsultRequest.query.filter(
-            ConsultRequest.request_datetime >= start,
-            ConsultRequest.request_datetime < end
-        ).count()
-
-        completed = ConsultRequest.query.filter(
-            ConsultRequest.request_datetime >= start,
-            ConsultRequest.request_datetime < end,
-            ConsultRequest.is_replied == 'Y'
-        ).count()
-
-        pending = all_requests - completed
+        date_obj = datetime.strptime(date_str, '%Y%m%d').date()
+        counts = daily_stats.day_summary(date_obj)
 
         return jsonify({
             'date': date_str,
-            'total': all_requests,
-            'completed': completed,
-            'pending': pending
+            'total': counts['total'],
+            'completed': counts['replied'],
+            'pending': counts['total'] - counts['replied']
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
-# ✅ 6. 진료 신청 리스트 조회
+# ✅ 6. 진료 신청 리스트 조회 (최신순, 선택적 커서 페이지)
+# GET /api/consult/list?status=pending|completed&from=YYYYMMDD&to=YYYYMMDD&doctor_id=..&limit=50&cursor=..
+# 신청자 이름은 User 와 조인해 한 쿼리로. limit/cursor 를 주면 페이지 단위로 응답하고 다음 페이지는 next_cursor 로
+# (마지막 페이지면 null), 둘 다 없으면 기존 클라이언트 호환으로 조건에 맞는 전체 목록
+CONSULT_STATUS_FILTERS = {
+    'pending': 'N',    # 답변 대기
+    'completed': 'Y',  # 답변 완료
+}
+
+
 @consult_bp.route('/list', methods=['GET'])
 def list_consult_requests():
+    status = request.args.get('status', 'all')
+    if status != 'all' and status not in CONSULT_STATUS_FILTERS:
+        return jsonify({'error': f"status 는 all, {', '.join(CONSULT_STATUS_FILTERS)} 중 하나여야 합니다."}), 400
+    date_from = _parse_ymd(request.args.get('from'))
+    date_to = _parse_ymd(request.args.get('to'))
+    if (request.args.get('from') and not date_from) or (request.args.get('to') and not date_to):
+        return jsonify({'error': '날짜 형식은 YYYYMMDD 또는 YYYY-MM-DD 입니다.'}), 400
+    doctor_id = request.args.get('doctor_id')
+    paged = 'limit' in request.args or 'cursor' in request.args
     try:
-        today = datetime.now().date()
-        start = datetime.combine(today, datetime.min.time())
-        end = datetime.combine(today, datetime.max.time())
+        limit = pagination.page_size(request.args.get('limit'), current_app.config['CONSULT_PAGE_SIZE'],
+                                     current_app.config['CONSULT_PAGE_MAX'])
+        after = pagination.decode_cursor(request.args.get('cursor'), 2)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        consults = ConsultRequest.query.filter(
-            ConsultRequest.is_requested == 'Y',
-            # ConsultRequest.request_datetime >= start, # 오늘만이 아닌 기존 날짜도 포함하려면 주석처리
-            # ConsultRequest.request_datetime <= end # 오늘만이 아닌 기존 날짜도 포함하려면 주석처리
-        ).order_by(ConsultRequest.request_datetime.desc()).all()
+    try:
+        query = (
+            db.session.query(
+                ConsultRequest.id,
+                ConsultRequest.user_id,
+                ConsultRequest.image_path,
+                ConsultRequest.request_datetime,
+                ConsultRequest.is_replied,
+                User.name,
+            )
+            .outerjoin(User, User.register_id == ConsultRequest.user_id)
+            .filter(ConsultRequest.is_requested == 'Y')
+        )
+        if status != 'all':
+            query = query.filter(ConsultRequest.is_replied == CONSULT_STATUS_FILTERS[status])
+        if doctor_id:
+            query = query.filter(ConsultRequest.doctor_id == doctor_id)
+        if date_from:
+            query = query.filter(ConsultRequest.request_datetime >= datetime.combine(date_from, datetime.min.time()))
+        if date_to:
+            query = query.filter(
+                ConsultRequest.request_datetime < datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+            )
+        if after is not None:
+            # (request_datetime, id) < 커서: 범위 조건을 함께 주어 인덱스 범위 조회로
+            last_dt, last_id = after
+            query = query.filter(
+                ConsultRequest.request_datetime <= last_dt,
+                or_(ConsultRequest.request_datetime < last_dt, ConsultRequest.id < last_id),
+            )
+        query = query.order_by(ConsultRequest.request_datetime.desc(), ConsultRequest.id.desc())
+        if paged:
+            rows, has_more = pagination.split_page(query.limit(limit + 1).all(), limit)
+        else:
+            rows, has_more = query.all(), False
 
         result = []
-        for consult in consults:
-            user = User.query.filter_by(register_id=consult.user_id).first()
+        for request_id, user_id, image_path, request_dt, is_replied, user_name in rows:
             result.append({
-                'request_id': consult.id,
-                'user_id': consult.user_id,
-                'user_name': user.name if user else '',
-                'image_path': consult.image_path,
-                'request_datetime': consult.request_datetime.strftime('%Y-%m-%d %H:%M:%S')
-                    if isinstance(consult.request_datetime, datetime) else consult.request_datetime,
-                'is_replied': consult.is_replied
+                'request_id': request_id,
+                'user_id': user_id,
+                'user_name': user_name or '',
+                'image_path': image_path,
+                'request_datetime': request_dt.strftime('%Y-%m-%d %H:%M:%S')
+                    if isinstance(request_dt, datetime) else request_dt,
+                'is_replied': is_replied
             })
 
-        return jsonify({'consults': result}), 200
+        if not paged:
+            return jsonify({'consults': result}), 200
+        next_cursor = pagination.encode_cursor(rows[-1].request_datetime, rows[-1].id) if has_more else None
+        return jsonify({'consults': result, 'next_cursor': next_cursor}), 200
     except Exception as e:
         return jsonify({'error': 'Failed to fetch consult list'}), 500
 
@@ -276,16 +319,8 @@ def get_active_consult_request():
 @consult_bp.route('/today-count', methods=['GET'])
 def today_request_count():
     try:
-        today = datetime.now().date()
-        start = datetime.combine(today, datetime.min.time())
-        end = datetime.combine(today, datetime.max.time())
-
-        count = ConsultRequest.query.filter(
-            ConsultRequest.request_datetime >= start,
-            ConsultRequest.request_datetime <= end
-        ).count()
-
-        return jsonify({'count': count}), 200
+        counts = daily_stats.day_summary(datetime.now().date())
+        return jsonify({'count': counts['total']}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -293,41 +328,12 @@ def today_request_count():
 @consult_bp.route('/today-status-counts', methods=['GET'])
 def today_status_counts():
     try:
-        today = datetime.now().date()
-        start = datetime.combine(today, datetime.min.time())
-        end = datetime.combine(today, datetime.max.time())
-
-        total = ConsultRequest.query.filter(
-            ConsultRequest.request_datetime >= start,
-            ConsultRequest.request_datetime <= end
-        ).count()
-
-        pending = ConsultRequest.query.filter(
-            ConsultRequest.request_datetime >= start,
-            ConsultRequest.request_datetime <= end,
-            ConsultRequest.is_requested == 'Y',
-            ConsultRequest.is_replied == 'N'
-        ).count()
-
-        completed = ConsultRequest.query.filter(
-            ConsultRequest.request_datetime >= start,
-            ConsultRequest.request_datetime <= end,
-            ConsultRequest.is_requested == 'Y',
-            ConsultRequest.is_replied == 'Y'
-        ).count()
-
-        canceled = ConsultRequest.query.filter(
-            ConsultRequest.request_datetime >= start,
-            ConsultRequest.request_datetime <= end,
-            ConsultRequest.is_requested == 'N',
-            ConsultRequest.is_replied == 'N'
-        ).count()
-
+        counts = daily_stats.day_summary(datetime.now().date())
         return jsonify({
-            'total': total,
-            'pending': pending,
-            'completed': completed,
-            'canceled': canceled
+            'total': counts['total'],
+            'pending': counts['pending'],
+            'completed': counts['completed'],
+            'canceled': counts['canceled']
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -339,21 +345,10 @@ def recent_7_days():
         today = datetime.now().date()
         start_date = today - timedelta(days=6)  # 오늘 포함 7일 전
 
-        results = []
-        for i in range(7):
-            day = start_date + timedelta(days=i)
-            start = datetime.combine(day, datetime.min.time())
-            end = datetime.combine(day, datetime.max.time())
-
-            count = ConsultRequest.query.filter(
-                ConsultRequest.request_datetime >= start,
-                ConsultRequest.request_datetime <= end
-            ).count()
-
-            results.append({
-                'date': day.strftime('%Y-%m-%d'),
-                'count': count
-            })
+        results = [
+            {'date': day.strftime('%Y-%m-%d'), 'count': daily_stats.summary(counts)['total']}
+            for day, counts in daily_stats.daily(start_date, today).items()
+        ]
 
         return jsonify({'data': results}), 200
     except Exception as e:
@@ -463,7 +458,7 @@ def hourly_stats():
 
 # ✅ 13. 날짜 기준 사진(원본 이미지) 리스트
 # GET /consult/images?date=2025-08-18&limit=12&offset=0
-# 응답: { ok:true, data:[{id,user_id,image_path,image_url,request_datetime,is_replied}], total:N }
+# 응답: { ok:true, data:[{id,user_id,image_path,image_url,thumbnail_url,request_datetime,is_replied}], total:N }
 @consult_bp.route('/images', methods=['GET'])
 def images_by_date():
     try:
@@ -504,6 +499,7 @@ def images_by_date():
                 'user_id': r.user_id,
                 'image_path': path,
                 'image_url': image_url,
+                'thumbnail_url': derivatives.thumbnail_url(image_url),
                 'request_datetime': dt_str,
                 'is_replied': r.is_replied,
             })
@@ -598,6 +594,7 @@ def delete_consult():
 
         consult = ConsultRequest.query.get(request_id)
         if consult:
+            daily_stats.record_change(consult.request_datetime, before=(consult.is_requested, consult.is_replied))
             db.session.delete(consult)
             db.session.commit()
             return jsonify({'message': f'Request {request_id} deleted successfully'}), 200
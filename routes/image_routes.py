@@ -2,8 +2,10 @@ import os
 from datetime import datetime
 from flask import Blueprint, request, jsonify, send_from_directory, current_app
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 
-from ai_model.model import perform_inference  # AI 모델 임포트
+from services import derivatives
+from services.image_delivery import redirect_presigned, send_image
 
 # Blueprint 생성
 image_bp = Blueprint('image', __name__)
@@ -40,6 +42,7 @@ def upload_image():
         image_file.save(original_path)
         print(f"✅ [원본 저장 완료]")
 
+        from ai_model.model import perform_inference  # AI 모델 (첫 요청 시 로드)
         inference_output = perform_inference(original_path, current_app.config['PROCESSED_UPLOAD_FOLDER'])
         if inference_output.get("error"):
             print(f"❌ [AI 추론 에러] {inference_output['error']}")
@@ -84,19 +87,36 @@ def upload_image():
     print("❌ [에러] 유효하지 않은 파일 타입")
     return jsonify({'error': 'Invalid file type'}), 400
 
+def _send_from(folder, filename):
+    # 캐시 헤더/ETag/Range/X-Accel-Redirect 는 services/image_delivery, 없는 파일은 기존처럼 404
+    path = safe_join(folder, filename)
+    if path and os.path.isfile(path):
+        return send_image(path)
+    return send_from_directory(folder, filename)
+
 @image_bp.route('/uploads/<filename>')
 def serve_upload(filename):
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    return _send_from(current_app.config['UPLOAD_FOLDER'], filename)
 
 @image_bp.route('/processed_uploads/<filename>')
 def serve_processed(filename):
-    return send_from_directory(current_app.config['PROCESSED_UPLOAD_FOLDER'], filename)
+    return _send_from(current_app.config['PROCESSED_UPLOAD_FOLDER'], filename)
 
 # ✅ 추가된 경로: 챗봇에서 마스크 이미지 보여주기용
 @image_bp.route('/images/<path:subpath>')
 def serve_result_image(subpath):
-    # 예: subpath = "model1/파일명.png" 또는 "original/파일명.png"
+    # 예: subpath = "model1/파일명.png" 또는 "original/파일명.png" → 이미지 저장소 키 그대로
     full_path = os.path.join("images", subpath)
     dir_path = os.path.dirname(full_path)
     filename = os.path.basename(full_path)
-    return send_from_directory(dir_path, filename)
+    variant = derivatives.requested_variant()  # ?w=256&fmt=webp → 썸네일
+    store = current_app.extensions['image_store']
+    url = store.url(subpath) if variant is None else None  # S3 + IMAGE_DOWNLOAD_MODE=presign
+    if url is not None:
+        return redirect_presigned(url)
+    source = store.path(subpath)
+    if source is None:
+        return _send_from(dir_path, filename)  # 저장소 밖의 파일 (없으면 404)
+    if variant is not None:
+        return derivatives.send_derivative(source, *variant)
+    return send_image(source)
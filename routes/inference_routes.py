@@ -1,11 +1,108 @@
 from flask import Blueprint, jsonify, current_app, request
 from bson import ObjectId
+from bson.errors import InvalidId
+from sqlalchemy import func
 from models.consult_model import ConsultRequest
 from models.model import db
 from config import DevelopmentConfig
+from services import derivatives, pagination
+from services.overlay_render import MASK_PROJECTION, without_masks
 
 inference_bp = Blueprint('inference', __name__)
 
+# 기록 목록(요약)에 필요한 필드만: 탐지/설문/매칭 결과/AI_result 는 상세 조회(/inference_results/<id>)에서
+HISTORY_PROJECTION = {
+    "timestamp": 1,
+    "image_type": 1,
+    "overlay_mode": 1,
+    "original_image_path": 1,
+    "model1_inference_result.label": 1,
+    "model1_inference_result.confidence": 1,
+    "model1_inference_result.summary": 1,
+    "model2_inference_result.label": 1,
+    "model2_inference_result.confidence": 1,
+}
+
+
+def _summary(doc):
+    """write-behind 대기 중 문서를 HISTORY_PROJECTION 과 같은 모양으로."""
+    out = {"_id": doc["_id"]}
+    for field in HISTORY_PROJECTION:
+        head, _, tail = field.partition(".")
+        if head not in doc:
+            continue
+        if not tail:
+            out[head] = doc[head]
+        elif isinstance(doc[head], dict) and tail in doc[head]:
+            out.setdefault(head, {})[tail] = doc[head][tail]
+    return out
+
+
+# IN 목록 하나에 넣을 경로 수 (전체 목록 API 는 기록 수만큼 경로가 생김)
+CONSULT_STATUS_BATCH = 500
+
+
+def _consult_statuses(docs, server_base_url):
+    """🔍 진단 신청 여부 확인: 문서들의 이미지 경로별 최신 신청 상태를 한 번의 쿼리로 (배치당 1회).
+
+    image_path IN (...) 중 경로별로 request_datetime(같으면 id) 최신 행 하나만 ROW_NUMBER() 로 고릅니다.
+    인덱스 ix_consult_request_image_path_datetime (image_path, request_datetime)."""
+    paths = sorted({server_base_url + doc.get("original_image_path", "") for doc in docs})
+    latest = {}
+    for i in range(0, len(paths), CONSULT_STATUS_BATCH):
+        ranked = (
+            db.session.query(
+                ConsultRequest.image_path,
+                ConsultRequest.is_requested,
+                ConsultRequest.is_replied,
+                func.row_number().over(
+                    partition_by=ConsultRequest.image_path,
+                    order_by=(ConsultRequest.request_datetime.desc(), ConsultRequest.id.desc()),
+                ).label("rn"),
+            )
+            .filter(ConsultRequest.image_path.in_(paths[i:i + CONSULT_STATUS_BATCH]))
+            .subquery()
+        )
+        rows = (
+            db.session.query(ranked.c.image_path, ranked.c.is_requested, ranked.c.is_replied)
+            .filter(ranked.c.rn == 1)
+            .all()
+        )
+        latest.update({path: (requested, replied) for path, requested, replied in rows})
+
+    for doc in docs:
+        requested, replied = latest.get(server_base_url + doc.get("original_image_path", ""), ("N", "N"))
+        doc["is_requested"] = requested
+        doc["is_replied"] = replied
+
+
+def _image_paths(doc):
+    filename = doc.get("original_image_path", "").split("/")[-1]
+    # ✅ 마스크 이미지 경로 지정 (vector 결과는 이미지 없이 detections[].polygons)
+    if doc.get("overlay_mode") != "vector":
+        doc["model1_image_path"] = f"/images/model1/{filename}"
+        doc["model2_image_path"] = f"/images/model2/{filename}"
+
+    if doc.get("image_type") == "normal":
+        doc["model3_image_path"] = f"/images/model3/{filename}"
+    else:
+        doc["model3_image_path"] = None
+
+
+def _thumbnails(doc):
+    # ✅ 목록 미리보기용 썸네일 경로 (원본/오버레이 대신 작은 파생본)
+    doc["thumbnails"] = {
+        key: derivatives.thumbnail_url(doc[key])
+        for key in ("original_image_path", "model1_image_path", "model2_image_path", "model3_image_path")
+        if doc.get(key)
+    }
+
+
+def _collection():
+    mongo_client = current_app.extensions.get('mongo_client')
+    return mongo_client.get_collection("inference_results") if mongo_client else None
+
+
 @inference_bp.route('/inference_results', methods=['GET'])
 def get_inference_results():
     role = request.args.get('role')
@@ -13,46 +110,31 @@ def get_inference_results():
     image_path = request.args.get('image_path')  # D용
 
     try:
-        mongo_client = current_app.extensions.get('mongo_client')
-        if not mongo_client:
+        collection = _collection()
+        if collection is None:
             return jsonify({"error": "MongoDB 연결 실패"}), 500
 
-        collection = mongo_client.get_collection("inference_results")
         server_base_url = DevelopmentConfig.INTERNAL_BASE_URL
 
-        # ✅ 환자용: 전체 리스트
+        # ✅ 환자용: 전체 리스트 (기존 앱 호환, 기록이 많으면 /inference_results/history 사용)
         if role == 'P':
             if not user_id:
                 return jsonify({"error": "user_id가 필요합니다."}), 400
 
-            documents = list(collection.find({"user_id": user_id}))
-
-            server_base_url = DevelopmentConfig.INTERNAL_BASE_URL
+            # 지연 렌더링용 마스크(mask_rle)는 응답에서 제외
+            documents = list(collection.find({"user_id": user_id}, MASK_PROJECTION))
+            # 업로드 직후 아직 write-behind 로 저장 중인 결과도 포함
+            writer = current_app.extensions.get('write_behind')
+            if writer is not None:
+                stored_ids = {doc["_id"] for doc in documents}
+                documents += [without_masks(d) for d in writer.pending_documents(user_id=user_id)
+                              if d["_id"] not in stored_ids]
 
+            _consult_statuses(documents, server_base_url)
             for doc in documents:
                 doc["_id"] = str(doc["_id"])
-                image_path = doc.get("original_image_path", "")
-                filename = image_path.split("/")[-1]
-                full_image_path = server_base_url + image_path
-
-                # 🔍 진단 신청 여부 확인
-                consult = (
-                    db.session.query(ConsultRequest)
-                    .filter_by(image_path=full_image_path)
-                    .order_by(ConsultRequest.request_datetime.desc())
-                    .first()
-                )
-                doc["is_requested"] = consult.is_requested if consult else "N"
-                doc["is_replied"] = consult.is_replied if consult else "N"
-
-                # ✅ 마스크 이미지 경로 지정
-                doc["model1_image_path"] = f"/images/model1/{filename}"
-                doc["model2_image_path"] = f"/images/model2/{filename}"
-
-                if doc.get("image_type") == "normal":
-                    doc["model3_image_path"] = f"/images/model3/{filename}"
-                else:
-                    doc["model3_image_path"] = None
+                _image_paths(doc)
+                _thumbnails(doc)
 
             return jsonify(documents), 200
 
@@ -64,32 +146,16 @@ def get_inference_results():
             doc = collection.find_one({
                 "user_id": user_id,
                 "original_image_path": image_path
-            })
+            }, MASK_PROJECTION)
+            writer = current_app.extensions.get('write_behind')
+            if doc is None and writer is not None:
+                pending = writer.pending_documents(user_id=user_id, original_image_path=image_path)
+                doc = without_masks(pending[0]) if pending else None
 
             if doc:
                 doc["_id"] = str(doc["_id"])
-                filename = image_path.split("/")[-1]
-                full_image_path = server_base_url + image_path
-
-                # 🔍 진단 신청 여부 확인
-                consult = (
-                    db.session.query(ConsultRequest)
-                    .filter_by(image_path=full_image_path)
-                    .order_by(ConsultRequest.request_datetime.desc())
-                    .first()
-                )
-                doc["is_requested"] = consult.is_requested if consult else "N"
-                doc["is_replied"] = consult.is_replied if consult else "N"
-
-                # ✅ 마스크 이미지 경로 지정
-                doc["model1_image_path"] = f"/images/model1/{filename}"
-                doc["model2_image_path"] = f"/images/model2/{filename}"
-
-                if doc.get("image_type") == "normal":
-                    doc["model3_image_path"] = f"/images/model3/{filename}"
-                else:
-                    doc["model3_image_path"] = None
-
+                _consult_statuses([doc], server_base_url)
+                _image_paths(doc)
                 return jsonify(doc), 200
             else:
                 return jsonify({"error": "해당 결과를 찾을 수 없습니다."}), 404
@@ -99,3 +165,86 @@ def get_inference_results():
     except Exception as e:
         print(f"❌ MongoDB 오류: {e}")
         return jsonify({"error": "MongoDB 조회 실패"}), 500
+
+
+# ✅ 환자용: 기록 목록 (요약 + 최신순 커서 페이지)
+# GET /api/inference_results/history?user_id=..&limit=20&cursor=<이전 응답의 next_cursor>
+@inference_bp.route('/inference_results/history', methods=['GET'])
+def get_inference_history():
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({"error": "user_id가 필요합니다."}), 400
+    try:
+        limit = pagination.page_size(request.args.get('limit'), current_app.config['HISTORY_PAGE_SIZE'],
+                                     current_app.config['HISTORY_PAGE_MAX'])
+        after = pagination.decode_cursor(request.args.get('cursor'), 2)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        collection = _collection()
+        if collection is None:
+            return jsonify({"error": "MongoDB 연결 실패"}), 500
+
+        # (timestamp, _id) 내림차순, 인덱스 user_id_timestamp_id 범위 조회 → 페이지 크기만큼만 읽음
+        documents, has_more = pagination.split_page(list(
+            collection.find(pagination.history_filter({"user_id": user_id}, after), HISTORY_PROJECTION)
+            .sort(pagination.HISTORY_SORT)
+            .limit(limit + 1)
+        ), limit)
+        last = documents[-1] if documents else None
+        next_cursor = pagination.encode_cursor(last["timestamp"], last["_id"]) if has_more else None
+
+        # 첫 페이지에는 업로드 직후 아직 write-behind 로 저장 중인 결과(가장 최신)를 앞에 붙임
+        writer = current_app.extensions.get('write_behind')
+        if after is None and writer is not None:
+            stored_ids = {doc["_id"] for doc in documents}
+            pending = [_summary(d) for d in writer.pending_documents(user_id=user_id) if d["_id"] not in stored_ids]
+            documents = sorted(pending, key=lambda d: d.get("timestamp"), reverse=True) + documents
+
+        _consult_statuses(documents, DevelopmentConfig.INTERNAL_BASE_URL)
+        for doc in documents:
+            doc["_id"] = str(doc["_id"])
+            _image_paths(doc)
+            _thumbnails(doc)
+
+        return jsonify({"items": documents, "next_cursor": next_cursor}), 200
+
+    except Exception as e:
+        print(f"❌ MongoDB 오류: {e}")
+        return jsonify({"error": "MongoDB 조회 실패"}), 500
+
+
+# ✅ 환자용: 기록 상세 (탐지/설문/매칭 결과/AI_result 포함)
+@inference_bp.route('/inference_results/<result_id>', methods=['GET'])
+def get_inference_detail(result_id):
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({"error": "user_id가 필요합니다."}), 400
+    try:
+        oid = ObjectId(result_id)
+    except (InvalidId, TypeError):
+        return jsonify({"error": "잘못된 결과 ID 입니다."}), 400
+
+    try:
+        collection = _collection()
+        if collection is None:
+            return jsonify({"error": "MongoDB 연결 실패"}), 500
+
+        doc = collection.find_one({"_id": oid, "user_id": user_id}, MASK_PROJECTION)
+        writer = current_app.extensions.get('write_behind')
+        if doc is None and writer is not None:
+            pending = writer.pending_documents(_id=oid, user_id=user_id)
+            doc = without_masks(pending[0]) if pending else None
+        if doc is None:
+            return jsonify({"error": "해당 결과를 찾을 수 없습니다."}), 404
+
+        doc["_id"] = str(doc["_id"])
+        _consult_statuses([doc], DevelopmentConfig.INTERNAL_BASE_URL)
+        _image_paths(doc)
+        _thumbnails(doc)
+        return jsonify(doc), 200
+
+    except Exception as e:
+        print(f"❌ MongoDB 오류: {e}")
+        return jsonify({"error": "MongoDB 조회 실패"}), 500
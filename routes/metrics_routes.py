@@ -0,0 +1,11 @@
+# routes/metrics_routes.py
+from flask import Blueprint, Response
+from services.metrics import render_latest
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# ✅ Prometheus 스크레이프 엔드포인트
+@metrics_bp.route('/metrics')
+def metrics():
+    body, content_type = render_latest()
+    return Response(body, content_type=content_type)
@@ -1,12 +1,13 @@
 from flask import Blueprint, request, jsonify, current_app
 from bson import ObjectId
-import google.generativeai as genai
 from PIL import Image
 import requests
 from io import BytesIO
 import os
 import time
 import logging
+from services.metrics import GEMINI_SECONDS, CACHE_HITS, CACHE_MISSES, ERRORS
+from services.gemini import LazyGenerativeModel
 
 # ✅ Gemini 전용 로거 설정
 gemini_logger = logging.getLogger("gemini_logger")
@@ -24,9 +25,8 @@ if not gemini_logger.handlers:
 
 multimodal_gemini_bp = Blueprint('multimodal_gemini', __name__)
 
-API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash-latest")
+# ✅ 첫 요청 시 생성
+model = LazyGenerativeModel("gemini-1.5-flash-latest")
 
 
 @multimodal_gemini_bp.route("/multimodal_gemini", methods=["POST"])
@@ -61,9 +61,11 @@ def handle_ai_opinion():
 
     # 이미 생성된 응답이 있으면 캐시 반환
     if "AI_result" in doc:
+        CACHE_HITS.labels(cache='ai_result').inc()
         print("📄 기존 AI_result 반환")
         return jsonify({"message": doc["AI_result"]})
 
+    CACHE_MISSES.labels(cache='ai_result').inc()
     print("🔍 기존 AI_result 없음 -> Gemini 호출 시작")
 
     # ✅ 2. 이미지 불러오기
@@ -104,7 +106,8 @@ def handle_ai_opinion():
 
     # ✅ 4. Gemini 요청
     try:
-        response = model.generate_content([prompt, img])
+        with GEMINI_SECONDS.labels(route='multimodal').time():
+            response = model.generate_content([prompt, img])
         result_text = response.text
 
         # ✅ 면책 조항을 AI 응답에 추가
@@ -124,5 +127,6 @@ def handle_ai_opinion():
         return jsonify({"message": final_result})
 
     except Exception as e:
+        ERRORS.labels(stage='gemini_multimodal').inc()
         print("❌ Gemini 호출 실패:", str(e))
         return jsonify({"error": f"Gemini 호출 실패: {str(e)}"}), 500
\ No newline at end of file
@@ -1,12 +1,13 @@
 from flask import Blueprint, request, jsonify, current_app
 from bson import ObjectId
-import google.generativeai as genai
 from PIL import Image
 import requests
 from io import BytesIO
 import os
 import time
 import logging
+from services.metrics import GEMINI_SECONDS, CACHE_HITS, CACHE_MISSES, ERRORS
+from services.gemini import LazyGenerativeModel
 
 # ✅ Gemini 로깅 설정
 gemini_logger = logging.getLogger("gemini_logger_xray")
@@ -24,9 +25,8 @@ if not gemini_logger.handlers:
 
 multimodal_gemini_xray_bp = Blueprint('multimodal_gemini_xray', __name__)
 
-API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash-latest")
+# ✅ 첫 요청 시 생성
+model = LazyGenerativeModel("gemini-1.5-flash-latest")
 
 
 @multimodal_gemini_xray_bp.route("/multimodal_gemini_xray", methods=["POST"])
@@ -65,9 +65,11 @@ def handle_xray_ai_opinion():
 
     # 이미 생성된 결과가 있으면 캐시 반환
     if "AI_result" in doc:
+        CACHE_HITS.labels(cache='ai_result').inc()
         print("📄 기존 X-ray AI_result 반환")
         return jsonify({"message": doc["AI_result"]})
 
+    CACHE_MISSES.labels(cache='ai_result').inc()
     print("🔍 Gemini X-ray 멀티모달 분석 시작")
 
     # ✅ 이미지 로드
@@ -114,7 +116,8 @@ def handle_xray_ai_opinion():
 """
 
     try:
-        response = model.generate_content([prompt, img])
+        with GEMINI_SECONDS.labels(route='multimodal_xray').time():
+            response = model.generate_content([prompt, img])
         result_text = response.text
 
         # ✅ 결과 저장 (캐시)
@@ -130,5 +133,6 @@ def handle_xray_ai_opinion():
         return jsonify({"message": result_text})
 
     except Exception as e:
+        ERRORS.labels(stage='gemini_multimodal_xray').inc()
         print("❌ Gemini X-ray 호출 실패:", str(e))
         return jsonify({"error": f"Gemini 호출 실패: {str(e)}"}), 500
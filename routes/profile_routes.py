@@ -0,0 +1,39 @@
+# routes/profile_routes.py
+import os
+from flask import Blueprint, jsonify, request, send_file
+from services import pagination
+from services.profiling import PROFILE_DIR, is_admin_request, list_profiles, profile_file
+
+profile_bp = Blueprint('profile', __name__)
+
+# ✅ 관리자 전용: 최근 프로파일 목록
+@profile_bp.route('/admin/profiles', methods=['GET'])
+def get_recent_profiles():
+    if not is_admin_request():
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    try:
+        limit = pagination.page_size(request.args.get('limit'), 50, 500)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'profiles': list_profiles(limit), 'directory': os.path.abspath(PROFILE_DIR)}), 200
+
+# ✅ 관리자 전용: cProfile 원본(.prof) 다운로드 → snakeviz / pstats 로 분석
+@profile_bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    if not is_admin_request():
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    path = profile_file(profile_id, '.prof')
+    if not path:
+        return jsonify({'error': '프로파일을 찾을 수 없습니다.'}), 404
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f"{profile_id}.prof")
+
+# ✅ 관리자 전용: 누적 시간 기준 상위 함수 요약 (텍스트)
+@profile_bp.route('/admin/profiles/<profile_id>/summary', methods=['GET'])
+def profile_summary(profile_id):
+    if not is_admin_request():
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    path = profile_file(profile_id, '.txt')
+    if not path:
+        return jsonify({'error': '프로파일을 찾을 수 없습니다.'}), 404
+    return send_file(path, mimetype='text/plain; charset=utf-8')
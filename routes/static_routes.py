@@ -1,55 +1,81 @@
+import io
 import os
-from flask import Blueprint, send_from_directory, current_app
+from flask import Blueprint, abort, send_file, current_app
+
+from services import derivatives, overlay_format
+from services.image_delivery import redirect_presigned, send_image
 
 static_bp = Blueprint('static', __name__)
 
+def _send_rendered(path, filename, variant):
+    if variant is not None:
+        return derivatives.send_derivative(path, *variant)
+    return send_image(path, mimetype=overlay_format.mimetype_for(filename))
+
+def _send_image(kind, filename):
+    # 파일 위치는 이미지 저장소 인덱스로 찾음 (로컬/S3 백엔드, 아직 이전되지 않았으면 기존 images/<kind> 폴더)
+    store = current_app.extensions['image_store']
+    writer = current_app.extensions.get('write_behind')
+    renderer = current_app.extensions.get('overlay_renderer')
+    variant = derivatives.requested_variant()  # ?w=256&fmt=webp → 썸네일
+    # 이미 그려 둔 지연 렌더링 오버레이는 인덱스/문서 조회 없이 디스크 캐시에서 바로 제공
+    path = renderer.cached(kind, filename) if renderer is not None else None
+    if path is not None:
+        return _send_rendered(path, filename, variant)
+    # 오버레이는 설정에 따라 .webp 로 저장될 수 있으므로 기존 .png URL 도 같은 이름의 다른 형식으로 연결
+    candidates = [filename]
+    stem = os.path.splitext(filename)[0]
+    candidates += [stem + ext for ext in overlay_format.MIMETYPES if stem + ext != filename]
+    for name in candidates:
+        key = f"{kind}/{name}"
+        url = store.url(key) if variant is None else None  # S3 + IMAGE_DOWNLOAD_MODE=presign
+        if url is not None:
+            return redirect_presigned(url)
+        path = store.path(key)
+        if path is not None:
+            if variant is not None:
+                return derivatives.send_derivative(path, *variant)
+            return send_image(path)  # 형식은 blob 확장자 (재압축된 원본은 .webp)
+        # 업로드 응답 직후 아직 write-behind 가 저장하지 못한 오버레이는 메모리에서 바로 제공
+        pending = writer.pending_image(key) if writer is not None else None
+        if pending is not None:
+            data = overlay_format.encode(pending, overlay_format.format_for(key))
+            return send_file(io.BytesIO(data), mimetype=overlay_format.mimetype_for(key))
+    # 지연 렌더링/보존 정책으로 저장되지 않은 오버레이: 문서(마스크 RLE, 박스)로 그려 캐시한 파일 (services/overlay_render)
+    path = renderer.path(kind, filename) if renderer is not None else None
+    if path is not None:
+        return _send_rendered(path, filename, variant)
+    abort(404)
+
 # 원본 이미지 제공
 @static_bp.route('/images/original/<filename>')
 def serve_original_image(filename):
-    return send_from_directory(
-        current_app.config['UPLOAD_FOLDER_ORIGINAL'],
-        filename
-    )
+    return _send_image('original', filename)
 
 # 모델 1 마스크 이미지 제공
 @static_bp.route('/images/model1/<filename>')
 def serve_model1_image(filename):
-    return send_from_directory(
-        current_app.config['PROCESSED_FOLDER_MODEL1'],
-        filename
-    )
+    return _send_image('model1', filename)
 
 # 모델 2 마스크 이미지 제공
 @static_bp.route('/images/model2/<filename>')
 def serve_model2_image(filename):
-    return send_from_directory(
-        current_app.config['PROCESSED_FOLDER_MODEL2'],
-        filename
-    )
+    return _send_image('model2', filename)
 
 # 모델 3 마스크 이미지 제공
 @static_bp.route('/images/model3/<filename>')
 def serve_model3_image(filename):
-    return send_from_directory(
-        current_app.config['PROCESSED_FOLDER_MODEL3'],
-        filename
-    )
+    return _send_image('model3', filename)
 
 # X-ray 모델 1 마스크 이미지 제공
 @static_bp.route('/images/xmodel1/<filename>')
 def serve_xmodel1_image(filename):
-    return send_from_directory(
-        current_app.config['PROCESSED_FOLDER_XMODEL1'],
-        filename
-    )
+    return _send_image('xmodel1', filename)
 
 # X-ray 모델 2 마스크 이미지 제공
 @static_bp.route('/images/xmodel2/<filename>')
 def serve_xmodel2_image(filename):
-    return send_from_directory(
-        current_app.config['PROCESSED_FOLDER_XMODEL2'],
-        filename
-    )
+    return _send_image('xmodel2', filename)
 
 #이미지 타입            접근 URL 예시
 #원본                   /images/original/파일명.png
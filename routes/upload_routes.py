@@ -1,27 +1,30 @@
 import os
+import sys
 import json
+import functools
 import time
 import logging
 from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageDraw, ImageFont
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ai_model.predictor import predict_overlayed_image
-from ai_model import hygiene_predictor, tooth_number_predictor
 from ai_model.combiner import combine_results
-from models.model import MongoDBClient
+from ai_model.pool import PoolTimeout
+from bson import ObjectId
+from services.metrics import stage_timer, QUEUE_DEPTH, ERRORS
+from services.profiling import profiled
+from services import overlay_format, overlay_render, upload_ingest
+from services.upload_decode import decode_upload, persist_async
+from services.write_behind import WriteJob
 
 import numpy as np
 
-try:
-    import torch
-    def _sync_cuda():
-        if torch.cuda.is_available():
-            torch.cuda.synchronize()
-except Exception:
-    def _sync_cuda():
-        pass
+def _sync_cuda():
+    # torch 는 모델 모듈이 import 한 뒤에만 확인 (라우트 import 시 torch 로드 방지)
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.synchronize()
 
 upload_logger = logging.getLogger("upload_logger")
 upload_logger.setLevel(logging.INFO)
@@ -37,6 +40,9 @@ if not upload_logger.handlers:
 
 upload_bp = Blueprint('upload', __name__)
 
+# raster: 마스크 오버레이 PNG (기본) / vector: 탐지별 다각형만 반환·저장 (질병/위생, ai_model/polygons)
+OVERLAY_MODES = ('raster', 'vector')
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
@@ -65,6 +71,83 @@ def _convert_for_mongo(data):
         return [_convert_for_mongo(item) for item in data]
     return data
 
+def _without_masks(detections):
+    return [{k: v for k, v in det.items() if k != 'mask_array'} for det in detections]
+
+def _response_fields(mongo_data):
+    """응답에는 저장 문서에서 내부 필드(_id/user_id/survey/timestamp)와 마스크(mask_rle)를 뺀 값을 사용."""
+    return overlay_render.without_masks({k: v for k, v in mongo_data.items() if k not in ('_id', 'user_id', 'survey', 'timestamp')})
+
+def _render_xray_overlays(image, predictions, implant_results):
+    """X-ray 오버레이 2장 (탐지 박스 / 임플란트 제조사). 요청과 저널 재생에서 같은 코드로 그림."""
+    font = _load_font(18)
+    image_draw = image.copy()
+    draw = ImageDraw.Draw(image_draw)
+    for det in predictions:
+        x1, y1, x2, y2 = map(int, det['bbox'])
+        label = f"{det['class_name']} {det['confidence']:.2f}"
+        draw.rectangle([x1, y1, x2, y2], outline="blue", width=2)
+        draw.text((x1, max(y1 - 20, 0)), label, font=font, fill="blue")
+
+    image_with_manufacturer = image.copy()
+    draw = ImageDraw.Draw(image_with_manufacturer)
+    for result in implant_results:
+        x1, y1, x2, y2 = result['bbox']
+        name = result['predicted_manufacturer_name']
+        conf = result['confidence'] * 100
+        label = f"{name} ({conf:.1f}%)"
+        draw.rectangle([x1, y1, x2, y2], outline="red", width=2)
+        draw.text((x1, max(y1 - 22, 0)), label, fill="yellow", font=font)
+    return image_draw, image_with_manufacturer
+
+def _render_xray_from_doc(doc, image, index):
+    return _render_xray_overlays(
+        image, doc['model1_inference_result']['predictions'], doc['implant_classification_result'],
+    )[index]
+
+def _decode_original(store, key):
+    # 요청 때와 같은 디코딩(원본 해상도 + EXIF 방향)이어야 좌표가 맞음
+    return decode_upload(store.read(key))
+
+def _regenerate_xray(job, store):
+    doc = job.document
+    overlays = _render_xray_overlays(
+        _decode_original(store, job.original_key),
+        doc['model1_inference_result']['predictions'],
+        doc['implant_classification_result'],
+    )
+    return dict(zip(job.overlay_keys, overlays))
+
+def _regenerate_normal(job, store):
+    from ai_model.predictor import predict_overlayed_image
+    from ai_model import hygiene_predictor, tooth_number_predictor
+    image = _decode_original(store, job.original_key)
+    # 벡터 오버레이 결과는 model3 만 래스터이므로 키의 kind 별로 필요한 것만 다시 그림
+    render = {
+        'model1': lambda: predict_overlayed_image(image)[0],
+        'model2': lambda: hygiene_predictor.predict_mask_and_overlay_with_all(image)[0],
+        'model3': lambda: tooth_number_predictor.predict_mask_and_overlay_only(image),
+    }
+    return {key: render[key.split('/', 1)[0]]() for key in job.overlay_keys}
+
+@upload_bp.record_once
+def _register_regenerators(state):
+    # 저널 재생 시 누락된 오버레이를 다시 그리는 함수 (write_behind.init_app 이 먼저 호출되어 있어야 함)
+    writer = state.app.extensions['write_behind']
+    store = state.app.extensions['image_store']
+    writer.register_regenerator('xray', functools.partial(_regenerate_xray, store=store))
+    writer.register_regenerator('normal', functools.partial(_regenerate_normal, store=store))
+    # 보존 정책(services/retention)이 지운 X-ray 오버레이는 요청 시 원본 + 저장된 박스로 다시 그림
+    renderer = state.app.extensions['overlay_renderer']
+    for index, kind in enumerate(('xmodel1', 'xmodel2')):
+        renderer.register_renderer(kind, functools.partial(_render_xray_from_doc, index=index))
+
+def _submit_write(kind, original_key, mongo_data, images):
+    """오버레이 저장 + Mongo insert 를 write-behind 큐로 넘깁니다 (큐가 가득 차면 여기서 바로 저장)."""
+    current_app.extensions['write_behind'].submit(
+        WriteJob(str(mongo_data['_id']), kind, original_key, mongo_data, images=images)
+    )
+
 @upload_bp.route('/upload_image', methods=['POST'])
 @jwt_required()
 def upload_image_from_flutter():
@@ -77,6 +160,8 @@ def upload_plain_image():
 
 @upload_bp.route('/upload_masked_image', methods=['POST'])
 @jwt_required()
+@QUEUE_DEPTH.labels(queue='upload_inflight').track_inprogress()
+@profiled('upload')
 def upload_masked_image():
     user_id = get_jwt_identity()
     start_total = time.perf_counter()
@@ -101,38 +186,42 @@ def upload_masked_image():
             survey_data = json.loads(survey_json_str)
         except json.JSONDecodeError as e:
             return jsonify({'error': f'survey JSON 형식 오류: {e}'}), 400
+        # 저장은 응답 이후이므로 insert_result 의 survey 타입 검사를 요청 단계에서 미리 수행
+        if not isinstance(survey_data, dict):
+            return jsonify({'error': 'survey 는 JSON 객체여야 합니다.'}), 400
+
+    overlay_mode = request.form.get('overlay_mode', 'raster')
+    if overlay_mode not in OVERLAY_MODES:
+        return jsonify({'error': f"overlay_mode 는 {', '.join(OVERLAY_MODES)} 중 하나여야 합니다."}), 400
+    try:
+        polygon_tolerance = float(request.form.get('polygon_tolerance', current_app.config['OVERLAY_POLYGON_TOLERANCE']))
+    except ValueError:
+        return jsonify({'error': 'polygon_tolerance 는 숫자여야 합니다.'}), 400
+    if not 0 <= polygon_tolerance <= current_app.config['OVERLAY_POLYGON_MAX_TOLERANCE']:
+        return jsonify({'error': f"polygon_tolerance 는 0~{current_app.config['OVERLAY_POLYGON_MAX_TOLERANCE']} 이어야 합니다."}), 400
 
     if file.filename == '':
         return jsonify({'error': '파일명이 비어 있습니다.'}), 400
     if not allowed_file(file.filename):
         return jsonify({'error': '허용되지 않는 파일 형식입니다.'}), 400
+    # 크기/매직 넘버는 수신 중에 이미 검사됨 (services/upload_ingest), 여기서는 헤더의 픽셀 수만 확인 (413/415)
+    upload = upload_ingest.inspect(file, current_app.config['UPLOAD_MAX_PIXELS'])
 
     try:
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
         original_filename = secure_filename(file.filename)
         base_name = f"{user_id}_{timestamp}_{original_filename}"
         base_name = os.path.splitext(base_name)[0] + ".png"
+        overlay_name = overlay_format.overlay_filename(base_name)  # OVERLAY_FORMAT=webp 면 .webp
 
-        upload_dir = current_app.config['UPLOAD_FOLDER_ORIGINAL']
-        processed_dir_1 = current_app.config['PROCESSED_FOLDER_MODEL1']
-        processed_dir_2 = current_app.config['PROCESSED_FOLDER_MODEL2']
-        processed_dir_3 = current_app.config['PROCESSED_FOLDER_MODEL3']
-        xmodel1_dir = current_app.config['PROCESSED_FOLDER_XMODEL1']
-        xmodel2_dir = current_app.config['PROCESSED_FOLDER_XMODEL2']
-
-        os.makedirs(upload_dir, exist_ok=True)
-        os.makedirs(processed_dir_1, exist_ok=True)
-        os.makedirs(processed_dir_2, exist_ok=True)
-        os.makedirs(processed_dir_3, exist_ok=True)
-        os.makedirs(xmodel1_dir, exist_ok=True)
-        os.makedirs(xmodel2_dir, exist_ok=True)
+        # 수신 버퍼의 바이트를 메모리에서 디코딩하고, 원본 바이트는 병렬로 이미지 저장소에 저장
+        # (원본은 저널 재생 시 오버레이를 다시 그리는 기준이므로 write-behind 제출 전에 저장 완료를 기다림)
+        original_key = f"original/{base_name}"
+        persist = persist_async(current_app.extensions['image_store'], original_key, upload.data, upload.sha256)
+        image = decode_upload(upload.data)
 
-        original_path = os.path.join(upload_dir, base_name)
-        file.save(original_path)
-
-        image = Image.open(original_path)
-        if image.mode != "RGB":
-            image = image.convert("RGB")
+        # 응답에 바로 돌려줄 수 있도록 _id 를 미리 발급 (Mongo insert 는 write-behind 에서)
+        inference_result_id = ObjectId()
 
         # ───────────────────────────── X-ray 처리 ─────────────────────────────
         if image_type == 'xray':
@@ -140,7 +229,7 @@ def upload_masked_image():
             from ai_model.predict_implant_manufacturer import classify_implants_from_xray
 
             detect_start = time.perf_counter()
-            detect_result = detect_xray(original_path)
+            detect_result = detect_xray(image=image, save_overlay=False)
             _sync_cuda()
             detect_elapsed = int((time.perf_counter() - detect_start) * 1000)
 
@@ -157,7 +246,10 @@ def upload_masked_image():
             ]
 
             impl_start = time.perf_counter()
-            implant_classification_results = classify_implants_from_xray(original_path)
+            # 탐지 결과를 넘겨 분류기 안에서 detect_xray 를 다시 돌리지 않음
+            implant_classification_results, _ = classify_implants_from_xray(
+                f"/images/{original_key}", image=image, detections=filtered_boxes, save_overlay=False
+            )
             _sync_cuda()
             impl_elapsed = int((time.perf_counter() - impl_start) * 1000)
 
@@ -167,36 +259,15 @@ def upload_masked_image():
                 f"(탐지: {detect_elapsed}ms, 임플란트분류: {impl_elapsed}ms, user_id={user_id})"
             )
 
-            image_draw = image.copy()
-            draw = ImageDraw.Draw(image_draw)
-            font = _load_font(18)
-            for det in filtered_boxes:
-                x1, y1, x2, y2 = map(int, det['bbox'])
-                label = f"{det['class_name']} {det['confidence']:.2f}"
-                draw.rectangle([x1, y1, x2, y2], outline="blue", width=2)
-                draw.text((x1, max(y1 - 20, 0)), label, font=font, fill="blue")
-            processed_path_x1 = os.path.join(xmodel1_dir, base_name)
-            image_draw.save(processed_path_x1)
-
-            image_with_manufacturer = image.copy()
-            draw = ImageDraw.Draw(image_with_manufacturer)
-            for result in implant_classification_results:
-                x1, y1, x2, y2 = result['bbox']
-                name = result['predicted_manufacturer_name']
-                conf = result['confidence'] * 100
-                label = f"{name} ({conf:.1f}%)"
-                draw.rectangle([x1, y1, x2, y2], outline="red", width=2)
-                draw.text((x1, max(y1 - 22, 0)), label, fill="yellow", font=font)
-            processed_path_x2 = os.path.join(xmodel2_dir, base_name)
-            image_with_manufacturer.save(processed_path_x2)
-
-            mongo_data = {
+            mongo_data = _convert_for_mongo({
+                '_id': inference_result_id,
                 'user_id': user_id,
                 'image_type': image_type,
                 'survey': survey_data,
                 'original_image_path': f"/images/original/{base_name}",
-                'model1_image_path': f"/images/xmodel1/{base_name}",
-                'model2_image_path': f"/images/xmodel2/{base_name}",
+                'original_image_sha256': upload.sha256,
+                'model1_image_path': f"/images/xmodel1/{overlay_name}",
+                'model2_image_path': f"/images/xmodel2/{overlay_name}",
                 'model1_inference_result': {
                     'used_model': 'xray_detect_best.pt',
                     'predictions': yolo_predictions,
@@ -204,64 +275,58 @@ def upload_masked_image():
                 },
                 'implant_classification_result': implant_classification_results,
                 'timestamp': datetime.now()
-            }
-            mongo_client = MongoDBClient()
-            inserted_id = mongo_client.insert_result(_convert_for_mongo(mongo_data))
+            })
+            image_draw, image_with_manufacturer = _render_xray_overlays(
+                image, yolo_predictions, implant_classification_results
+            )
+            persist.result()
+            _submit_write('xray', original_key, mongo_data, {
+                f"xmodel1/{overlay_name}": image_draw,
+                f"xmodel2/{overlay_name}": image_with_manufacturer,
+            })
 
             return jsonify({
                 'message': 'X-ray 이미지 YOLO + 임플란트 분류 완료',
-                'inference_result_id': str(inserted_id),
-                'image_type': image_type,
-                'original_image_path': f"/images/original/{base_name}",
-                'model1_image_path': f"/images/xmodel1/{base_name}",
-                'model2_image_path': f"/images/xmodel2/{base_name}",
-                'model1_inference_result': {
-                    'used_model': 'xray_detect_best.pt',
-                    'predictions': yolo_predictions,
-                    'summary': summary_text
-                },
-                'implant_classification_result': implant_classification_results
+                'inference_result_id': str(inference_result_id),
+                **_response_fields(mongo_data),
             }), 200
 
         # ─────────────────────────── 일반 이미지 처리 ───────────────────────────
+        # 모델 모듈은 첫 요청 시 import (LAZY_STARTUP=0 이면 app.py 에서 미리 로드됨)
+        from ai_model.predictor import predict_overlayed_image
+        from ai_model import hygiene_predictor, tooth_number_predictor
+        # 오버레이는 인코딩/저장 없이 이미지로만 받아 write-behind 로 넘김 (vector 면 합성도 하지 않음)
+        # 마스크는 항상 RLE 로 저장 (오버레이를 나중에 다시 그리는 기준, services/overlay_render)
+        # OVERLAY_RENDER=lazy 면 합성하지 않고 첫 GET 때 그림
+        vector = overlay_mode == 'vector'
+        lazy = current_app.config['OVERLAY_RENDER'] == 'lazy'
         t1_start = time.perf_counter()
-        processed_path_1 = os.path.join(processed_dir_1, base_name)
         (
             masked_image_1,
             disease_detections_list,
             backend_model_confidence,
             backend_model_name,
             disease_label,
-        ) = predict_overlayed_image(image, processed_path_1)
-        try:
-            masked_image_1.save(processed_path_1)
-        except Exception:
-            pass
+        ) = predict_overlayed_image(image, render_overlay=not (vector or lazy))
         t1_elapsed = int((time.perf_counter() - t1_start) * 1000)
 
         t2_start = time.perf_counter()
-        processed_path_2 = os.path.join(processed_dir_2, base_name)
         (
             masked_image_2,
             hygiene_detections_list,
             hygiene_confidence,
             hygiene_model_name,
             hygiene_main_label,
-        ) = hygiene_predictor.predict_mask_and_overlay_with_all(image, processed_path_2)
-        try:
-            Image.open(processed_path_2).close()
-        except Exception as e:
-            upload_logger.warning(f"[DEBUG] model2 이미지 확인 실패: {e}")
+        ) = hygiene_predictor.predict_mask_and_overlay_with_all(image, render_overlay=not (vector or lazy))
         t2_elapsed = int((time.perf_counter() - t2_start) * 1000)
 
         t3_start = time.perf_counter()
-        processed_path_3 = os.path.join(processed_dir_3, base_name)
-        tooth_number_predictor.predict_mask_and_overlay_only(image, processed_path_3)
-        try:
-            Image.open(processed_path_3).close()
-        except Exception as e:
-            upload_logger.warning(f"[DEBUG] model3 이미지 확인 실패: {e}")
-        tooth_info_list = tooth_number_predictor.get_all_class_info_json(image)
+        # 치아번호 모델은 한 번만 추론 (탐지 목록 + 마스크), 오버레이는 그 결과로 그림
+        tooth_detections = tooth_number_predictor.predict_teeth(image)
+        masked_image_3 = None if lazy else tooth_number_predictor.render_overlay(image, tooth_detections)
+        tooth_info_list = [
+            {k: v for k, v in det.items() if k not in ('mask_rle', 'name')} for det in tooth_detections
+        ]
 
         # 🦷 중복된 치아 번호 제거 (가장 높은 confidence만 유지)
         # 키를 tooth_number_fdi로만 설정하여 동일한 치아 번호는 하나만 남김
@@ -275,12 +340,28 @@ def upload_masked_image():
         
         t3_elapsed = int((time.perf_counter() - t3_start) * 1000)
         
-        final_matched_results = combine_results(
-            image.size,
-            disease_detections_list,
-            hygiene_detections_list,
-            filtered_tooth_info_list # 수정된 리스트 전달
-        )
+        with stage_timer('combine_results'):
+            final_matched_results = combine_results(
+                image.size,
+                disease_detections_list,
+                hygiene_detections_list,
+                filtered_tooth_info_list # 수정된 리스트 전달
+            )
+
+        if vector:
+            # 원본 해상도 마스크 → 단순화된 다각형 (델타 인코딩), mask_array 는 아래에서 제거됨
+            from ai_model.polygons import mask_to_polygons  # cv2 는 첫 vector 요청 시 import
+            with stage_timer('polygonize'):
+                for det in disease_detections_list + hygiene_detections_list:
+                    det['polygons'] = mask_to_polygons(
+                        det['mask_array'], polygon_tolerance, current_app.config['OVERLAY_POLYGON_MIN_AREA']
+                    )
+
+        if not vector:
+            from ai_model import rle
+            with stage_timer('mask_rle_encode'):
+                for det in disease_detections_list + hygiene_detections_list:
+                    det['mask_rle'] = rle.encode(det['mask_array'])
 
         total_elapsed = int((time.perf_counter() - start_total) * 1000)
         upload_logger.info(
@@ -289,88 +370,64 @@ def upload_masked_image():
             f"user_id={user_id})"
         )
 
-        # ⚠️ DB 저장을 위한 데이터에서 'mask_array' 필드를 제거
-        disease_detections_for_db = _convert_for_mongo([
-            {k: v for k, v in det.items() if k != 'mask_array'}
-            for det in disease_detections_list
-        ])
-        hygiene_detections_for_db = _convert_for_mongo([
-            {k: v for k, v in det.items() if k != 'mask_array'}
-            for det in hygiene_detections_list
-        ])
-        
-        mongo_client = MongoDBClient()
-        inserted_id = mongo_client.insert_result({
+        # ⚠️ DB 저장/응답 데이터에서 'mask_array' 필드를 제거 (변환은 한 번만)
+        mongo_data = _convert_for_mongo({
+            '_id': inference_result_id,
             'user_id': user_id,
             'image_type': image_type,
             'survey': survey_data,
             'original_image_path': f"/images/original/{base_name}",
+            'original_image_sha256': upload.sha256,
             'original_image_yolo_detections': yolo_inference_data,
-            'model1_image_path': f"/images/model1/{base_name}",
+            'overlay_mode': overlay_mode,
+            **({'polygon_tolerance': polygon_tolerance} if vector else {}),
+            'overlay_render': current_app.config['OVERLAY_RENDER'],
+            'image_size': list(image.size),
+            'model1_image_path': None if vector else f"/images/model1/{overlay_name}",
             'model1_inference_result': {
                 'message': 'model1 마스크 생성 완료',
                 'confidence': backend_model_confidence,
                 'used_model': backend_model_name,
                 'label': disease_label,
-                'detections': disease_detections_for_db,
+                'detections': _without_masks(disease_detections_list),
             },
-            'model2_image_path': f"/images/model2/{base_name}",
+            'model2_image_path': None if vector else f"/images/model2/{overlay_name}",
             'model2_inference_result': {
                 'message': 'model2 마스크 생성 완료',
                 'confidence': hygiene_confidence,
                 'label': hygiene_main_label,
-                'detections': hygiene_detections_for_db,
+                'detections': _without_masks(hygiene_detections_list),
                 'used_model': hygiene_model_name
             },
-            'model3_image_path': f"/images/model3/{base_name}",
+            'model3_image_path': f"/images/model3/{overlay_name}",
             'model3_inference_result': {
                 'message': 'model3 마스크 생성 완료',
-                'predicted_tooth_info': filtered_tooth_info_list # 필터링된 리스트 저장
+                'predicted_tooth_info': filtered_tooth_info_list, # 필터링된 리스트 저장
+                'detections': tooth_detections,  # 오버레이를 다시 그리는 데 사용 (mask_rle 포함)
             },
-            'matched_results': _convert_for_mongo(final_matched_results),
+            'matched_results': final_matched_results,
             'timestamp': datetime.now()
         })
-
-        # ⚠️ API 응답을 위한 데이터에서도 'mask_array' 필드를 제거
-        disease_detections_for_api = [
-            {k: v for k, v in det.items() if k != 'mask_array'}
-            for det in disease_detections_list
-        ]
-        hygiene_detections_for_api = [
-            {k: v for k, v in det.items() if k != 'mask_array'}
-            for det in hygiene_detections_list
-        ]
+        persist.result()
+        overlays = {}
+        if not lazy:
+            overlays[f"model3/{overlay_name}"] = masked_image_3
+            if not vector:
+                overlays.update({f"model1/{overlay_name}": masked_image_1, f"model2/{overlay_name}": masked_image_2})
+        _submit_write('normal', original_key, mongo_data, overlays)
 
         return jsonify({
             'message': '3개 모델 처리 및 저장 완료',
-            'inference_result_id': str(inserted_id),
-            'image_type': image_type,
-            'original_image_path': f"/images/original/{base_name}",
-            'original_image_yolo_detections': yolo_inference_data,
-            'model1_image_path': f"/images/model1/{base_name}",
-            'model1_inference_result': {
-                'message': 'model1 마스크 생성 완료',
-                'confidence': backend_model_confidence,
-                'used_model': backend_model_name,
-                'label': disease_label,
-                'detections': disease_detections_for_api,
-            },
-            'model2_image_path': f"/images/model2/{base_name}",
-            'model2_inference_result': {
-                'message': 'model2 마스크 생성 완료',
-                'confidence': hygiene_confidence,
-                'label': hygiene_main_label,
-                'detections': hygiene_detections_for_api,
-                'used_model': hygiene_model_name
-            },
-            'model3_image_path': f"/images/model3/{base_name}",
-            'model3_inference_result': {
-                'message': 'model3 마스크 생성 완료',
-                'predicted_tooth_info': filtered_tooth_info_list # 필터링된 리스트 응답
-            },
-            'matched_results': _convert_for_mongo(final_matched_results)
+            'inference_result_id': str(inference_result_id),
+            **_response_fields(mongo_data),
         }), 200
 
+    except PoolTimeout as e:
+        # 모든 레플리카가 사용 중 → 클라이언트가 재시도하도록 503
+        upload_logger.warning(f"Upload rejected: {e}")
+        return jsonify({'error': '서버가 혼잡합니다. 잠시 후 다시 시도해 주세요.'}), 503, {'Retry-After': '5'}
+
     except Exception as e:
+        ERRORS.labels(stage='upload').inc()
         upload_logger.exception("Upload error")
         return jsonify({'error': f'서버 처리 중 오류: {str(e)}'}), 500
\ No newline at end of file
@@ -1,7 +1,7 @@
 # routes/xray_implant_classify_route.py
-import os
 from flask import Blueprint, request, jsonify, current_app
-from ai_model.predict_implant_manufacturer import classify_implants_from_xray
+
+from services.image_store import url_key
 
 xray_implant_bp = Blueprint("xray_implant", __name__)
 
@@ -13,14 +13,16 @@ def xray_implant_classify():
     if not image_path:
         return jsonify({"error": "image_path가 필요합니다."}), 400
 
-    # 절대 경로 처리 (서버에서 직접 파일 읽을 수 있게)
-    image_path_abs = os.path.join(current_app.root_path, image_path.strip("/"))
+    # '/images/<kind>/<name>' → 이미지 저장소의 실제 파일 경로 (서버에서 직접 파일 읽을 수 있게)
+    image_path_abs = current_app.extensions['image_store'].path(url_key(image_path))
 
-    if not os.path.exists(image_path_abs):
-        return jsonify({"error": f"이미지 경로가 존재하지 않습니다: {image_path_abs}"}), 404
+    if image_path_abs is None:
+        return jsonify({"error": f"이미지 경로가 존재하지 않습니다: {image_path}"}), 404
 
     try:
-        results = classify_implants_from_xray(image_path_abs)
+        from ai_model.predict_implant_manufacturer import classify_implants_from_xray
+        # 분류 결과 이미지(<원본>_implant_classified.png)는 아무도 읽지 않으므로 저장하지 않음
+        results = classify_implants_from_xray(image_path_abs, save_overlay=False)
         return jsonify({"results": results}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
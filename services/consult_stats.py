@@ -0,0 +1,184 @@
+# services/consult_stats.py
+"""
+진료 신청 대시보드 통계 (일별 집계 테이블 consult_daily_stats).
+
+대시보드가 새로고침마다 부르는 /api/consult/stats, today-count, today-status-counts, recent-7-days 는
+consult_request 를 날짜·상태별로 여러 번 COUNT 하는 대신 일별 집계 행을 한 번 읽습니다.
+
+- 상태 구분 (is_requested, is_replied): (Y, N) pending / (Y, Y) completed / (N, N) canceled / 나머지 other
+- 신청 등록/답변/취소/삭제 라우트가 consult_request 를 바꿀 때 record_change 로 같은 트랜잭션 안에서 해당 날짜 행을 증감
+  (commit/rollback 이 함께 적용됨, 날짜 행이 없으면 upsert 로 생성)
+- aggregate 는 consult_request 에서 조건부 집계(SUM(CASE ...)) GROUP BY 날짜 한 쿼리로 모든 상태 수를 계산합니다.
+  집계 테이블이 비어 있으면 시작 시 전체를 채우고, 직접 DB 를 고친 경우 rebuild 로 다시 맞춥니다.
+
+    python -m services.consult_stats rebuild                    # 전체 재계산
+    python -m services.consult_stats rebuild --from 20250701    # 해당 날짜 이후만
+"""
+import logging
+import argparse
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.exc import IntegrityError
+
+from models.consult_model import ConsultDailyStats, ConsultRequest
+from models.model import db
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = ("pending", "completed", "canceled", "other")
+_STATUS_BUCKETS = {("Y", "N"): "pending", ("Y", "Y"): "completed", ("N", "N"): "canceled"}
+
+
+def bucket(is_requested, is_replied) -> str:
+    return _STATUS_BUCKETS.get((is_requested, is_replied), "other")
+
+
+def _day(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):  # SQLite 의 DATE() 는 문자열
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _upsert(day: date, deltas: Dict[str, int]):
+    """날짜 행의 상태별 값에 deltas 를 더합니다 (행이 없으면 만듦). 현재 세션 트랜잭션 안에서 실행."""
+    table = ConsultDailyStats.__table__
+    values = {"day": day, **{name: 0 for name in BUCKETS}, **deltas}
+    increments = {name: table.c[name] + delta for name, delta in deltas.items()}
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(**values).on_duplicate_key_update(**increments)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**values).on_conflict_do_update(index_elements=["day"], set_=increments)
+    else:
+        updated = db.session.execute(table.update().where(table.c.day == day).values(**increments))
+        if updated.rowcount:
+            return
+        stmt = table.insert().values(**values)
+    db.session.execute(stmt)
+
+
+def record_change(request_datetime, before: Optional[Tuple] = None, after: Optional[Tuple] = None):
+    """신청 한 건의 상태 변화 반영. before/after = (is_requested, is_replied), 생성이면 before=None, 삭제면 after=None.
+
+    라우트의 db.session.commit() 전에 부릅니다."""
+    deltas: Dict[str, int] = {}
+    if before is not None:
+        deltas[bucket(*before)] = deltas.get(bucket(*before), 0) - 1
+    if after is not None:
+        deltas[bucket(*after)] = deltas.get(bucket(*after), 0) + 1
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas and request_datetime is not None:
+        _upsert(_day(request_datetime), deltas)
+
+
+def aggregate(start: Optional[date] = None, end: Optional[date] = None) -> Dict[date, Dict[str, int]]:
+    """consult_request 에서 [start, end] 날짜별 상태 수를 한 번의 GROUP BY 로 계산."""
+    day = func.date(ConsultRequest.request_datetime)
+
+    def _count(condition):
+        return func.sum(case((condition, 1), else_=0))
+
+    requested = ConsultRequest.is_requested
+    replied = ConsultRequest.is_replied
+    query = db.session.query(
+        day.label("day"),
+        func.count(ConsultRequest.id).label("total"),
+        _count(and_(requested == "Y", replied == "N")).label("pending"),
+        _count(and_(requested == "Y", replied == "Y")).label("completed"),
+        _count(and_(requested == "N", replied == "N")).label("canceled"),
+    )
+    if start is not None:
+        query = query.filter(ConsultRequest.request_datetime >= datetime.combine(start, datetime.min.time()))
+    if end is not None:
+        query = query.filter(
+            ConsultRequest.request_datetime < datetime.combine(end + timedelta(days=1), datetime.min.time())
+        )
+    result = {}
+    for row in query.group_by(day).all():
+        counts = {"pending": int(row.pending or 0), "completed": int(row.completed or 0),
+                  "canceled": int(row.canceled or 0)}
+        counts["other"] = int(row.total) - sum(counts.values())
+        result[_day(row.day)] = counts
+    return result
+
+
+def rebuild(start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """[start, end] 범위의 집계 행을 consult_request 에서 다시 계산해 바꿉니다. 반환: 쓴 날짜 수."""
+    counts = aggregate(start, end)
+    query = ConsultDailyStats.query
+    if start is not None:
+        query = query.filter(ConsultDailyStats.day >= start)
+    if end is not None:
+        query = query.filter(ConsultDailyStats.day <= end)
+    query.delete(synchronize_session=False)
+    db.session.add_all(ConsultDailyStats(day=day, **values) for day, values in counts.items())
+    db.session.commit()
+    return len(counts)
+
+
+def daily(start: date, end: date) -> Dict[date, Dict[str, int]]:
+    """[start, end] 날짜별 상태 수 (집계 테이블 한 번 조회, 신청이 없는 날은 0)."""
+    rows = ConsultDailyStats.query.filter(ConsultDailyStats.day >= start, ConsultDailyStats.day <= end).all()
+    by_day = {row.day: {name: getattr(row, name) for name in BUCKETS} for row in rows}
+    result = {}
+    for i in range((end - start).days + 1):
+        day = start + timedelta(days=i)
+        result[day] = by_day.get(day, {name: 0 for name in BUCKETS})
+    return result
+
+
+def summary(counts: Dict[str, int]) -> Dict[str, int]:
+    """하루 집계 → 대시보드 값 (total, pending, completed, canceled, replied = 답변 완료 전체)."""
+    return {
+        "total": sum(counts[name] for name in BUCKETS),
+        "pending": counts["pending"],
+        "completed": counts["completed"],
+        "canceled": counts["canceled"],
+        "replied": counts["completed"] + counts["other"],  # is_replied=Y (신청 여부 무관)
+    }
+
+
+def day_summary(day: date) -> Dict[str, int]:
+    return summary(daily(day, day)[day])
+
+
+def init_app(app):
+    """집계 테이블이 비어 있는데 신청 기록이 있으면 (처음 배포) 전체를 채웁니다."""
+    with app.app_context():
+        if ConsultDailyStats.query.first() is None and ConsultRequest.query.first() is not None:
+            try:
+                logger.info(f"진료 신청 일별 집계 생성: {rebuild()}일")
+            except IntegrityError:
+                db.session.rollback()  # 다른 워커가 동시에 채움
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="진료 신청 일별 집계 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = sub.add_parser("rebuild", help="consult_request 에서 일별 집계를 다시 계산")
+    rebuild_parser.add_argument("--from", dest="start", help="시작 날짜 (YYYYMMDD, 생략 시 전체)")
+    rebuild_parser.add_argument("--to", dest="end", help="끝 날짜 (YYYYMMDD, 포함)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    from flask import Flask
+    from config import DevelopmentConfig
+
+    app = Flask(__name__)
+    app.config.from_object(DevelopmentConfig)
+    db.init_app(app)
+    start = datetime.strptime(args.start, "%Y%m%d").date() if args.start else None
+    end = datetime.strptime(args.end, "%Y%m%d").date() if args.end else None
+    with app.app_context():
+        db.create_all()
+        print(f"일별 집계 {rebuild(start, end)}일 재계산 완료")
+
+
+if __name__ == "__main__":
+    main()
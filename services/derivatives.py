@@ -0,0 +1,110 @@
+# services/derivatives.py
+"""
+결과 이미지 파생본(썸네일) 서비스.
+
+/images/... 경로에 ?w=<너비>&fmt=<webp|jpeg|png> 를 붙이면 원본/오버레이를 줄인 이미지를 돌려줍니다.
+첫 요청 때 만들어 DERIVATIVE_CACHE_DIR 에 저장하고, 이후에는 파일을 그대로 보냅니다.
+
+- 너비는 DERIVATIVE_WIDTHS 중 요청 값 이상인 가장 작은 값으로 올립니다 (캐시 조합 수 제한, 원본보다 크게 만들지 않음)
+- 캐시 키 = 원본 경로 + 원본 mtime/크기 + 너비 + 형식 → 원본이 바뀌면 새 파생본
+- 휴대폰 사진의 EXIF 방향은 업로드 디코딩(services/upload_decode)과 같이 적용해 표시 방향으로 만듭니다.
+- 캐시 전체 크기가 DERIVATIVE_CACHE_MAX_BYTES 를 넘으면 마지막 접근이 오래된 것부터 지웁니다 (services/disk_cache).
+- 투명도가 있는 오버레이에 jpeg 를 요청하면 webp 로 만듭니다 (알파 유지).
+"""
+import os
+import hashlib
+from typing import Optional, Tuple
+
+from flask import current_app, request
+from PIL import Image, ImageOps, features
+from werkzeug.exceptions import BadRequest
+
+from services.disk_cache import DiskLRU
+from services.image_delivery import send_image
+from services.metrics import stage_timer
+
+FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg"), "png": ("PNG", "image/png")}
+# 파생본 생성 방식이 바뀌면 올림 (이전 캐시 무효화, 2: EXIF 방향 적용)
+DERIVATIVE_VERSION = 2
+
+
+class DerivativeCache:
+    def __init__(self, directory: str, max_bytes: int, quality: int = 80):
+        self.quality = quality
+        self.cache = DiskLRU(directory, max_bytes, name="derivative")
+
+    def _key(self, source: str, width: int, fmt: str) -> str:
+        st = os.stat(source)
+        raw = f"{os.path.abspath(source)}|{st.st_mtime_ns}|{st.st_size}|{width}|{fmt}|{self.quality}|{DERIVATIVE_VERSION}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, source: str, width: int, fmt: str) -> str:
+        """파생본 경로 (없으면 생성)."""
+        path = self.cache.path(self._key(source, width, fmt), f".{fmt}")
+        return self.cache.get_or_create(path, lambda tmp: self._generate(source, tmp, width, fmt))
+
+    def _generate(self, source: str, tmp: str, width: int, fmt: str):
+        with stage_timer("derivative_render"), Image.open(source) as img:
+            if img.format == "JPEG":
+                # 큰 JPEG 원본은 DCT 단계에서 먼저 축소 (픽셀을 읽기 전에만 가능, 정사각형이라 회전과 무관)
+                img.draft("RGB", (width, width))
+            img = ImageOps.exif_transpose(img)
+            pil_format, _ = FORMATS[fmt]
+            if pil_format == "JPEG":
+                img = img.convert("RGB")
+            elif img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")  # 팔레트 PNG 오버레이 등: 보간 축소 전에 변환
+            img.thumbnail((width, width), Image.Resampling.LANCZOS)
+            img.save(tmp, format=pil_format, quality=self.quality)
+
+
+def _has_alpha(source: str) -> bool:
+    with Image.open(source) as img:
+        return img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def requested_variant() -> Optional[Tuple[int, str]]:
+    """요청 쿼리의 (너비, 형식). ?w= 가 없으면 None (원본 그대로 제공)."""
+    width = request.args.get("w")
+    if width is None:
+        return None
+    try:
+        width = int(width)
+    except ValueError:
+        raise BadRequest("w 는 정수여야 합니다.")
+    if width <= 0:
+        raise BadRequest("w 는 1 이상이어야 합니다.")
+    fmt = request.args.get("fmt", "webp").lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in FORMATS:
+        raise BadRequest(f"fmt 는 {', '.join(FORMATS)} 중 하나여야 합니다.")
+    widths = current_app.config["DERIVATIVE_WIDTHS"]
+    width = next((w for w in widths if w >= width), widths[-1])
+    return width, fmt
+
+
+def send_derivative(source: str, width: int, fmt: str):
+    cache: DerivativeCache = current_app.extensions["derivatives"]
+    if fmt == "webp" and not features.check("webp"):
+        fmt = "png"
+    if fmt == "jpeg" and _has_alpha(source):
+        fmt = "webp" if features.check("webp") else "png"
+    path = cache.get(source, width, fmt)
+    return send_image(path, mimetype=FORMATS[fmt][1])
+
+
+def thumbnail_url(url: str, width: Optional[int] = None) -> str:
+    """목록 화면용 썸네일 URL (기본 DERIVATIVE_LIST_WIDTH)."""
+    width = width or current_app.config["DERIVATIVE_LIST_WIDTH"]
+    return f"{url}{'&' if '?' in url else '?'}w={width}"
+
+
+def init_app(app) -> DerivativeCache:
+    cache = DerivativeCache(
+        app.config["DERIVATIVE_CACHE_DIR"],
+        max_bytes=app.config["DERIVATIVE_CACHE_MAX_BYTES"],
+        quality=app.config["DERIVATIVE_QUALITY"],
+    )
+    app.extensions["derivatives"] = cache
+    return cache
@@ -0,0 +1,113 @@
+# services/disk_cache.py
+"""
+크기 상한이 있는 디스크 캐시 (썸네일 파생본, S3 읽기 캐시, 지연 렌더링 오버레이).
+
+- 파일 mtime = 마지막 접근 시각 (적중 시 갱신)
+- 전체 크기가 max_bytes 를 넘으면 mtime 이 오래된 것부터 지워 90% 이하로 맞춤 (LRU).
+  여러 워커가 같은 디렉터리를 쓰므로 정리 시 디렉터리를 다시 스캔합니다.
+- 같은 파일을 동시에 만들지 않도록 경로별 잠금, 임시 파일에 쓴 뒤 rename (읽는 쪽은 완성된 파일만 봄)
+"""
+import os
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from services.metrics import CACHE_HITS, CACHE_MISSES
+
+logger = logging.getLogger(__name__)
+
+
+class DiskLRU:
+    def __init__(self, directory: str, max_bytes: int, name: str):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.name = name  # 메트릭 라벨 (toothai_cache_hits_total{cache=...})
+        self._lock = threading.Lock()
+        self._path_locks: Dict[str, threading.Lock] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._total = sum(size for _, size, _ in self._entries())
+
+    def path(self, key: str, ext: str) -> str:
+        """키(해시 문자열) → 캐시 파일 경로 (앞 2자리로 나눔)."""
+        return os.path.join(self.directory, key[:2], f"{key}{ext}")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue  # 생성 중인 파일
+                entry = os.path.join(root, name)
+                try:
+                    st = os.stat(entry)
+                except FileNotFoundError:
+                    continue
+                yield st.st_mtime, st.st_size, entry
+
+    def get(self, path: str) -> Optional[str]:
+        """path 가 있으면 접근 시각을 갱신하고 그대로, 없으면 None (만들지 않음)."""
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(path)  # LRU: 적중 시 접근 시각 갱신
+        except FileNotFoundError:
+            return None  # 다른 워커가 방금 정리함
+        CACHE_HITS.labels(cache=self.name).inc()
+        return path
+
+    def get_or_create(self, path: str, create: Callable[[str], None]) -> str:
+        """path 가 있으면 그대로, 없으면 create(임시 경로)로 만든 뒤 돌려줍니다. create 의 예외는 그대로 전달됩니다."""
+        if self.get(path) is not None:
+            return path
+
+        with self._lock:
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+        try:
+            with path_lock:
+                if not os.path.exists(path):
+                    CACHE_MISSES.labels(cache=self.name).inc()
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                    try:
+                        create(tmp)
+                        os.replace(tmp, path)
+                    finally:
+                        if os.path.exists(tmp):
+                            os.remove(tmp)
+                    self._track(os.path.getsize(path))
+        finally:
+            with self._lock:
+                self._path_locks.pop(path, None)
+        return path
+
+    def discard(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _track(self, size: int):
+        with self._lock:
+            self._total += size
+            over = self._total > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        """마지막 접근이 오래된 파일부터 지워 최대 크기의 90% 이하로 맞춥니다."""
+        with self._lock:
+            entries = list(self._entries())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9)
+            removed = 0
+            for _, size, entry in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(entry)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            self._total = total
+        if removed:
+            logger.info(f"{self.name} 캐시 정리: {removed}개 삭제, {total / (1024 * 1024):.1f}MB 사용 중")
@@ -0,0 +1,42 @@
+# services/gemini.py
+"""
+Gemini 모델 지연 생성.
+
+google.generativeai 는 import 만으로도 수백 ms 가 걸리므로 앱 시작 시점이 아니라
+첫 호출 시점에 import / configure / GenerativeModel 생성을 합니다.
+"""
+import os
+import threading
+
+_configure_lock = threading.Lock()
+_configured = False
+
+
+def _genai():
+    global _configured
+    import google.generativeai as genai
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _configured = True
+    return genai
+
+
+class LazyGenerativeModel:
+    """genai.GenerativeModel 프록시 — 첫 속성 접근(start_chat, generate_content 등) 때 생성합니다."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = _genai().GenerativeModel(self.model_name)
+        return self._model
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
@@ -0,0 +1,93 @@
+# services/image_delivery.py
+"""
+이미지 파일 응답 (원본/오버레이/썸네일).
+
+파일명에 타임스탬프(+ 파생본은 원본 버전 해시)가 들어가 내용이 바뀌지 않으므로
+- Cache-Control: public, max-age=IMAGE_CACHE_MAX_AGE, immutable
+- 강한 ETag (내용 sha256, (경로, mtime, 크기) 기준으로 프로세스 안에 캐시) + Last-Modified
+- If-None-Match / If-Modified-Since → 304, Range → 206 (werkzeug conditional 처리)
+
+IMAGE_SENDFILE_MODE 로 바이트 전송을 앞단 프록시에 넘길 수 있습니다.
+- x-accel    : nginx. X-Accel-Redirect: IMAGE_ACCEL_PREFIX + (IMAGE_ACCEL_ROOT 기준 상대 경로)
+               304 는 여기서 먼저 판단하므로 캐시된 요청은 프록시 디스크 I/O 도 없음
+- x-sendfile : Apache mod_xsendfile / lighttpd (Flask USE_X_SENDFILE)
+IMAGE_ACCEL_ROOT 밖의 파일은 x-accel 이어도 Python 이 직접 보냅니다.
+
+S3 백엔드 + IMAGE_DOWNLOAD_MODE=presign 이면 presign 된 URL 로 302 리다이렉트합니다 (바이트는 스토리지가 직접 전송).
+"""
+import os
+import hashlib
+from functools import lru_cache
+from typing import Optional
+
+from flask import current_app, redirect, request, send_file
+from werkzeug.wrappers import Response
+
+SENDFILE_MODES = ("", "x-accel", "x-sendfile")
+
+
+@lru_cache(maxsize=8192)
+def _content_etag(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def _cache_headers(rv: Response, max_age: int) -> Response:
+    rv.cache_control.public = True
+    rv.cache_control.max_age = max_age
+    rv.cache_control.immutable = True
+    return rv
+
+
+def _accel_uri(path: str) -> Optional[str]:
+    root = os.path.abspath(current_app.config["IMAGE_ACCEL_ROOT"])
+    path = os.path.abspath(path)
+    if os.path.commonpath([root, path]) != root:
+        return None
+    prefix = current_app.config["IMAGE_ACCEL_PREFIX"].rstrip("/")
+    return f"{prefix}/{os.path.relpath(path, root).replace(os.sep, '/')}"
+
+
+def send_image(path: str, mimetype: Optional[str] = None) -> Response:
+    """캐시 헤더/ETag/조건부 요청/Range 를 처리해 이미지 파일을 보냅니다."""
+    st = os.stat(path)
+    etag = _content_etag(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    max_age = current_app.config["IMAGE_CACHE_MAX_AGE"]
+
+    accel_uri = _accel_uri(path) if current_app.config["IMAGE_SENDFILE_MODE"] == "x-accel" else None
+    if accel_uri is not None:
+        rv = Response(mimetype=mimetype or "application/octet-stream")
+        rv.set_etag(etag)
+        rv.last_modified = int(st.st_mtime)
+        rv.make_conditional(request)  # 304 면 여기서 끝, 아니면 nginx 가 파일/Range 처리
+        if rv.status_code == 304:
+            return _cache_headers(rv, max_age)
+        rv.status_code = 200
+        rv.headers.pop("Content-Length", None)
+        rv.headers["X-Accel-Redirect"] = accel_uri
+        if mimetype is None:
+            del rv.headers["Content-Type"]  # nginx 가 확장자로 결정
+        return _cache_headers(rv, max_age)
+
+    # x-sendfile 모드는 init_app 에서 USE_X_SENDFILE 로 켜 두면 send_file 이 헤더만 보냄
+    rv = send_file(path, mimetype=mimetype, conditional=True, etag=etag,
+                   last_modified=st.st_mtime, max_age=max_age)
+    return _cache_headers(rv, max_age)
+
+
+def redirect_presigned(url: str) -> Response:
+    """presign 된 스토리지 URL 로 리다이렉트. URL 이 만료되기 전까지만 브라우저가 재사용하도록 캐시 시간을 제한합니다."""
+    rv = redirect(url, code=302)
+    rv.cache_control.private = True
+    rv.cache_control.max_age = current_app.config["IMAGE_PRESIGN_EXPIRES"] // 2
+    return rv
+
+
+def init_app(app):
+    mode = app.config["IMAGE_SENDFILE_MODE"]
+    if mode not in SENDFILE_MODES:
+        raise ValueError(f"IMAGE_SENDFILE_MODE 는 {SENDFILE_MODES} 중 하나여야 합니다: {mode}")
+    app.config["USE_X_SENDFILE"] = mode == "x-sendfile"
@@ -0,0 +1,381 @@
+# services/image_store.py
+"""
+이미지 저장소 (내용 주소 + 해시 접두사 샤딩).
+
+원본/오버레이를 images/original, images/model1 ... 같은 평평한 폴더에 두면 파일이 수십만 개가 되면서
+디렉터리 조회와 백업이 느려집니다. 여기서는 파일을 내용 sha256 으로 저장하고 접두사로 나눕니다.
+
+    ab/cd/abcd....png     (sha256 앞 2자리 / 다음 2자리 → 디렉터리당 최대 256개)
+
+blob 은 IMAGE_STORAGE_BACKEND 가 정한 곳(로컬 IMAGE_STORE_DIR 또는 S3 호환 버킷, services/object_storage)에 둡니다.
+
+공개 URL(/images/<kind>/<name>) 은 그대로 두고, 키 "<kind>/<name>" → (sha256, 확장자) 를
+MongoDB 인덱스 컬렉션(IMAGE_INDEX_COLLECTION, _id = 키)에 기록합니다.
+- 파일명에 타임스탬프가 들어가 키의 내용은 바뀌지 않으므로 조회 결과를 프로세스 안에서 LRU 캐시
+- 인덱스에 없는 키(기존 폴더 파일, .png/.webp 후보 이름, 지연 렌더링 오버레이)도 IMAGE_INDEX_MISS_TTL 초 동안 캐시
+  (다른 워커가 그 사이에 저장하면 TTL 이 지난 뒤 보임, 같은 프로세스의 저장은 바로 반영)
+- 같은 내용은 한 번만 저장 (중복 제거)
+- 인덱스에 없는 키는 기존 평평한 폴더에서 찾음 → 마이그레이션 전/중에도 기존 파일이 그대로 제공됨
+- path() 는 로컬 파일 경로 (s3 는 읽기 캐시로 내려받음), url() 은 presign 된 다운로드 URL (s3 + IMAGE_DOWNLOAD_MODE=presign)
+
+기존 파일 이전:
+    python -m services.image_store migrate                  # 복사(local 은 가능하면 하드링크, s3 는 업로드) + 인덱스 기록
+    python -m services.image_store migrate --remove-legacy  # 이전 후 원래 파일 삭제
+    python -m services.image_store migrate --dry-run --kinds original,model1
+    python -m services.image_store check                    # 백엔드 쓰기/읽기/삭제 확인 (MinIO 등)
+"""
+import io
+import os
+import hashlib
+import logging
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Optional
+
+from werkzeug.security import safe_join
+
+from services.metrics import stage_timer, CACHE_HITS, CACHE_MISSES
+from services.object_storage import create_backend
+
+logger = logging.getLogger(__name__)
+
+# URL 의 kind → 기존 평평한 폴더 설정 키
+KIND_FOLDERS = {
+    "original": "UPLOAD_FOLDER_ORIGINAL",
+    "model1": "PROCESSED_FOLDER_MODEL1",
+    "model2": "PROCESSED_FOLDER_MODEL2",
+    "model3": "PROCESSED_FOLDER_MODEL3",
+    "xmodel1": "PROCESSED_FOLDER_XMODEL1",
+    "xmodel2": "PROCESSED_FOLDER_XMODEL2",
+}
+URL_PREFIX = "/images/"
+DOWNLOAD_MODES = ("proxy", "presign")
+MIGRATE_BATCH = 500
+
+
+def url_key(url: str) -> str:
+    """'/images/model1/a.png' (또는 'http://host/images/...') → 'model1/a.png'."""
+    _, sep, rest = url.partition(URL_PREFIX)
+    return rest if sep else url.lstrip("/")
+
+
+class ImageStore:
+    def __init__(self, backend, index, legacy_base: str, legacy_dirs: Dict[str, str], cache_size: int = 65536,
+                 download_mode: str = "proxy", presign_expires: int = 3600, miss_ttl: float = 5.0):
+        self.backend = backend  # services.object_storage.LocalBackend / S3Backend
+        self.index = index  # pymongo Collection
+        self.legacy_base = legacy_base
+        self.legacy_dirs = legacy_dirs
+        self.cache_size = cache_size
+        self.download_mode = download_mode
+        self.presign_expires = presign_expires
+        self.miss_ttl = miss_ttl
+        self._cache: "OrderedDict[str, str]" = OrderedDict()  # 키 → blob 키
+        self._misses: "OrderedDict[str, float]" = OrderedDict()  # 인덱스에 없던 키 → 확인 시각 (monotonic)
+        self._lock = threading.Lock()
+
+    # ── 경로 ───────────────────────────────────────────────────────────────────
+    @staticmethod
+    def blob_key(sha256: str, ext: str) -> str:
+        return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+    def _legacy_path(self, key: str) -> Optional[str]:
+        kind, _, name = key.partition("/")
+        folder = self.legacy_dirs.get(kind)
+        if folder is not None:
+            return safe_join(folder, name)
+        return safe_join(self.legacy_base, key)
+
+    # ── 조회 ───────────────────────────────────────────────────────────────────
+    def _remember(self, key: str, blob_key: str):
+        with self._lock:
+            self._misses.pop(key, None)
+            self._cache[key] = blob_key
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _remember_miss(self, key: str):
+        if self.miss_ttl <= 0:
+            return
+        with self._lock:
+            self._misses[key] = time.monotonic()
+            self._misses.move_to_end(key)
+            while len(self._misses) > self.cache_size:
+                self._misses.popitem(last=False)
+
+    def _recent_miss(self, key: str) -> bool:
+        """miss_ttl 초 안에 인덱스에 없다고 확인한 키인지 (self._lock 안에서 호출)."""
+        checked = self._misses.get(key)
+        if checked is None:
+            return False
+        if time.monotonic() - checked < self.miss_ttl:
+            return True
+        del self._misses[key]
+        return False
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._cache.pop(key, None)
+            self._misses.pop(key, None)
+
+    def _blob_for(self, key: str) -> Optional[str]:
+        """인덱스에서 키의 blob 키 (없으면 None)."""
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+            missing = hit is None and self._recent_miss(key)
+        if hit is not None:
+            CACHE_HITS.labels(cache="image_index").inc()
+            return hit
+        if missing:
+            CACHE_HITS.labels(cache="image_index_miss").inc()
+            return None
+        CACHE_MISSES.labels(cache="image_index").inc()
+
+        with stage_timer("image_index_lookup"):
+            doc = self.index.find_one({"_id": key}, {"sha256": 1, "ext": 1})
+        if doc is None:
+            self._remember_miss(key)
+            return None
+        blob_key = self.blob_key(doc["sha256"], doc["ext"])
+        self._remember(key, blob_key)
+        return blob_key
+
+    def _legacy_file(self, key: str) -> Optional[str]:
+        # 아직 이전되지 않은 파일 (캐시하지 않음: 이전되면 위치가 바뀜)
+        legacy = self._legacy_path(key)
+        return legacy if legacy is not None and os.path.isfile(legacy) else None
+
+    def path(self, key: str) -> Optional[str]:
+        """키의 로컬 파일 경로 (s3 는 읽기 캐시). 저장소/기존 폴더 어디에도 없으면 None."""
+        blob_key = self._blob_for(key)
+        if blob_key is not None:
+            path = self.backend.local_path(blob_key)
+            if path is not None:
+                return path
+            # 다른 프로세스(services/retention)가 blob 을 바꾸거나 지움 → 캐시를 버리고 인덱스를 다시 조회
+            self._forget(key)
+            blob_key = self._blob_for(key)
+            if blob_key is not None:
+                return self.backend.local_path(blob_key)
+        return self._legacy_file(key)
+
+    def url(self, key: str) -> Optional[str]:
+        """presign 된 다운로드 URL. IMAGE_DOWNLOAD_MODE=proxy 이거나 백엔드가 지원하지 않으면 None (앱이 직접 제공)."""
+        if self.download_mode != "presign":
+            return None
+        blob_key = self._blob_for(key)
+        return self.backend.presigned_url(blob_key, self.presign_expires) if blob_key is not None else None
+
+    def exists(self, key: str) -> bool:
+        """인덱스 기준 존재 여부 (s3 에서도 내려받지 않음)."""
+        return self._blob_for(key) is not None or self._legacy_file(key) is not None
+
+    def open(self, key: str) -> BinaryIO:
+        """스트리밍 읽기."""
+        blob_key = self._blob_for(key)
+        if blob_key is not None:
+            try:
+                return self.backend.open(blob_key)
+            except FileNotFoundError:
+                self._forget(key)  # path() 와 같은 이유로 한 번 다시 조회
+                blob_key = self._blob_for(key)
+                if blob_key is not None:
+                    return self.backend.open(blob_key)
+        legacy = self._legacy_file(key)
+        if legacy is None:
+            raise FileNotFoundError(key)
+        return open(legacy, "rb")
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    # ── 저장 ───────────────────────────────────────────────────────────────────
+    def _index_put(self, key: str, sha256: str, ext: str, size: int):
+        self.index.update_one(
+            {"_id": key},
+            {"$set": {"sha256": sha256, "ext": ext, "size": size},
+             "$setOnInsert": {"created_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        self._remember(key, self.blob_key(sha256, ext))
+
+    def put_bytes(self, key: str, data: bytes, sha256: Optional[str] = None, ext: Optional[str] = None) -> str:
+        """바이트를 저장하고 인덱스에 기록합니다. sha256 을 이미 알면(업로드 수신 단계) 다시 계산하지 않습니다.
+        ext 는 blob 확장자(응답 Content-Type)로, 기본은 키의 확장자입니다 (재압축된 원본은 .webp)."""
+        sha256 = sha256 or hashlib.sha256(data).hexdigest()
+        ext = ext or os.path.splitext(key)[1].lower()
+        blob_key = self.blob_key(sha256, ext)
+        with stage_timer("image_store_put"):
+            if not self.backend.exists(blob_key):  # 같은 내용이 이미 있으면 쓰지 않음
+                self.backend.put_stream(blob_key, io.BytesIO(data))
+            self._index_put(key, sha256, ext, len(data))
+        return blob_key
+
+    def put_image(self, key: str, image, fmt: str) -> str:
+        """PIL 이미지를 overlay_format 으로 인코딩해 저장합니다."""
+        from services import overlay_format
+        return self.put_bytes(key, overlay_format.encode(image, fmt))
+
+    # ── 삭제 ───────────────────────────────────────────────────────────────────
+    def release_blob(self, sha256: str, ext: str, size: int = 0) -> int:
+        """어떤 키도 가리키지 않는 blob 을 지웁니다. 지웠으면 size(인덱스의 크기), 중복 제거로 공유 중이면 0."""
+        if self.index.find_one({"sha256": sha256, "ext": ext}, {"_id": 1}) is not None:
+            return 0
+        self.backend.delete(self.blob_key(sha256, ext))
+        return size
+
+    def remove(self, key: str) -> int:
+        """키를 인덱스에서 지우고, 더 이상 쓰이지 않는 blob 도 지웁니다. 지운 바이트 수."""
+        doc = self.index.find_one_and_delete({"_id": key}, projection={"sha256": 1, "ext": 1, "size": 1})
+        self._forget(key)
+        if doc is None:
+            return 0
+        return self.release_blob(doc["sha256"], doc["ext"], doc.get("size", 0))
+
+    # ── 마이그레이션 ───────────────────────────────────────────────────────────
+    def migrate(self, kinds: Optional[Iterable[str]] = None, remove_legacy: bool = False,
+                dry_run: bool = False) -> Dict[str, int]:
+        """기존 평평한 폴더의 파일을 저장소로 옮기고 인덱스에 기록합니다. 여러 번 실행해도 안전합니다."""
+        from pymongo import UpdateOne
+
+        stats = {"migrated": 0, "skipped": 0, "removed": 0, "bytes": 0}
+        batch, done = [], []
+
+        def flush():
+            if batch and not dry_run:
+                self.index.bulk_write(batch, ordered=False)
+            # 인덱스 기록이 끝난 뒤에만 원래 파일 삭제 (백엔드에 blob 이 있는지 다시 확인)
+            for legacy, blob_key in done:
+                if remove_legacy and not dry_run and self.backend.exists(blob_key):
+                    os.remove(legacy)
+                    stats["removed"] += 1
+            batch.clear()
+            done.clear()
+
+        for kind in kinds or self.legacy_dirs:
+            folder = self.legacy_dirs[kind]
+            if not os.path.isdir(folder):
+                continue
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if not entry.is_file() or entry.name.endswith(".tmp"):
+                        continue
+                    key = f"{kind}/{entry.name}"
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    doc = self.index.find_one({"_id": key}, {"sha256": 1, "ext": 1})
+                    if doc is not None:
+                        stats["skipped"] += 1
+                        done.append((entry.path, self.blob_key(doc["sha256"], doc["ext"])))
+                        continue
+
+                    digest = hashlib.sha256()
+                    with open(entry.path, "rb") as f:
+                        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                            digest.update(chunk)
+                    sha256 = digest.hexdigest()
+                    size = entry.stat().st_size
+                    blob_key = self.blob_key(sha256, ext)
+                    if not dry_run and not self.backend.exists(blob_key):
+                        # local: 같은 파일시스템이면 하드링크, s3: 스트리밍 업로드
+                        self.backend.put_path(blob_key, entry.path)
+                    batch.append(UpdateOne(
+                        {"_id": key},
+                        {"$set": {"sha256": sha256, "ext": ext, "size": size},
+                         "$setOnInsert": {"created_at": datetime.utcfromtimestamp(entry.stat().st_mtime)}},
+                        upsert=True,
+                    ))
+                    done.append((entry.path, blob_key))
+                    stats["migrated"] += 1
+                    stats["bytes"] += size
+                    if len(batch) >= MIGRATE_BATCH:
+                        flush()
+                        logger.info(f"이미지 저장소 이전 중: {stats}")
+        flush()
+        return stats
+
+
+def _legacy_dirs(config) -> Dict[str, str]:
+    return {kind: config[key] for kind, key in KIND_FOLDERS.items()}
+
+
+def create_store(config, index) -> ImageStore:
+    return ImageStore(
+        create_backend(config),
+        index,
+        legacy_base=config["IMAGE_BASE_DIR"],
+        legacy_dirs=_legacy_dirs(config),
+        cache_size=config["IMAGE_INDEX_CACHE_SIZE"],
+        download_mode=config["IMAGE_DOWNLOAD_MODE"],
+        presign_expires=config["IMAGE_PRESIGN_EXPIRES"],
+        miss_ttl=config["IMAGE_INDEX_MISS_TTL"],
+    )
+
+
+def init_app(app, mongo_client) -> ImageStore:
+    if app.config["IMAGE_DOWNLOAD_MODE"] not in DOWNLOAD_MODES:
+        raise ValueError(f"IMAGE_DOWNLOAD_MODE 는 {DOWNLOAD_MODES} 중 하나여야 합니다: {app.config['IMAGE_DOWNLOAD_MODE']}")
+    store = create_store(app.config, mongo_client.get_collection(app.config["IMAGE_INDEX_COLLECTION"]))
+    app.extensions["image_store"] = store
+    return store
+
+
+def check(backend) -> None:
+    """백엔드에 임시 blob 을 쓰고 (스트리밍) 읽고 지워 봅니다 (MinIO/S3 설정 확인용)."""
+    data = os.urandom(256 * 1024)
+    blob_key = f"_check/{hashlib.sha256(data).hexdigest()}.bin"
+    backend.put_stream(blob_key, io.BytesIO(data))
+    try:
+        assert backend.exists(blob_key), "쓴 blob 이 보이지 않습니다"
+        with backend.open(blob_key) as f:
+            assert f.read() == data, "읽은 내용이 다릅니다"
+        path = backend.local_path(blob_key)
+        with open(path, "rb") as f:
+            assert f.read() == data, "로컬 경로(읽기 캐시) 내용이 다릅니다"
+        print(f"{backend.name}: 쓰기/읽기/로컬 경로 확인 완료 ({path})")
+        url = backend.presigned_url(blob_key, 60)
+        if url:
+            print(f"presigned URL: {url}")
+    finally:
+        backend.delete(blob_key)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="이미지 저장소 관리 (평평한 폴더 이전, 백엔드 확인)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="기존 파일을 저장소로 옮기고 인덱스에 기록")
+    migrate.add_argument("--kinds", default=",".join(KIND_FOLDERS), help="이전할 kind 목록 (쉼표 구분)")
+    migrate.add_argument("--remove-legacy", action="store_true", help="이전이 끝난 원래 파일 삭제")
+    migrate.add_argument("--dry-run", action="store_true", help="파일/인덱스를 바꾸지 않고 대상만 계산")
+    sub.add_parser("check", help="IMAGE_STORAGE_BACKEND 에 쓰기/읽기/삭제가 되는지 확인")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    from config import DevelopmentConfig
+
+    config = {k: getattr(DevelopmentConfig, k) for k in dir(DevelopmentConfig) if k.isupper()}
+    if args.command == "check":
+        check(create_backend(config))
+        return
+
+    from models.model import MongoDBClient
+    client = MongoDBClient.from_config(config)
+    store = create_store(config, client.get_collection(config["IMAGE_INDEX_COLLECTION"]))
+    kinds = [k for k in args.kinds.split(",") if k]
+    unknown = set(kinds) - set(KIND_FOLDERS)
+    if unknown:
+        parser.error(f"알 수 없는 kind: {', '.join(sorted(unknown))}")
+    stats = store.migrate(kinds, remove_legacy=args.remove_legacy, dry_run=args.dry_run)
+    print(f"{'(dry-run) ' if args.dry_run else ''}이전 {stats['migrated']}개 ({stats['bytes'] / (1024 * 1024):.1f}MB), "
+          f"이미 이전됨 {stats['skipped']}개, 원래 파일 삭제 {stats['removed']}개")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
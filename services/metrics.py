@@ -0,0 +1,272 @@
+# services/metrics.py
+"""
+Prometheus 메트릭 정의 및 Flask/SQLAlchemy/PyMongo 연동.
+
+- 히스토그램: 업로드 단계, 모델별 전처리/추론/후처리/오버레이 렌더/PNG 인코딩, MySQL 쿼리, 요청당 SQL 문 수, Mongo 명령,
+  Gemini 호출, 모델 풀 대기
+- 카운터: 탐지 수, 캐시 hit/miss, 오류
+- 게이지: 큐 깊이, 로드된 모델, 모델 풀 크기/사용 중 레플리카, MongoDB 커넥션 풀 (열린/대여 중 연결)
+
+멀티 프로세스(gunicorn 등)로 띄울 때는 PROMETHEUS_MULTIPROC_DIR 환경 변수를 지정하면
+/metrics 가 모든 워커의 값을 합쳐서 보여줍니다.
+"""
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+
+# 모델 추론 ~ Gemini 호출(수 초)까지 한 버킷 세트로 커버
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+# ── 히스토그램 ─────────────────────────────────────────────────────────────────
+STAGE_SECONDS = Histogram(
+    "toothai_stage_seconds", "요청 처리 단계별 소요 시간(초)",
+    ["stage"], buckets=LATENCY_BUCKETS,
+)
+MODEL_STAGE_SECONDS = Histogram(
+    "toothai_model_stage_seconds", "모델별 전처리/추론/후처리/오버레이 렌더/PNG 인코딩 시간(초)",
+    ["model", "phase"], buckets=LATENCY_BUCKETS,
+)
+MYSQL_QUERY_SECONDS = Histogram(
+    "toothai_mysql_query_seconds", "MySQL 쿼리 실행 시간(초)",
+    ["operation"], buckets=LATENCY_BUCKETS,
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "toothai_mongo_command_seconds", "MongoDB 명령 실행 시간(초)",
+    ["command"], buckets=LATENCY_BUCKETS,
+)
+GEMINI_SECONDS = Histogram(
+    "toothai_gemini_call_seconds", "Gemini API 호출 시간(초)",
+    ["route"], buckets=LATENCY_BUCKETS,
+)
+MODEL_POOL_WAIT_SECONDS = Histogram(
+    "toothai_model_pool_wait_seconds", "모델 레플리카를 빌리기까지 대기한 시간(초)",
+    ["model"], buckets=LATENCY_BUCKETS,
+)
+MONGO_POOL_WAIT_SECONDS = Histogram(
+    "toothai_mongo_pool_wait_seconds", "MongoDB 커넥션 풀에서 연결을 빌리기까지 대기한 시간(초)",
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "toothai_http_request_seconds", "HTTP 요청 처리 시간(초)",
+    ["endpoint", "method", "status"], buckets=LATENCY_BUCKETS,
+)
+# 요청당 SQL 문 수: 목록 API 에서 행 수만큼 늘면 N+1 조회
+SQL_STATEMENTS_PER_REQUEST = Histogram(
+    "toothai_sql_statements_per_request", "HTTP 요청 하나가 실행한 SQL 문 수",
+    ["endpoint"], buckets=STATEMENT_BUCKETS,
+)
+
+# ── 카운터 ─────────────────────────────────────────────────────────────────────
+DETECTIONS = Counter("toothai_detections_total", "모델별/라벨별 탐지 수", ["model", "label"])
+CACHE_HITS = Counter("toothai_cache_hits_total", "캐시 hit 수", ["cache"])
+CACHE_MISSES = Counter("toothai_cache_misses_total", "캐시 miss 수", ["cache"])
+ERRORS = Counter("toothai_errors_total", "단계별 오류 수", ["stage"])
+# 사용률 = rate(busy_seconds) / pool_size
+MODEL_POOL_BUSY_SECONDS = Counter("toothai_model_pool_busy_seconds_total", "레플리카가 대여된 누적 시간(초)", ["model"])
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "toothai_mongo_pool_checkout_failures_total", "MongoDB 커넥션 대여 실패 수 (timeout = 풀 고갈)", ["reason"],
+)
+MONGO_POOL_CONNECTIONS_CREATED = Counter("toothai_mongo_pool_connections_created_total", "새로 연 MongoDB 연결 수")
+MODEL_POOL_TIMEOUTS = Counter("toothai_model_pool_timeouts_total", "레플리카 대기 시간 초과 수", ["model"])
+WRITE_BEHIND_DEAD_LETTERS = Counter(
+    "toothai_write_behind_dead_letters_total", "재시도 끝에 저장하지 못해 dead-letter 저널로 옮긴 write-behind 작업 수",
+)
+
+# ── 게이지 ─────────────────────────────────────────────────────────────────────
+QUEUE_DEPTH = Gauge("toothai_queue_depth", "대기/처리 중인 작업 수", ["queue"], multiprocess_mode="livesum")
+LOADED_MODELS = Gauge("toothai_loaded_models", "메모리에 로드된 모델 (1=로드됨)", ["model"], multiprocess_mode="livemax")
+MODEL_POOL_SIZE = Gauge("toothai_model_pool_size", "모델별 레플리카 수", ["model"], multiprocess_mode="livesum")
+MODEL_POOL_IN_USE = Gauge("toothai_model_pool_in_use", "대여 중인 레플리카 수", ["model"], multiprocess_mode="livesum")
+MONGO_POOL_OPEN = Gauge("toothai_mongo_pool_connections", "열려 있는 MongoDB 연결 수", multiprocess_mode="livesum")
+MONGO_POOL_IN_USE = Gauge("toothai_mongo_pool_in_use", "대여 중인 MongoDB 연결 수", multiprocess_mode="livesum")
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """요청 처리 단계 시간을 기록하고, 예외가 나면 오류 카운터도 올립니다."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.labels(stage=stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def model_phase(model: str, phase: str):
+    """모델별 단계(preprocess / infer / postprocess / overlay_render / png_encode) 시간 기록."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.labels(stage=f"{model}_{phase}").inc()
+        raise
+    finally:
+        MODEL_STAGE_SECONDS.labels(model=model, phase=phase).observe(time.perf_counter() - start)
+
+
+def observe_ultralytics_speed(model: str, result):
+    """ultralytics Results.speed(ms) 의 preprocess/inference/postprocess 값을 그대로 기록합니다."""
+    speed = getattr(result, "speed", None) or {}
+    for key, phase in (("preprocess", "preprocess"), ("inference", "infer"), ("postprocess", "postprocess")):
+        if speed.get(key) is not None:
+            MODEL_STAGE_SECONDS.labels(model=model, phase=phase).observe(speed[key] / 1000.0)
+
+
+def count_detections(model: str, labels):
+    for label in labels:
+        DETECTIONS.labels(model=model, label=label).inc()
+
+
+def mark_model_loaded(model: str, loaded: bool = True):
+    LOADED_MODELS.labels(model=model).set(1 if loaded else 0)
+
+
+# ── PyMongo 명령 리스너 ────────────────────────────────────────────────────────
+try:
+    from pymongo import monitoring
+
+    class MongoCommandMetrics(monitoring.CommandListener):
+        """MongoClient(event_listeners=[...]) 로 등록해 모든 명령 시간을 기록합니다."""
+
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            MONGO_COMMAND_SECONDS.labels(command=event.command_name).observe(event.duration_micros / 1e6)
+
+        def failed(self, event):
+            MONGO_COMMAND_SECONDS.labels(command=event.command_name).observe(event.duration_micros / 1e6)
+            ERRORS.labels(stage=f"mongo_{event.command_name}").inc()
+
+    class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+        """커넥션 풀 이벤트 → 열린/대여 중 연결 수, 대여 대기 시간, 대여 실패."""
+
+        def __init__(self):
+            self._local = threading.local()
+
+        def pool_created(self, event):
+            pass
+
+        def pool_ready(self, event):
+            pass
+
+        def pool_cleared(self, event):
+            pass
+
+        def pool_closed(self, event):
+            pass
+
+        def connection_created(self, event):
+            MONGO_POOL_OPEN.inc()
+            MONGO_POOL_CONNECTIONS_CREATED.inc()
+
+        def connection_ready(self, event):
+            pass
+
+        def connection_closed(self, event):
+            MONGO_POOL_OPEN.dec()
+
+        def connection_check_out_started(self, event):
+            self._local.start = time.perf_counter()
+
+        def connection_check_out_failed(self, event):
+            self._local.start = None
+            MONGO_POOL_CHECKOUT_FAILURES.labels(reason=str(event.reason)).inc()
+
+        def connection_checked_out(self, event):
+            start = getattr(self._local, "start", None)
+            if start is not None:
+                MONGO_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+                self._local.start = None
+            MONGO_POOL_IN_USE.inc()
+
+        def connection_checked_in(self, event):
+            MONGO_POOL_IN_USE.dec()
+except ImportError:  # pragma: no cover - pymongo 는 requirements 에 포함
+    MongoCommandMetrics = None
+    MongoPoolMetrics = None
+
+
+def reset_mongo_pool_metrics():
+    """fork 된 자식 프로세스는 부모의 연결을 쓰지 않으므로 풀 게이지를 0 으로 (MongoDBClient._after_fork)."""
+    MONGO_POOL_OPEN.set(0)
+    MONGO_POOL_IN_USE.set(0)
+
+
+# ── SQLAlchemy 쿼리 리스너 ─────────────────────────────────────────────────────
+def _install_sql_listeners(engine):
+    from flask import g, has_request_context
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("toothai_query_start", []).append(time.perf_counter())
+        if has_request_context():
+            g._metrics_sql_statements = g.get("_metrics_sql_statements", 0) + 1
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("toothai_query_start")
+        if not starts:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else "UNKNOWN"
+        MYSQL_QUERY_SECONDS.labels(operation=operation).observe(time.perf_counter() - starts.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(exception_context):
+        starts = exception_context.connection.info.get("toothai_query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+        ERRORS.labels(stage="mysql").inc()
+
+
+def _registry():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_latest():
+    """(본문, content-type) 반환 — /metrics 라우트에서 사용."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def init_app(app, db=None):
+    """HTTP 요청 시간 기록 훅과 SQLAlchemy 쿼리 리스너를 등록합니다."""
+    from flask import g, request
+
+    @app.before_request
+    def _metrics_start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _metrics_observe_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None and request.endpoint != "metrics.metrics":
+            HTTP_REQUEST_SECONDS.labels(
+                endpoint=request.endpoint or "unmatched",
+                method=request.method,
+                status=str(response.status_code),
+            ).observe(time.perf_counter() - start)
+            SQL_STATEMENTS_PER_REQUEST.labels(endpoint=request.endpoint or "unmatched").observe(
+                g.pop("_metrics_sql_statements", 0)
+            )
+            if response.status_code >= 500:
+                ERRORS.labels(stage=f"http_{request.endpoint or 'unmatched'}").inc()
+        return response
+
+    if db is not None:
+        with app.app_context():
+            _install_sql_listeners(db.engine)
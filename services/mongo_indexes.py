@@ -0,0 +1,196 @@
+# services/mongo_indexes.py
+"""
+MongoDB 인덱스 관리 (시작 시 생성 + 실행 계획 확인).
+
+inference_results 는 user_id 로 목록 조회(inference_routes, chatbot_routes, chatbot_routes_medgemma, timestamp 정렬),
+user_id + original_image_path 로 단건 조회(role D, consult 의 video_type_ratio),
+original_image_path 만으로 조회(overlay_render, retention) 합니다. 필요한 인덱스를 INDEXES 에 선언하고
+MONGO_ENSURE_INDEXES=1 (기본) 이면 시작 시 만듭니다 (이미 있으면 아무것도 하지 않음).
+
+- (user_id, timestamp desc, _id desc) : 환자 목록 + 최신순 정렬, 기록 페이지 커서 (정렬 단계 없이 인덱스 순서로 읽음)
+- (original_image_path, user_id)      : 경로 단건 조회, user_id 를 함께 주는 조회도 같은 인덱스로 처리
+- image_index (sha256, ext)           : ImageStore.release_blob 의 blob 공유 여부 조회
+
+QUERIES 는 운영 코드의 조회 형태입니다. verify 는 각 조회의 explain() 결과에 COLLSCAN 이나 메모리 정렬(SORT)이 있으면
+실패로 봅니다.
+새 조회를 추가하면 QUERIES 에도 추가하고 `verify --seed` 로 확인합니다.
+
+    python -m services.mongo_indexes ensure
+    python -m services.mongo_indexes verify              # 운영 컬렉션에서 실행 계획 확인
+    python -m services.mongo_indexes verify --seed 2000  # 임시 DB 에 문서를 채운 뒤 확인하고 지움 (배포 전 점검)
+"""
+import sys
+import json
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from services.pagination import HISTORY_SORT, history_filter
+
+logger = logging.getLogger(__name__)
+
+# 컬렉션 → 인덱스 (설정 키로 이름이 바뀌는 컬렉션은 _collections 에서 연결)
+INDEXES: Dict[str, List[IndexModel]] = {
+    "inference_results": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)], name="user_id_timestamp_id"),
+        IndexModel([("original_image_path", ASCENDING), ("user_id", ASCENDING)], name="original_image_path_user_id"),
+    ],
+    "image_index": [
+        IndexModel([("sha256", ASCENDING), ("ext", ASCENDING)], name="sha256_ext"),
+    ],
+}
+
+# 이름 → (컬렉션, filter, sort)
+QUERIES: Dict[str, Tuple[str, Dict, List]] = {
+    "patient_history": ("inference_results", {"user_id": "1"}, [("timestamp", DESCENDING)]),
+    "patient_history_unsorted": ("inference_results", {"user_id": "1"}, []),
+    "patient_history_page": (
+        "inference_results",
+        history_filter({"user_id": "1"}, [datetime(2025, 1, 1), ObjectId("0" * 24)]),
+        HISTORY_SORT,
+    ),
+    "doctor_result": ("inference_results", {"user_id": "1", "original_image_path": "/images/original/a.png"}, []),
+    "overlay_document": ("inference_results", {"original_image_path": "/images/original/a.png"}, []),
+    "blob_shared": ("image_index", {"sha256": "0" * 64, "ext": ".png"}, []),
+}
+
+
+def _collections(config) -> Dict[str, List[str]]:
+    """INDEXES 키 → 실제 컬렉션 이름. consult 의 video_type_ratio 는 MONGO_COLLECTION 을 같은 형태로 조회."""
+    names = {"inference_results": ["inference_results"], "image_index": [config["IMAGE_INDEX_COLLECTION"]]}
+    consult = config.get("MONGO_COLLECTION")
+    if consult and consult != "inference_results":
+        names["inference_results"].append(consult)
+    return names
+
+
+def ensure_indexes(mongo_client, config) -> Dict[str, List[str]]:
+    """INDEXES 를 만듭니다. 반환: 컬렉션 → 만든(또는 이미 있던) 인덱스 이름."""
+    created = {}
+    for spec, names in _collections(config).items():
+        for name in names:
+            collection = mongo_client.get_collection(name)
+            try:
+                created[name] = collection.create_indexes(INDEXES[spec])
+            except OperationFailure as e:
+                # 같은 키의 인덱스가 다른 이름/옵션으로 이미 있음 → 그대로 두고 verify 로 확인
+                logger.warning(f"'{name}' 인덱스 생성 건너뜀: {e}")
+                created[name] = []
+    return created
+
+
+def _stages(plan) -> Iterator[str]:
+    """explain 결과의 실행 계획 트리에서 stage 이름을 모두 꺼냅니다 (inputStage/inputStages/queryPlan 중첩)."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+def explain_queries(mongo_client, config) -> Dict[str, List[str]]:
+    """QUERIES 각각의 선택된 실행 계획 stage 목록."""
+    names = _collections(config)
+    plans = {}
+    for query, (spec, flt, sort) in QUERIES.items():
+        cursor = mongo_client.get_collection(names[spec][0]).find(flt)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        plans[query] = list(_stages(plan))
+    return plans
+
+
+def verify(plans: Dict[str, List[str]]) -> List[str]:
+    """explain_queries 결과 중 COLLSCAN(또는 정렬을 메모리에서 하는 SORT)으로 실행되는 조회 이름. 비어 있으면 통과."""
+    failed = []
+    for query, stages in plans.items():
+        if "COLLSCAN" in stages or "SORT" in stages:
+            logger.warning(f"인덱스를 쓰지 않는 조회: {query} ({' → '.join(stages)})")
+            failed.append(query)
+    return failed
+
+
+def seed(mongo_client, config, count: int):
+    """실행 계획 확인용 문서 (환자 수십 명, 환자별 여러 기록)."""
+    names = _collections(config)
+    now = datetime.utcnow()
+    results = [
+        {
+            "user_id": str(i % 50),
+            "original_image_path": f"/images/original/{i:08d}.png",
+            "timestamp": now - timedelta(minutes=i),
+            "image_type": "normal",
+        }
+        for i in range(count)
+    ]
+    for name in names["inference_results"]:
+        mongo_client.get_collection(name).insert_many([dict(doc) for doc in results])
+    mongo_client.get_collection(names["image_index"][0]).insert_many([
+        {"_id": f"original/{i:08d}.png", "sha256": f"{i:064x}", "ext": ".png", "size": 0, "created_at": now}
+        for i in range(count)
+    ])
+
+
+def init_app(app, mongo_client):
+    if not app.config["MONGO_ENSURE_INDEXES"]:
+        return
+    ensure_indexes(mongo_client, app.config)
+    if app.config["MONGO_VERIFY_INDEXES"]:
+        verify(explain_queries(mongo_client, app.config))  # 인덱스를 쓰지 않는 조회는 경고 로그
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MongoDB 인덱스 생성 및 실행 계획 확인")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("ensure", help="INDEXES 에 선언한 인덱스 생성")
+    check = sub.add_parser("verify", help="운영 조회(QUERIES)가 COLLSCAN 없이 실행되는지 explain() 으로 확인")
+    check.add_argument("--seed", type=int, default=0,
+                       help="임시 DB(<MONGO_DB_NAME>_index_check)에 문서 N개를 넣고 인덱스를 만든 뒤 확인하고 지움")
+    check.add_argument("--json", action="store_true", help="조회별 실행 계획을 JSON 으로 출력")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    from config import DevelopmentConfig
+    from models.model import MongoDBClient
+
+    config = {k: getattr(DevelopmentConfig, k) for k in dir(DevelopmentConfig) if k.isupper()}
+    scratch = args.command == "verify" and args.seed > 0
+    if scratch:
+        config["MONGO_DB_NAME"] = f"{config['MONGO_DB_NAME']}_index_check"
+    client = MongoDBClient.from_config(config)
+    try:
+        if args.command == "ensure":
+            for name, indexes in ensure_indexes(client, config).items():
+                print(f"{name}: {', '.join(indexes) or '(건너뜀)'}")
+            return
+
+        if scratch:
+            client.client.drop_database(config["MONGO_DB_NAME"])
+            seed(client, config, args.seed)
+            ensure_indexes(client, config)
+        plans = explain_queries(client, config)
+        failed = verify(plans)
+        if args.json:
+            print(json.dumps({"plans": plans, "failed": failed}, ensure_ascii=False))
+        else:
+            for query, stages in plans.items():
+                print(f"{'FAIL' if query in failed else 'ok  '} {query}: {' → '.join(stages)}")
+    finally:
+        if scratch:
+            client.client.drop_database(config["MONGO_DB_NAME"])
+        client.close()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# services/object_storage.py
+"""
+이미지 저장소 백엔드 (services/image_store 의 blob 저장 위치).
+
+- local : IMAGE_STORE_DIR 아래 파일 (단일 노드, 기존 동작)
+- s3    : S3 호환 오브젝트 스토리지 (AWS S3, MinIO 등). 여러 API 노드가 같은 버킷을 공유
+          IMAGE_S3_ENDPOINT_URL 로 MinIO 를 가리키면 로컬에서 그대로 시험할 수 있습니다.
+
+blob 키는 내용 해시("ab/cd/<sha256>.png")이므로 한 번 쓰면 바뀌지 않습니다.
+그래서 s3 백엔드의 로컬 읽기 캐시(IMAGE_STORE_CACHE_DIR)는 무효화 없이 크기 상한만 지키면 됩니다
+(넘으면 마지막 접근이 오래된 것부터 삭제). 썸네일 생성, 추론 재생처럼 파일 경로가 필요한 곳은 이 캐시를 씁니다.
+
+boto3 는 s3 백엔드를 쓸 때만 import 합니다.
+"""
+import os
+import shutil
+import logging
+import mimetypes
+import threading
+from typing import BinaryIO, Optional
+
+from services.disk_cache import DiskLRU
+from services.metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("local", "s3")
+CHUNK = 1024 * 1024
+
+
+def _content_type(blob_key: str) -> str:
+    return mimetypes.guess_type(blob_key)[0] or "application/octet-stream"
+
+
+def _copy_to(path: str, stream: BinaryIO):
+    """스트림을 임시 파일에 청크 단위로 쓴 뒤 rename (읽는 쪽은 완성된 파일만 봄)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        shutil.copyfileobj(stream, f, CHUNK)
+    os.replace(tmp, path)
+
+
+class LocalBackend:
+    """로컬 디스크. local_path 가 곧 저장 위치이므로 읽기 캐시가 필요 없습니다."""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, blob_key: str) -> str:
+        return os.path.join(self.root, *blob_key.split("/"))
+
+    def exists(self, blob_key: str) -> bool:
+        return os.path.exists(self._path(blob_key))
+
+    def put_stream(self, blob_key: str, stream: BinaryIO):
+        _copy_to(self._path(blob_key), stream)
+
+    def put_path(self, blob_key: str, source: str):
+        """기존 파일을 가져옵니다 (같은 파일시스템이면 하드링크, 아니면 복사)."""
+        path = self._path(blob_key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.link(source, tmp)
+        except OSError:
+            shutil.copyfile(source, tmp)
+        os.replace(tmp, path)
+
+    def open(self, blob_key: str) -> BinaryIO:
+        return open(self._path(blob_key), "rb")
+
+    def local_path(self, blob_key: str) -> Optional[str]:
+        path = self._path(blob_key)
+        return path if os.path.exists(path) else None
+
+    def presigned_url(self, blob_key: str, expires: int) -> Optional[str]:
+        return None  # 항상 앱(또는 X-Accel-Redirect)이 직접 제공
+
+    def delete(self, blob_key: str):
+        try:
+            os.remove(self._path(blob_key))
+        except FileNotFoundError:
+            pass
+
+
+class S3Backend:
+    """S3 호환 스토리지 + 로컬 읽기 캐시."""
+
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, cache_dir: str = "", cache_max_bytes: int = 0,
+                 cache_control: Optional[str] = None):
+        import boto3
+        from botocore.config import Config
+
+        if not bucket:
+            raise ValueError("IMAGE_STORAGE_BACKEND=s3 에는 IMAGE_S3_BUCKET 이 필요합니다.")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.cache_control = cache_control
+        # 자격 증명은 boto3 기본 체인 (AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY 환경 변수, 프로파일, IAM 역할)
+        self.client = boto3.client(
+            "s3", endpoint_url=endpoint_url or None, region_name=region or None,
+            config=Config(s3={"addressing_style": "path"} if endpoint_url else {},
+                          retries={"max_attempts": 5, "mode": "standard"}),
+        )
+        self.cache = DiskLRU(cache_dir, cache_max_bytes, name="object_storage")
+
+    def _object_key(self, blob_key: str) -> str:
+        return f"{self.prefix}/{blob_key}" if self.prefix else blob_key
+
+    def _cache_path(self, blob_key: str) -> str:
+        return os.path.join(self.cache.directory, *blob_key.split("/"))
+
+    def exists(self, blob_key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(blob_key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_stream(self, blob_key: str, stream: BinaryIO):
+        # upload_fileobj 는 큰 파일을 멀티파트로 나눠 스트리밍 업로드
+        extra = {"ContentType": _content_type(blob_key)}
+        if self.cache_control:
+            extra["CacheControl"] = self.cache_control  # presign 리다이렉트로 받은 클라이언트도 캐시
+        with stage_timer("object_storage_put"):
+            self.client.upload_fileobj(stream, self.bucket, self._object_key(blob_key), ExtraArgs=extra)
+
+    def put_path(self, blob_key: str, source: str):
+        with open(source, "rb") as f:
+            self.put_stream(blob_key, f)
+
+    def open(self, blob_key: str) -> BinaryIO:
+        """스트리밍 읽기 (로컬 캐시에 있으면 캐시 파일)."""
+        cached = self._cache_path(blob_key)
+        if os.path.exists(cached):
+            return open(cached, "rb")
+        return self.client.get_object(Bucket=self.bucket, Key=self._object_key(blob_key))["Body"]
+
+    def local_path(self, blob_key: str) -> Optional[str]:
+        """읽기 캐시 경로 (없으면 내려받음). 오브젝트가 없으면 None."""
+        from botocore.exceptions import ClientError
+
+        def download(tmp: str):
+            with stage_timer("object_storage_get"):
+                body = self.client.get_object(Bucket=self.bucket, Key=self._object_key(blob_key))["Body"]
+                with open(tmp, "wb") as f:
+                    shutil.copyfileobj(body, f, CHUNK)
+
+        try:
+            return self.cache.get_or_create(self._cache_path(blob_key), download)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def presigned_url(self, blob_key: str, expires: int) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": self._object_key(blob_key)}, ExpiresIn=expires,
+        )
+
+    def delete(self, blob_key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(blob_key))
+        self.cache.discard(self._cache_path(blob_key))
+
+
+def create_backend(config):
+    """설정(dict 형태)으로 백엔드를 만듭니다."""
+    backend = config["IMAGE_STORAGE_BACKEND"]
+    if backend == "local":
+        return LocalBackend(config["IMAGE_STORE_DIR"])
+    if backend == "s3":
+        return S3Backend(
+            config["IMAGE_S3_BUCKET"],
+            prefix=config["IMAGE_S3_PREFIX"],
+            endpoint_url=config["IMAGE_S3_ENDPOINT_URL"],
+            region=config["IMAGE_S3_REGION"],
+            cache_dir=config["IMAGE_STORE_CACHE_DIR"],
+            cache_max_bytes=config["IMAGE_STORE_CACHE_MAX_BYTES"],
+            cache_control=f"public, max-age={config['IMAGE_CACHE_MAX_AGE']}, immutable",
+        )
+    raise ValueError(f"IMAGE_STORAGE_BACKEND 는 {BACKENDS} 중 하나여야 합니다: {backend}")
@@ -0,0 +1,107 @@
+# services/overlay_format.py
+"""
+오버레이 이미지 저장 형식 (images/model1..3, xmodel1/2).
+
+- png         : RGBA PNG (기존 방식), OVERLAY_PNG_COMPRESS_LEVEL 로 압축 수준 조절 (0~9, 낮을수록 빠름)
+- png-palette : 색이 256 개 이하이면 팔레트(P) PNG + tRNS 로 저장 (무손실). 질병/위생 오버레이는
+                PALETTE 색(+겹친 영역의 합성색)만 쓰므로 대부분 여기에 해당. 색이 많으면(치아번호 plot,
+                X-ray 박스) png 로 저장
+- webp        : 무손실 WebP (OVERLAY_WEBP_METHOD 0~6 / OVERLAY_WEBP_EFFORT 0~100 로 속도↔크기 조절).
+                파일 확장자가 .webp 가 되며, 기존 .png URL 로 요청해도 static_routes 가 같은 이름의 .webp 를 찾아 제공
+
+형식별 인코딩 시간/크기/디코딩 시간은 benchmarks/bench_overlay_format.py 로 비교합니다.
+"""
+import io
+import os
+from typing import Optional
+
+import numpy as np
+from PIL import Image, features
+
+from services.metrics import stage_timer
+
+FORMATS = ("png", "png-palette", "webp")
+EXTENSIONS = {"png": ".png", "png-palette": ".png", "webp": ".webp"}
+MIMETYPES = {".png": "image/png", ".webp": "image/webp"}
+
+_settings = {
+    "format": "png",
+    "png_compress_level": 6,
+    "webp_method": 4,
+    "webp_effort": 80,
+}
+
+
+def configure(fmt: str, png_compress_level: int = 6, webp_method: int = 4, webp_effort: int = 80):
+    if fmt not in FORMATS:
+        raise ValueError(f"OVERLAY_FORMAT 은 {FORMATS} 중 하나여야 합니다: {fmt}")
+    _settings.update(format=fmt, png_compress_level=png_compress_level,
+                     webp_method=webp_method, webp_effort=webp_effort)
+
+
+def init_app(app):
+    fmt = app.config["OVERLAY_FORMAT"]
+    if fmt == "webp" and not features.check("webp"):
+        app.logger.warning("Pillow 에 WebP 지원이 없어 오버레이를 png-palette 로 저장합니다.")
+        fmt = "png-palette"
+    configure(
+        fmt,
+        png_compress_level=app.config["OVERLAY_PNG_COMPRESS_LEVEL"],
+        webp_method=app.config["OVERLAY_WEBP_METHOD"],
+        webp_effort=app.config["OVERLAY_WEBP_EFFORT"],
+    )
+
+
+def overlay_filename(base_name: str) -> str:
+    """현재 형식에 맞는 오버레이 파일명 (원본과 같은 이름, 확장자만 다름)."""
+    return os.path.splitext(base_name)[0] + EXTENSIONS[_settings["format"]]
+
+
+def format_for(path: str) -> str:
+    """저장 경로 확장자로 형식 결정 (.png 는 현재 설정이 png-palette 면 팔레트 시도)."""
+    if path.lower().endswith(".webp"):
+        return "webp"
+    return "png-palette" if _settings["format"] == "png-palette" else "png"
+
+
+def mimetype_for(path: str) -> str:
+    return MIMETYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+
+
+def to_palette(image: Image.Image) -> Optional[Image.Image]:
+    """색이 256 개 이하이면 같은 색을 그대로 가진 P 모드 이미지 (알파는 tRNS), 아니면 None."""
+    rgba = image if image.mode == "RGBA" else image.convert("RGBA")
+    colors = rgba.getcolors(256)
+    if colors is None:
+        return None
+    table = np.array([color for _, color in colors], dtype=np.uint8)
+    keys = np.ascontiguousarray(table).view(np.uint32).ravel()
+    order = np.argsort(keys)
+    keys, table = keys[order], table[order]
+
+    pixels = np.asarray(rgba).view(np.uint32)[..., 0]
+    indices = np.searchsorted(keys, pixels).astype(np.uint8)
+    palette_img = Image.frombytes("P", rgba.size, indices.tobytes())
+    palette_img.putpalette(table[:, :3].tobytes())
+    if (table[:, 3] != 255).any():
+        palette_img.info["transparency"] = table[:, 3].tobytes()
+    return palette_img
+
+
+def save(image: Image.Image, fp, fmt: str):
+    """fp(경로 또는 파일 객체)에 fmt 형식으로 저장합니다."""
+    with stage_timer(f"overlay_encode_{fmt}"):
+        if fmt == "webp":
+            image.save(fp, format="WEBP", lossless=True,
+                       method=_settings["webp_method"], quality=_settings["webp_effort"])
+            return
+        if fmt == "png-palette":
+            image = to_palette(image) or image
+        image.save(fp, format="PNG", compress_level=_settings["png_compress_level"])
+
+
+def encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    save(image, buffer, fmt)
+    return buffer.getvalue()
+
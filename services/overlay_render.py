@@ -0,0 +1,147 @@
+# services/overlay_render.py
+"""
+오버레이 지연 렌더링.
+
+업로드 때 탐지별 마스크를 RLE(ai_model/rle)로 문서에 함께 저장합니다.
+    model1/model2_inference_result.detections[].mask_rle : 원본 해상도 마스크
+    model3_inference_result.detections[]                   : 치아 탐지 전체 (+ 모델 입력 해상도 mask_rle)
+OVERLAY_RENDER=lazy 면 업로드 때 오버레이를 그리지 않고, eager 면 그려서 저장합니다.
+/images/<kind>/<name> 요청이 저장소에서 파일을 찾지 못하면(지연 렌더링 결과, 또는 services/retention 이 지운 오버레이)
+문서로 오버레이를 그려 OVERLAY_CACHE_DIR 에 저장하고 제공합니다 (크기 상한 OVERLAY_CACHE_MAX_BYTES, services/disk_cache).
+
+- 문서는 원본 경로(/images/original/<같은 이름>.png)로 찾고, 아직 write-behind 중이면 메모리의 문서를 씁니다.
+- model1/2 는 문서만으로, model3 은 원본 이미지를 업로드 때와 같은 방식으로 디코딩해 그립니다 (모델 추론 없음).
+- X-ray 오버레이(xmodel1/2)는 upload_routes 가 등록한 함수로 원본 + 저장된 박스에서 그립니다 (register_renderer).
+- 캐시 키 = 경로 + 저장 형식 + RENDER_VERSION. 그리는 방식이 바뀌면 RENDER_VERSION 을 올립니다.
+  키에 문서가 필요 없으므로 이미 그려 둔 오버레이는 cached() 로 Mongo/저장소 조회 없이 디스크에서 바로 찾습니다.
+"""
+import os
+import hashlib
+from typing import Callable, Dict, Optional
+
+from PIL import Image
+
+from services import overlay_format
+from services.disk_cache import DiskLRU
+from services.image_store import url_key
+from services.metrics import stage_timer
+from services.upload_decode import decode_upload
+
+RENDER_MODES = ("lazy", "eager")
+LAZY_KINDS = ("model1", "model2", "model3")  # mask_rle 를 저장하는 오버레이
+RENDER_VERSION = 1
+
+# 조회 응답/목록에서 제외할 마스크 필드 (find projection)
+MASK_PROJECTION = {f"{kind}_inference_result.detections.mask_rle": 0 for kind in LAZY_KINDS}
+
+
+def without_masks(doc: Dict) -> Dict:
+    """write-behind 대기 중 문서에서 mask_rle 를 뺀 사본 (MASK_PROJECTION 과 같은 결과)."""
+    doc = dict(doc)
+    for kind in LAZY_KINDS:
+        result = doc.get(f"{kind}_inference_result")
+        if isinstance(result, dict) and "detections" in result:
+            doc[f"{kind}_inference_result"] = {
+                **result,
+                "detections": [{k: v for k, v in det.items() if k != "mask_rle"} for det in result["detections"]],
+            }
+    return doc
+
+
+# kind → 문서의 이미지 경로 필드 (X-ray 문서는 model1/model2_image_path 에 xmodel1/2 경로를 저장)
+PATH_FIELDS = {
+    "model1": "model1_image_path",
+    "model2": "model2_image_path",
+    "model3": "model3_image_path",
+    "xmodel1": "model1_image_path",
+    "xmodel2": "model2_image_path",
+}
+
+
+def renderable(doc: Dict, kind: str) -> bool:
+    """문서만으로(모델 추론 없이) kind 오버레이를 다시 그릴 수 있는지."""
+    if kind not in PATH_FIELDS or not doc.get(PATH_FIELDS[kind]):
+        return False  # vector 결과의 model1/2 등 애초에 이미지가 없음
+    if kind.startswith("x"):
+        return doc.get("image_type") == "xray"
+    if kind == "model3":
+        return "detections" in (doc.get("model3_inference_result") or {})
+    return "image_size" in doc  # model1/2: mask_rle 와 함께 저장됨
+
+
+class OverlayRenderer:
+    def __init__(self, mongo_client, store, writer, cache: DiskLRU):
+        self.collection = mongo_client.get_collection("inference_results")
+        self.store = store  # services.image_store.ImageStore (model3 의 원본 이미지)
+        self.writer = writer
+        self.cache = cache
+        self._renderers: Dict[str, Callable] = {}
+
+    def register_renderer(self, kind: str, fn: Callable):
+        """fn(doc, 원본 PIL 이미지) -> PIL 이미지. LAZY_KINDS 외의 오버레이(X-ray)를 그리는 함수."""
+        self._renderers[kind] = fn
+
+    def _document(self, stem: str) -> Optional[Dict]:
+        original = f"/images/original/{stem}.png"
+        if self.writer is not None:
+            pending = self.writer.pending_documents(original_image_path=original)
+            if pending:
+                return pending[0]
+        return self.collection.find_one({"original_image_path": original})
+
+    def _cache_path(self, kind: str, filename: str) -> Optional[str]:
+        """kind/filename 오버레이의 캐시 파일 경로 (그릴 수 없는 kind/확장자면 None)."""
+        ext = os.path.splitext(filename)[1].lower()
+        if kind not in LAZY_KINDS and kind not in self._renderers:
+            return None
+        if ext not in overlay_format.MIMETYPES:
+            return None
+        fmt = overlay_format.format_for(filename)
+        key = hashlib.sha1(f"{kind}/{filename}|{fmt}|{RENDER_VERSION}".encode("utf-8")).hexdigest()
+        return self.cache.path(key, ext)
+
+    def cached(self, kind: str, filename: str) -> Optional[str]:
+        """이미 그려 둔 오버레이 파일 경로 (디스크만 확인, 없으면 None)."""
+        path = self._cache_path(kind, filename)
+        return self.cache.get(path) if path is not None else None
+
+    def path(self, kind: str, filename: str) -> Optional[str]:
+        """렌더링된 오버레이 파일 경로 (문서로 다시 그릴 수 없으면 None)."""
+        path = self._cache_path(kind, filename)
+        if path is None:
+            return None
+        doc = self._document(os.path.splitext(filename)[0])
+        if doc is None or not renderable(doc, kind):
+            return None
+        fmt = overlay_format.format_for(filename)
+        return self.cache.get_or_create(path, lambda tmp: overlay_format.save(self.render(kind, doc), tmp, fmt))
+
+    def _original(self, doc: Dict) -> Image.Image:
+        return decode_upload(self.store.read(url_key(doc["original_image_path"])))
+
+    def render(self, kind: str, doc: Dict) -> Image.Image:
+        with stage_timer("overlay_lazy_render"):
+            if kind in self._renderers:
+                return self._renderers[kind](doc, self._original(doc))
+            detections = doc[f"{kind}_inference_result"]["detections"]
+            if kind == "model1":
+                from ai_model.predictor import compose_overlay
+                return compose_overlay(tuple(doc["image_size"]), detections)
+            if kind == "model2":
+                from ai_model.hygiene_predictor import compose_overlay
+                return compose_overlay(tuple(doc["image_size"]), detections)
+            from ai_model.tooth_number_predictor import render_overlay
+            return render_overlay(self._original(doc), detections)
+
+
+def init_app(app, mongo_client) -> OverlayRenderer:
+    if app.config["OVERLAY_RENDER"] not in RENDER_MODES:
+        raise ValueError(f"OVERLAY_RENDER 는 {RENDER_MODES} 중 하나여야 합니다: {app.config['OVERLAY_RENDER']}")
+    renderer = OverlayRenderer(
+        mongo_client,
+        app.extensions["image_store"],
+        app.extensions.get("write_behind"),
+        DiskLRU(app.config["OVERLAY_CACHE_DIR"], app.config["OVERLAY_CACHE_MAX_BYTES"], name="overlay"),
+    )
+    app.extensions["overlay_renderer"] = renderer
+    return renderer
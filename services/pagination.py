@@ -0,0 +1,91 @@
+# services/pagination.py
+"""
+커서(keyset) 페이지네이션 도우미.
+
+OFFSET 대신 마지막 행의 정렬 키를 커서로 넘겨 다음 페이지를 "그 키 다음부터" 읽습니다.
+기록이 늘어도 페이지마다 인덱스에서 limit + 1 건만 읽습니다 (OFFSET 은 앞 페이지를 모두 건너뛰며 읽음).
+
+- 커서 = 정렬 키 값 목록을 JSON 으로 만든 뒤 base64url (클라이언트는 내용을 해석하지 않고 next_cursor 를 그대로 돌려줌)
+  datetime / ObjectId 는 {"$dt": ...} / {"$oid": ...} 로 보존
+- limit + 1 건을 읽어 다음 페이지가 있는지 판단 (split_page)
+"""
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING
+
+# inference_results 환자 기록: 최신순, 같은 시각이면 _id 역순 (인덱스 user_id_timestamp_id)
+HISTORY_SORT = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+
+
+def page_size(raw: Optional[str], default: int, maximum: int) -> int:
+    if raw is None or raw == "":
+        return default
+    try:
+        size = int(raw)
+    except ValueError:
+        raise ValueError("limit 는 정수여야 합니다.")
+    if size <= 0:
+        raise ValueError("limit 는 1 이상이어야 합니다.")
+    return min(size, maximum)
+
+
+def _pack(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    return value
+
+
+def _unpack(value):
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$oid" in value:
+            return ObjectId(value["$oid"])
+    return value
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([_pack(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(raw: Optional[str], length: int) -> Optional[List]:
+    """encode_cursor 의 역변환. 커서가 없으면 None, 형식이 맞지 않으면 ValueError."""
+    if not raw:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4))
+        values = [_unpack(v) for v in json.loads(data)]
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, InvalidId, TypeError, ValueError):
+        raise ValueError("cursor 형식이 올바르지 않습니다.")
+    if len(values) != length:
+        raise ValueError("cursor 형식이 올바르지 않습니다.")
+    return values
+
+
+def split_page(rows: Sequence, limit: int) -> Tuple[List, bool]:
+    """limit + 1 건 조회 결과 → (이번 페이지, 다음 페이지 있음)."""
+    return list(rows[:limit]), len(rows) > limit
+
+
+def history_filter(base: Dict, after: Optional[List]) -> Dict:
+    """HISTORY_SORT 순서에서 커서 (timestamp, _id) 다음 문서만.
+
+    $or 두 갈래 대신 timestamp <= t 범위 하나로 인덱스를 읽고, 같은 시각의 이미 본 문서만 제외합니다
+    (인덱스 순서 그대로 읽어 정렬 단계 없음)."""
+    if after is None:
+        return dict(base)
+    timestamp, last_id = after
+    return {
+        **base,
+        "timestamp": {"$lte": timestamp},
+        "$nor": [{"timestamp": timestamp, "_id": {"$gte": last_id}}],
+    }
@@ -0,0 +1,168 @@
+# services/profiling.py
+"""
+요청 단위 on-demand 프로파일링.
+
+- 관리자 헤더(X-Profile-Token == PROFILE_ADMIN_TOKEN) 또는 샘플링 비율(PROFILE_SAMPLE_RATE)로 켜집니다.
+- 켜진 요청 하나만 cProfile 로 감싸 logs/profiles/ 에 <request_id>.prof (+ 요약 .txt, 메타 .json) 로 저장합니다.
+- 둘 다 설정되지 않으면 설정값 두 개만 확인하고 바로 원래 뷰를 호출합니다.
+"""
+import os
+import io
+import re
+import json
+import time
+import uuid
+import hmac
+import random
+import pstats
+import cProfile
+import functools
+import threading
+from datetime import datetime
+
+from flask import current_app, request, g
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "..", "logs", "profiles")
+PROFILE_HEADER = "X-Profile-Token"
+REQUEST_ID_HEADER = "X-Request-ID"
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# cProfile 은 (3.12+ 에서는 인터프리터 전체에) 하나만 활성화할 수 있으므로 동시에 한 요청만 프로파일링
+_profile_lock = threading.Lock()
+
+
+def is_admin_request() -> bool:
+    token = current_app.config.get("PROFILE_ADMIN_TOKEN")
+    supplied = request.headers.get(PROFILE_HEADER)
+    return bool(token and supplied and hmac.compare_digest(token, supplied))
+
+
+def _trigger():
+    """프로파일링 사유 ('header' / 'sample') 또는 None."""
+    config = current_app.config
+    if config.get("PROFILE_ADMIN_TOKEN") and PROFILE_HEADER in request.headers:
+        return "header" if is_admin_request() else None
+    rate = config.get("PROFILE_SAMPLE_RATE") or 0.0
+    if rate > 0 and random.random() < rate:
+        return "sample"
+    return None
+
+
+def _request_id() -> str:
+    supplied = request.headers.get(REQUEST_ID_HEADER, "")
+    return supplied if _REQUEST_ID_RE.match(supplied) else uuid.uuid4().hex
+
+
+def _prune(max_files: int):
+    metas = sorted(
+        (f for f in os.listdir(PROFILE_DIR) if f.endswith(".json")),
+        key=lambda f: os.path.getmtime(os.path.join(PROFILE_DIR, f)),
+    )
+    for meta in metas[:max(0, len(metas) - max_files)]:
+        stem = meta[:-len(".json")]
+        for ext in (".json", ".prof", ".txt"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, stem + ext))
+            except FileNotFoundError:
+                pass
+
+
+def _save(profile: cProfile.Profile, name: str, request_id: str, trigger: str, elapsed_ms: int, status):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stem = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{request_id}"
+    profile.dump_stats(os.path.join(PROFILE_DIR, stem + ".prof"))
+
+    summary = io.StringIO()
+    pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(40)
+    with open(os.path.join(PROFILE_DIR, stem + ".txt"), "w", encoding="utf-8") as f:
+        f.write(summary.getvalue())
+
+    meta = {
+        "profile_id": stem,
+        "request_id": request_id,
+        "name": name,
+        "endpoint": request.endpoint,
+        "method": request.method,
+        "path": request.path,
+        "trigger": trigger,
+        "status": status,
+        "elapsed_ms": elapsed_ms,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(PROFILE_DIR, stem + ".json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    _prune(current_app.config.get("PROFILE_MAX_FILES", 200))
+    return stem
+
+
+def profiled(name: str):
+    """뷰 함수 데코레이터. 트리거된 요청만 cProfile 로 감쌉니다."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            trigger = _trigger()
+            if trigger is None or not _profile_lock.acquire(blocking=False):
+                return view(*args, **kwargs)
+
+            request_id = _request_id()
+            g.profile_request_id = request_id
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            response, status = None, None
+            try:
+                profile.enable()
+                try:
+                    response = view(*args, **kwargs)
+                finally:
+                    profile.disable()
+                status = _status_of(response)
+            finally:
+                elapsed_ms = int((time.perf_counter() - start) * 1000)
+                try:
+                    profile_id = _save(profile, name, request_id, trigger, elapsed_ms, status)
+                except Exception as e:
+                    profile_id = None
+                    current_app.logger.warning(f"프로파일 저장 실패: {e}")
+                finally:
+                    _profile_lock.release()
+
+            response = current_app.make_response(response)
+            response.headers[REQUEST_ID_HEADER] = request_id
+            if profile_id:
+                response.headers["X-Profile-Id"] = profile_id
+            return response
+        return wrapper
+    return decorator
+
+
+def _status_of(rv):
+    if isinstance(rv, tuple) and len(rv) > 1 and isinstance(rv[1], int):
+        return rv[1]
+    return getattr(rv, "status_code", 200)
+
+
+def list_profiles(limit: int = 50):
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    metas = sorted(
+        (f for f in os.listdir(PROFILE_DIR) if f.endswith(".json")),
+        key=lambda f: os.path.getmtime(os.path.join(PROFILE_DIR, f)),
+        reverse=True,
+    )[:limit]
+    result = []
+    for meta in metas:
+        try:
+            with open(os.path.join(PROFILE_DIR, meta), encoding="utf-8") as f:
+                result.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return result
+
+
+def profile_file(profile_id: str, ext: str):
+    """profile_id 에 해당하는 파일 경로 (경로 조작 방지를 위해 형식 검증)."""
+    if not re.match(r"^\d{14}_[A-Za-z0-9_-]{1,64}$", profile_id or ""):
+        return None
+    path = os.path.join(PROFILE_DIR, profile_id + ext)
+    return path if os.path.exists(path) else None
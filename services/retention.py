@@ -0,0 +1,272 @@
+# services/retention.py
+"""
+이미지 보존 정책 (주기 작업, cron 등에서 실행).
+
+이미지 저장소는 지우는 경로가 없어 계속 커집니다. 오래된 이미지를 세 단계로 정리합니다.
+
+- side_files : detect_xray / classify_implants_from_xray 가 원본 옆에 남긴 <원본>_detected.png,
+               <원본>_implant_classified.png (아무도 읽지 않음). 꾸미는 원본이 함께 있고 문서가 원본으로
+               쓰지 않는 것만 지웁니다. (기존 폴더, 로컬 저장소, s3 읽기 캐시, migrate 로 들어간 인덱스 키)
+- originals  : RETENTION_ORIGINAL_DAYS 보다 오래된 원본을 손실 WebP(RETENTION_ORIGINAL_QUALITY)로 다시 저장.
+               Image.open 으로 원본 해상도 그대로 열고 EXIF 방향만 적용해 저장하므로 (업로드 디코딩과 같은 좌표계)
+               저장된 탐지 좌표와 크기가 그대로 맞습니다. RETENTION_MIN_SAVING 이상 줄어들 때만 바꿉니다.
+               URL 은 그대로이고 인덱스의 blob 만 바뀝니다 (Content-Type 은 image/webp).
+- overlays   : RETENTION_OVERLAY_DAYS 보다 오래된 저장 오버레이 중 문서로 다시 그릴 수 있는 것
+               (services/overlay_render.renderable + 원본 존재)을 지웁니다. 다시 요청되면 그려서 OVERLAY_CACHE_DIR 에 캐시.
+
+blob 은 중복 제거로 여러 키가 공유할 수 있으므로 더 이상 가리키는 키가 없을 때만 지웁니다 (ImageStore.release_blob).
+다른 워커의 키 → blob 캐시는 blob 이 없으면 인덱스를 다시 조회합니다.
+
+    python -m services.retention --dry-run                 # 지울/줄일 대상과 회수 바이트만 보고
+    python -m services.retention --tiers side_files,overlays
+    python -m services.retention --json                    # 보고서를 JSON 으로 (모니터링 수집용)
+"""
+import io
+import os
+import re
+import json
+import logging
+import argparse
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional
+
+from PIL import Image, ImageOps, features
+
+from services.image_store import ImageStore, create_store
+from services.metrics import stage_timer
+from services.mongo_indexes import ensure_indexes
+from services.overlay_render import renderable
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 동시 실행 방지 없음
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("side_files", "originals", "overlays")
+SIDE_SUFFIXES = ("_detected", "_implant_classified")
+OVERLAY_KINDS = ("model1", "model2", "model3", "xmodel1", "xmodel2")
+# 다시 그릴 수 있는지 판단하는 데 필요한 필드만 (model3 detections 는 존재 여부만)
+RENDER_PROJECTION = {
+    "image_type": 1, "image_size": 1, "model1_image_path": 1, "model2_image_path": 1, "model3_image_path": 1,
+    "model3_inference_result.detections.class_id": 1,
+}
+_BLOB_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+class Retention:
+    def __init__(self, store: ImageStore, results, dry_run: bool = False, limit: int = 0):
+        self.store = store
+        self.results = results  # inference_results 컬렉션
+        self.dry_run = dry_run
+        self.limit = limit  # 단계별 최대 처리 개수 (0 이면 제한 없음)
+        self.report: Dict[str, Dict[str, int]] = {tier: {"count": 0, "bytes": 0} for tier in TIERS}
+
+    def _count(self, tier: str, size: int):
+        self.report[tier]["count"] += 1
+        self.report[tier]["bytes"] += size
+
+    def _limited(self, tier: str) -> bool:
+        return bool(self.limit) and self.report[tier]["count"] >= self.limit
+
+    # ── side_files ─────────────────────────────────────────────────────────────
+    def _side_dirs(self) -> Iterator[str]:
+        yield from self.store.legacy_dirs.values()
+        backend = self.store.backend
+        if hasattr(backend, "root"):
+            yield backend.root  # local 저장소
+        if hasattr(backend, "cache"):
+            yield backend.cache.directory  # s3 읽기 캐시 (classify 가 캐시 파일 옆에 씀)
+
+    def _referenced(self, key: str) -> bool:
+        # 사용자가 올린 파일 이름이 우연히 _detected 로 끝나는 경우 (문서의 원본 경로로 쓰임)
+        return self.results.find_one({"original_image_path": f"/images/{key}"}, {"_id": 1}) is not None
+
+    @staticmethod
+    def _side_base(name: str) -> Optional[str]:
+        """부산물이면 꾸미는 원본 파일 이름, 아니면 None."""
+        stem, ext = os.path.splitext(name)
+        suffix = next((s for s in SIDE_SUFFIXES if stem.endswith(s)), None)
+        return stem[: -len(suffix)] + ext if suffix else None
+
+    def side_files(self):
+        # 1) 기존 폴더 / 저장소 디렉터리의 파일
+        kinds = {os.path.abspath(d): k for k, d in self.store.legacy_dirs.items()}
+        for folder in self._side_dirs():
+            if not os.path.isdir(folder):
+                continue
+            for root, _, files in os.walk(folder):
+                legacy_kind = kinds.get(os.path.abspath(root))
+                for name in files:
+                    base = self._side_base(name)
+                    if base is None or not os.path.exists(os.path.join(root, base)):
+                        continue  # 꾸미는 원본이 없으면 부산물인지 확신할 수 없음
+                    if legacy_kind is None and not _BLOB_NAME.match(os.path.splitext(base)[0]):
+                        continue  # 저장소 디렉터리에는 blob 과 그 부산물만 있음
+                    if legacy_kind is not None and self._referenced(f"{legacy_kind}/{name}"):
+                        continue
+                    path = os.path.join(root, name)
+                    size = os.path.getsize(path)
+                    if not self.dry_run:
+                        os.remove(path)
+                    self._count("side_files", size)
+                    if self._limited("side_files"):
+                        return
+
+        # 2) migrate 로 저장소에 함께 들어간 부산물 (인덱스 키)
+        suffixes = "|".join(SIDE_SUFFIXES)
+        cursor = self.store.index.find({"_id": {"$regex": f"^original/.*({suffixes})\\.[a-z]+$"}}, {"size": 1})
+        for entry in cursor:
+            key = entry["_id"]
+            base = self._side_base(key.partition("/")[2])
+            if base is None or not self.store.exists(f"original/{base}") or self._referenced(key):
+                continue
+            size = self.store.remove(key) if not self.dry_run else entry.get("size", 0)
+            self._count("side_files", size)
+            if self._limited("side_files"):
+                return
+
+    # ── originals ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def _webp(data: bytes, quality: int) -> bytes:
+        """원본 → 같은 크기의 손실 WebP (EXIF 방향 적용, 투명도는 유지)."""
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP", quality=quality, method=6)
+        return buffer.getvalue()
+
+    def originals(self, days: int, quality: int, min_saving: float):
+        if not features.check("webp"):
+            logger.warning("Pillow 에 WebP 지원이 없어 원본 재압축을 건너뜁니다.")
+            return
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        cursor = self.store.index.find(
+            {"_id": {"$regex": "^original/"}, "created_at": {"$lt": cutoff}, "recompressed_at": {"$exists": False}},
+            {"sha256": 1, "ext": 1, "size": 1},
+        )
+        for doc in cursor:
+            key = doc["_id"]
+            if doc["ext"] == ".webp":
+                continue
+            try:
+                data = self.store.read(key)
+            except FileNotFoundError:
+                logger.warning(f"원본 blob 없음: {key}")
+                continue
+            with stage_timer("retention_recompress"):
+                compressed = self._webp(data, quality)
+            if len(compressed) > len(data) * (1 - min_saving):
+                # 충분히 줄지 않음 → 다음 실행에서 다시 시도하지 않도록 표시만
+                if not self.dry_run:
+                    self.store.index.update_one({"_id": key}, {"$set": {"recompressed_at": datetime.utcnow()}})
+                continue
+            saved = len(data) - len(compressed)
+            if not self.dry_run:
+                self.store.put_bytes(key, compressed, sha256=hashlib.sha256(compressed).hexdigest(), ext=".webp")
+                self.store.index.update_one(
+                    {"_id": key}, {"$set": {"recompressed_at": datetime.utcnow(), "original_size": len(data)}}
+                )
+                if not self.store.release_blob(doc["sha256"], doc["ext"], doc.get("size", len(data))):
+                    saved = -len(compressed)  # 다른 키가 같은 원본을 공유 → 새 blob 만큼 늘어남
+            self._count("originals", saved)
+            if self._limited("originals"):
+                return
+
+    # ── overlays ───────────────────────────────────────────────────────────────
+    def overlays(self, days: int):
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        kinds = "|".join(OVERLAY_KINDS)
+        cursor = self.store.index.find(
+            {"_id": {"$regex": f"^({kinds})/"}, "created_at": {"$lt": cutoff}}, {"size": 1},
+        )
+        for entry in cursor:
+            key = entry["_id"]
+            kind, _, name = key.partition("/")
+            original = f"/images/original/{os.path.splitext(name)[0]}.png"
+            doc = self.results.find_one({"original_image_path": original}, RENDER_PROJECTION)
+            if doc is None or not renderable(doc, kind) or not self.store.exists(f"original/{os.path.basename(original)}"):
+                continue
+            size = self.store.remove(key) if not self.dry_run else entry.get("size", 0)
+            self._count("overlays", size)
+            if self._limited("overlays"):
+                return
+
+    def run(self, tiers: Iterable[str], config) -> Dict[str, Dict[str, int]]:
+        for tier in tiers:
+            with stage_timer(f"retention_{tier}"):
+                if tier == "side_files":
+                    self.side_files()
+                elif tier == "originals":
+                    self.originals(
+                        config["RETENTION_ORIGINAL_DAYS"], config["RETENTION_ORIGINAL_QUALITY"],
+                        config["RETENTION_MIN_SAVING"],
+                    )
+                elif tier == "overlays":
+                    self.overlays(config["RETENTION_OVERLAY_DAYS"])
+            logger.info(f"보존 정책 {tier}: {self.report[tier]}")
+        return self.report
+
+
+def _lock(path: str) -> Optional[object]:
+    """동시 실행 방지 (이미 실행 중이면 None)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    f = open(path, "w")
+    if fcntl is not None:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return None
+    return f
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="이미지 보존 정책 (부산물 삭제, 오래된 원본 재압축, 오버레이 정리)")
+    parser.add_argument("--tiers", default=",".join(TIERS), help="실행할 단계 (쉼표 구분)")
+    parser.add_argument("--dry-run", action="store_true", help="파일/인덱스를 바꾸지 않고 대상과 회수 바이트만 계산")
+    parser.add_argument("--limit", type=int, default=0, help="단계별 최대 처리 개수 (0 이면 제한 없음)")
+    parser.add_argument("--json", action="store_true", help="보고서를 JSON 으로 출력")
+    args = parser.parse_args(argv)
+
+    tiers = [t for t in args.tiers.split(",") if t]
+    unknown = set(tiers) - set(TIERS)
+    if unknown:
+        parser.error(f"알 수 없는 단계: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    from config import DevelopmentConfig
+    from models.model import MongoDBClient
+
+    config = {k: getattr(DevelopmentConfig, k) for k in dir(DevelopmentConfig) if k.isupper()}
+    lock = _lock(config["RETENTION_LOCK_FILE"])
+    if lock is None:
+        logger.warning("다른 보존 정책 작업이 실행 중입니다.")
+        return
+
+    client = MongoDBClient.from_config(config)
+    try:
+        index = client.get_collection(config["IMAGE_INDEX_COLLECTION"])
+        ensure_indexes(client, config)  # release_blob 의 공유 여부 조회 (image_index sha256_ext)
+        store = create_store(config, index)
+        report = Retention(store, client.get_collection("inference_results"), dry_run=args.dry_run,
+                           limit=args.limit).run(tiers, config)
+    finally:
+        client.close()
+        lock.close()
+
+    if args.json:
+        print(json.dumps({"dry_run": args.dry_run, "tiers": report}, ensure_ascii=False))
+        return
+    prefix = "(dry-run) " if args.dry_run else ""
+    for tier in tiers:
+        print(f"{prefix}{tier}: {report[tier]['count']}개, {report[tier]['bytes'] / (1024 * 1024):.1f}MB 회수")
+    total = sum(r["bytes"] for r in report.values())
+    print(f"{prefix}합계 {total / (1024 * 1024):.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
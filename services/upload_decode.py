@@ -0,0 +1,46 @@
+# services/upload_decode.py
+"""
+업로드 이미지 디코딩.
+
+요청 스트림을 한 번 읽어 메모리에서 디코딩하고, 원본 바이트는 별도 스레드에서 이미지 저장소에 씁니다.
+(저장 → 다시 열기 왕복 없이 같은 PIL 이미지를 전체 파이프라인에 넘김)
+
+- 항상 원본 해상도로 디코딩합니다. 탐지 좌표, mask_rle, 다각형, 오버레이, image_size 가
+  /images/original 로 제공되는 파일과 같은 좌표계여야 하므로 JPEG draft 축소를 쓰지 않습니다.
+  (좌표를 저장하지 않는 목록 썸네일은 services/derivatives 에서 draft 로 축소 디코딩)
+- EXIF 방향은 여기서 한 번만 적용합니다.
+"""
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from services.metrics import stage_timer
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def decode_upload(data: bytes) -> Image.Image:
+    """업로드 바이트 → EXIF 방향이 적용된 원본 해상도 RGB 이미지."""
+    with stage_timer('upload_decode'):
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.load()
+    return image
+
+
+def _write(store, key: str, data: bytes, sha256: str = None):
+    with stage_timer('upload_persist'):
+        return store.put_bytes(key, data, sha256=sha256)
+
+
+def persist_async(store, key: str, data: bytes, sha256: str = None) -> Future:
+    """원본 바이트를 백그라운드 스레드에서 이미지 저장소에 저장합니다 (스레드는 첫 호출 시 생성 → fork 이후)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="upload-persist")
+    return _executor.submit(_write, store, key, data, sha256)
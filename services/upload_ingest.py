@@ -0,0 +1,129 @@
+# services/upload_ingest.py
+"""
+업로드 수신 단계 검증 (multipart 파일 파트).
+
+Werkzeug 는 파일 파트를 다 받은 뒤(500KB 초과 시 임시 파일로) 뷰에 넘기므로, 확장자 검사만으로는
+잘못된 대용량 파일이나 압축 폭탄이 디스크에 쓰이고 디코딩된 뒤에야 걸러집니다.
+여기서는 파일 파트를 받는 스트림 자체를 바꿔 바이트가 도착하는 대로 검사합니다.
+
+- 크기: UPLOAD_MAX_BYTES 를 넘는 순간 413 (나머지 본문은 읽지 않음)
+- 형식: 앞 8바이트의 매직 넘버로 PNG/JPEG/GIF 만 허용, 아니면 첫 청크에서 바로 415
+- 해시: 같은 패스에서 sha256 계산 (디스크에 다시 읽지 않음)
+- 픽셀 수: inspect() 에서 헤더만 읽어(Image.open 은 디코딩하지 않음) UPLOAD_MAX_PIXELS 초과 시 413
+
+버퍼는 메모리(최대 UPLOAD_MAX_BYTES)이므로 원본은 임시 파일 없이 최종 위치에 한 번만 씁니다.
+검사는 업로드 블루프린트(INGEST_BLUEPRINTS)의 요청에만 적용합니다. 챗봇/멀티모달/임플란트 분류 등
+다른 엔드포인트의 파일 파트와 요청 크기는 Werkzeug 기본 처리 그대로입니다.
+"""
+import io
+import hashlib
+from typing import Optional
+
+from flask import Request, current_app, jsonify
+from PIL import Image, UnidentifiedImageError
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"\xff\xd8\xff": "jpeg",
+    b"GIF87a": "gif",
+    b"GIF89a": "gif",
+}
+SNIFF_BYTES = 8
+INGEST_BLUEPRINTS = {"upload"}  # routes/upload_routes.upload_bp
+FORM_MARGIN = 1024 * 1024  # 요청 전체 상한 = UPLOAD_MAX_BYTES + survey 등 폼 필드 여유
+
+
+def sniff(head: bytes) -> Optional[str]:
+    for signature, kind in SIGNATURES.items():
+        if head.startswith(signature):
+            return kind
+    return None
+
+
+class IngestBuffer(io.BytesIO):
+    """파일 파트 수신 버퍼: 쓰는 즉시 크기 상한/매직 넘버 검사 + sha256."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.hasher = hashlib.sha256()
+        self.kind: Optional[str] = None
+        self._head = b""
+
+    def write(self, data) -> int:
+        if self.tell() + len(data) > self.max_bytes:
+            raise RequestEntityTooLarge(f"이미지는 {self.max_bytes // (1024 * 1024)}MB 이하만 업로드할 수 있습니다.")
+        if self.kind is None and len(self._head) < SNIFF_BYTES:
+            self._head += bytes(data[:SNIFF_BYTES - len(self._head)])
+            if len(self._head) >= SNIFF_BYTES:
+                self.kind = sniff(self._head)
+                if self.kind is None:
+                    raise UnsupportedMediaType("PNG/JPEG/GIF 이미지만 업로드할 수 있습니다.")
+        self.hasher.update(data)
+        return super().write(data)
+
+
+class IngestRequest(Request):
+    @property
+    def _ingest(self) -> bool:
+        # URL 매칭은 요청 컨텍스트를 열 때, 본문 파싱은 request.files 를 처음 읽을 때이므로 blueprint 를 알 수 있음
+        return self.blueprint in INGEST_BLUEPRINTS
+
+    @property
+    def max_content_length(self) -> Optional[int]:
+        if self._max_content_length is None and self._ingest:
+            return current_app.config["UPLOAD_MAX_BYTES"] + FORM_MARGIN
+        return super().max_content_length
+
+    @max_content_length.setter
+    def max_content_length(self, value: Optional[int]):
+        self._max_content_length = value
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not self._ingest:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return IngestBuffer(current_app.config["UPLOAD_MAX_BYTES"])
+
+
+class IngestedUpload:
+    def __init__(self, data: bytes, sha256: str, kind: str, width: int, height: int):
+        self.data = data
+        self.sha256 = sha256
+        self.kind = kind
+        self.width = width
+        self.height = height
+
+
+def inspect(file: FileStorage, max_pixels: int) -> IngestedUpload:
+    """수신이 끝난 파일 파트의 형식/픽셀 수를 헤더만으로 확인합니다 (디코딩 전)."""
+    buffer = file.stream
+    if not isinstance(buffer, IngestBuffer):
+        # request_class 가 설정되지 않은 경우 (테스트 클라이언트 등): 같은 검사를 한 번에 수행
+        buffer = IngestBuffer(current_app.config["UPLOAD_MAX_BYTES"])
+        buffer.write(file.read())
+    if buffer.kind is None:
+        raise UnsupportedMediaType("PNG/JPEG/GIF 이미지만 업로드할 수 있습니다.")
+
+    data = buffer.getvalue()
+    try:
+        with Image.open(io.BytesIO(data)) as header:
+            width, height = header.size
+    except Image.DecompressionBombError:
+        raise RequestEntityTooLarge("이미지 픽셀 수가 너무 큽니다.")
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise UnsupportedMediaType("이미지 헤더를 읽을 수 없습니다.")
+    if width * height > max_pixels:
+        raise RequestEntityTooLarge(f"이미지 픽셀 수가 너무 큽니다 ({width}x{height}).")
+    return IngestedUpload(data, buffer.hasher.hexdigest(), buffer.kind, width, height)
+
+
+def _json_error(error):
+    return jsonify({"error": error.description}), error.code
+
+
+def init_app(app):
+    app.request_class = IngestRequest
+    app.register_error_handler(RequestEntityTooLarge, _json_error)
+    app.register_error_handler(UnsupportedMediaType, _json_error)
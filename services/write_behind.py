@@ -0,0 +1,307 @@
+# services/write_behind.py
+"""
+추론 후 저장 단계(write-behind).
+
+업로드 요청은 추론이 끝나면 오버레이 이미지 인코딩/저장과 MongoDB insert 를 기다리지 않고 바로 응답합니다.
+응답에 들어가는 inference_result_id(ObjectId)와 이미지 URL 은 요청 스레드에서 미리 정해 둡니다.
+
+내구성
+- 작업은 큐에 넣기 전에 저널(JSON lines)에 기록하고 fsync 합니다. 원본 이미지는 요청 스레드에서 이미 저장되어 있습니다.
+- 백그라운드 writer 가 오버레이(이미지 저장소, 키 = "<kind>/<name>")와 문서(_id 고정, 중복 insert 무시)를
+  저장한 뒤 done 레코드를 남깁니다.
+- 재시작 시 done 이 없는 작업을 다시 처리합니다. 저널에는 이미지 바이트가 없으므로 누락된 오버레이는
+  종류별 regenerator(원본 이미지 + 문서로 다시 그리기)로 만듭니다. 같은 _id 로 insert 하므로 여러 번 재생해도 안전합니다.
+- 워커 프로세스마다 journal-<pid>-<무작위>.log 를 새로 만들어 flock 으로 잡고, 시작 시 잠기지 않은(= 주인이 죽은) 저널만 가져와 재생합니다.
+- MAX_ATTEMPTS 번 모두 실패한 작업은 dead-letter.log 로 옮기고(error 로그 + toothai_write_behind_dead_letters_total)
+  저널에서는 완료 처리합니다. dead-letter.log 는 다음 시작 때 다른 저널과 같이 재생됩니다.
+
+큐가 가득 차면 요청 스레드에서 바로 저장합니다 (유실 대신 역압).
+"""
+import os
+import glob
+import time
+import uuid
+import queue
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from bson import json_util
+from PIL import Image
+
+from services import overlay_format
+from services.metrics import QUEUE_DEPTH, STAGE_SECONDS, ERRORS, WRITE_BEHIND_DEAD_LETTERS
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 프로세스 하나만 가정
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+DEAD_LETTER = "dead-letter.log"
+
+
+class WriteJob:
+    def __init__(self, job_id: str, kind: str, original_key: str, document: Dict,
+                 images: Optional[Dict[str, Image.Image]] = None, collection: str = "inference_results"):
+        self.id = job_id
+        self.kind = kind
+        self.original_key = original_key
+        self.document = document
+        self.collection = collection
+        self.images = images or {}  # 이미지 저장소 키 → PIL 이미지 (재생 시에는 비어 있음)
+        self.overlay_keys: List[str] = list(self.images)
+
+    def to_record(self) -> Dict:
+        return {
+            "op": "put",
+            "id": self.id,
+            "kind": self.kind,
+            "original_key": self.original_key,
+            "collection": self.collection,
+            "overlay_keys": self.overlay_keys,
+            "document": self.document,
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "WriteJob":
+        job = cls(record["id"], record["kind"], record["original_key"], record["document"],
+                  collection=record["collection"])
+        job.overlay_keys = record["overlay_keys"]
+        return job
+
+
+class Journal:
+    """append-only JSON lines 저널. put / done 레코드를 쓰고, 미완료 작업이 없으면 비웁니다."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # pid 는 재시작 후 다시 쓰일 수 있으므로 (컨테이너의 PID 1 등) 프로세스마다 새 이름:
+        # 같은 이름의 이전 저널을 이어 쓰면 재생되지 않고 첫 done 에서 비워짐
+        self.path = os.path.join(directory, f"journal-{os.getpid()}-{uuid.uuid4().hex[:12]}.log")
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._pending = set()
+
+    def append(self, record: Dict):
+        line = (json_util.dumps(record) + "\n").encode("utf-8")
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if record["op"] == "put":
+                self._pending.add(record["id"])
+            else:
+                self._pending.discard(record["id"])
+                if not self._pending:
+                    self._file.truncate(0)
+
+    @staticmethod
+    def read_pending(path: str) -> List[Dict]:
+        """파일에서 done 이 없는 put 레코드 (마지막 줄이 잘려 있으면 무시)."""
+        puts, done = {}, set()
+        with open(path, "rb") as f:
+            for raw in f:
+                try:
+                    record = json_util.loads(raw.decode("utf-8"))
+                except ValueError:
+                    continue
+                if record.get("op") == "put":
+                    puts[record["id"]] = record
+                elif record.get("op") == "done":
+                    done.add(record["id"])
+        return [r for job_id, r in puts.items() if job_id not in done]
+
+    def dead_letter(self, record: Dict):
+        """재시도 끝에 실패한 put 레코드를 dead-letter.log 에 옮기고 이 저널에서는 완료 처리합니다."""
+        path = os.path.join(self.directory, DEAD_LETTER)
+        line = (json_util.dumps(record) + "\n").encode("utf-8")
+        while True:
+            with open(path, "ab") as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                # 잠금을 기다리는 동안 다른 워커가 재생하고 지웠으면 새 파일에 다시
+                if os.path.exists(path) and os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    break
+        self.append({"op": "done", "id": record["id"]})
+
+    def others(self) -> List[str]:
+        """재생할 파일: 같은 디렉터리의 다른 프로세스 저널 + dead-letter.log."""
+        paths = [p for p in glob.glob(os.path.join(self.directory, "journal-*.log"))
+                 if os.path.abspath(p) != os.path.abspath(self.path)]
+        dead = os.path.join(self.directory, DEAD_LETTER)
+        return paths + [dead] if os.path.exists(dead) else paths
+
+
+class WriteBehind:
+    def __init__(self, mongo_client, store, journal_dir: str, max_queue: int = 64, workers: int = 2):
+        self.mongo_client = mongo_client
+        self.store = store  # services.image_store.ImageStore
+        self.journal_dir = journal_dir
+        self.max_queue = max_queue
+        self.workers = workers  # 0 이면 요청 스레드에서 바로 저장 (저널은 동일하게 기록)
+        self._regenerators: Dict[str, Callable] = {}
+        self._pid = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    # ── 등록/시작 ──────────────────────────────────────────────────────────────
+    def register_regenerator(self, kind: str, fn: Callable):
+        """fn(job) -> {저장소 키: PIL 이미지}. 재생 시 누락된 오버레이를 다시 만듭니다."""
+        self._regenerators[kind] = fn
+
+    def start(self):
+        self._pid = os.getpid()
+        self.journal = Journal(self.journal_dir)
+        self._queue: "queue.Queue[WriteJob]" = queue.Queue(maxsize=self.max_queue)
+        self._inflight: Dict[str, WriteJob] = {}
+        self._by_key: Dict[str, WriteJob] = {}
+        self._lock = threading.Lock()
+        for i in range(self.workers):
+            threading.Thread(target=self._run, name=f"write-behind-{i}", daemon=True).start()
+        self._replay()
+
+    def _after_fork(self):
+        # 스레드와 저널 잠금은 fork 로 넘어오지 않으므로 (gunicorn --preload) 워커마다 새로 시작
+        if self._pid is not None and self._pid != os.getpid():
+            self.start()
+
+    def _replay(self):
+        for path in self.journal.others():
+            with open(path, "rb") as f:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue  # 살아 있는 워커의 저널이거나 다른 워커가 재생 중
+                if not os.path.exists(path) or os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                    continue  # 이미 다른 워커가 재생하고 지움
+                records = Journal.read_pending(path)
+                for record in records:
+                    self.journal.append(record)  # 새 주인 저널로 옮긴 뒤 원래 파일 삭제
+                    job = WriteJob.from_record(record)
+                    if self.workers == 0 or not self._enqueue(job, block=True):
+                        self._process(job)
+                os.remove(path)
+            if records:
+                logger.warning(f"write-behind 저널 재생: {path} ({len(records)}건)")
+
+    # ── 요청 스레드 ────────────────────────────────────────────────────────────
+    def submit(self, job: WriteJob):
+        """저널에 기록(fsync)한 뒤 큐에 넣습니다. 큐가 가득 차면 현재 스레드에서 바로 저장합니다."""
+        self.journal.append(job.to_record())
+        if self.workers == 0 or not self._enqueue(job, block=False):
+            self._process(job)
+
+    def _enqueue(self, job: WriteJob, block: bool) -> bool:
+        with self._lock:
+            self._inflight[job.id] = job
+            for key in job.images:
+                self._by_key[key] = job
+        try:
+            self._queue.put(job, block=block)
+        except queue.Full:
+            return False
+        QUEUE_DEPTH.labels(queue="write_behind").inc()
+        return True
+
+    def pending_image(self, key: str) -> Optional[Image.Image]:
+        """아직 저장소에 쓰이지 않은 오버레이 (응답 직후 클라이언트가 바로 요청하는 경우)."""
+        with self._lock:
+            job = self._by_key.get(key)
+            return job.images.get(key) if job is not None else None
+
+    def pending_documents(self, **match) -> List[Dict]:
+        """아직 insert 되지 않은 문서 중 match 조건(필드 == 값)에 맞는 것."""
+        with self._lock:
+            jobs = list(self._inflight.values())
+        return [dict(job.document) for job in jobs
+                if all(job.document.get(k) == v for k, v in match.items())]
+
+    # ── writer ─────────────────────────────────────────────────────────────────
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            QUEUE_DEPTH.labels(queue="write_behind").dec()
+            try:
+                self._process(job)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job: WriteJob):
+        start = time.perf_counter()
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                self._write_images(job)
+                self._insert(job)
+                self.journal.append({"op": "done", "id": job.id})
+                break
+            except Exception as e:
+                ERRORS.labels(stage="write_behind").inc()
+                if attempt == MAX_ATTEMPTS:
+                    self.journal.dead_letter(job.to_record())
+                    WRITE_BEHIND_DEAD_LETTERS.inc()
+                    logger.exception(
+                        f"write-behind 저장 실패 → {DEAD_LETTER} (다음 시작 때 재생): {job.id} "
+                        f"({job.document.get('original_image_path')}): {e}"
+                    )
+                else:
+                    time.sleep(0.5 * attempt)
+        self._forget(job)
+        STAGE_SECONDS.labels(stage="write_behind_flush").observe(time.perf_counter() - start)
+
+    def _write_images(self, job: WriteJob):
+        images = job.images
+        if not images:
+            # 재생: 저장소에 없는 오버레이만 다시 그림
+            missing = {k for k in job.overlay_keys if not self.store.exists(k)}
+            if not missing:
+                return
+            regenerate = self._regenerators.get(job.kind)
+            if regenerate is None:
+                raise RuntimeError(f"{job.kind} 오버레이 regenerator 가 등록되지 않았습니다")
+            images = {k: img for k, img in regenerate(job).items() if k in missing}
+        for key, image in images.items():
+            self.store.put_image(key, image, overlay_format.format_for(key))
+
+    def _insert(self, job: WriteJob):
+        from pymongo.errors import DuplicateKeyError
+        try:
+            self.mongo_client.insert_into_collection(job.collection, job.document)
+        except DuplicateKeyError:
+            pass  # 재생 중 이미 저장된 문서
+
+    def _forget(self, job: WriteJob):
+        with self._lock:
+            self._inflight.pop(job.id, None)
+            for key in job.images:
+                self._by_key.pop(key, None)
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """큐가 빌 때까지 기다립니다 (종료 전 / 벤치마크용)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.05)
+        return False
+
+
+def init_app(app, mongo_client) -> WriteBehind:
+    writer = WriteBehind(
+        mongo_client,
+        app.extensions["image_store"],
+        journal_dir=app.config["WRITE_BEHIND_JOURNAL_DIR"],
+        max_queue=app.config["WRITE_BEHIND_QUEUE_SIZE"],
+        workers=app.config["WRITE_BEHIND_WORKERS"],
+    )
+    app.extensions["write_behind"] = writer
+    return writer
@@ -0,0 +1,12 @@
+# tests/conftest.py
+import os
+import sys
+
+# 저장소 루트의 app/config/services 를 import 할 수 있도록 (python -m pytest tests)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "mongo: 실제 MongoDB 가 필요한 테스트 (MONGO_TEST_URI, MONGO_TEST_REQUIRED=1 이면 연결 실패 시 실패)"
+    )
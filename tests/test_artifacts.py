@@ -0,0 +1,42 @@
+# tests/test_artifacts.py
+"""
+모델 가중치 체크섬 검증: sha256 이 없는(unpinned) 아티팩트는 MODEL_ALLOW_UNPINNED=1 없이는 쓰지 않는지.
+"""
+import json
+
+import pytest
+
+from ai_model import artifacts
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    weights = tmp_path / "weights.pt"
+    weights.write_bytes(b"weights")
+    manifest = tmp_path / "artifacts.json"
+    manifest.write_text(json.dumps({"artifacts": {
+        "unpinned": {"file": "weights.pt", "sha256": None},
+        "pinned": {"file": "weights.pt", "sha256": artifacts.sha256sum(str(weights))},
+        "tampered": {"file": "weights.pt", "sha256": "0" * 64},
+    }}), encoding="utf-8")
+    monkeypatch.setenv("MODEL_MANIFEST", str(manifest))
+    monkeypatch.setenv("MODEL_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("MODEL_ALLOW_UNPINNED", raising=False)
+    monkeypatch.setattr(artifacts, "_manifest", None)
+    return weights
+
+
+def test_unpinned_artifact_is_rejected(cache):
+    with pytest.raises(artifacts.ArtifactError, match="sha256"):
+        artifacts.verify("unpinned")
+
+
+def test_unpinned_artifact_with_opt_out(cache, monkeypatch):
+    monkeypatch.setenv("MODEL_ALLOW_UNPINNED", "1")
+    assert artifacts.verify("unpinned") == str(cache)
+
+
+def test_pinned_artifact_is_checked(cache):
+    assert artifacts.verify("pinned", force=True) == str(cache)
+    with pytest.raises(artifacts.ArtifactError, match="체크섬 불일치"):
+        artifacts.verify("tampered", force=True)
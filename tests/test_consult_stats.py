@@ -0,0 +1,135 @@
+# tests/test_consult_stats.py
+"""
+진료 신청 일별 집계(consult_daily_stats)가 등록/답변/취소/삭제 라우트마다 consult_request 의
+GROUP BY 집계(consult_stats.aggregate)와 같은지, rebuild 가 같은 결과를 내는지.
+
+SQLite 메모리 DB + consult 블루프린트만 올린 앱 (JWT 는 테스트용 비밀키로 발급).
+"""
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("flask_sqlalchemy")
+pytest.importorskip("flask_jwt_extended")
+pytest.importorskip("bson")
+pytest.importorskip("PIL")
+
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from config import DevelopmentConfig
+from models.consult_model import ConsultDailyStats, ConsultRequest
+from models.model import Doctor, User, db
+from routes.consult_routes import consult_bp
+from services import consult_stats
+
+DAY1 = "20250701"
+DAY2 = "20250702"
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.from_object(DevelopmentConfig)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={},
+                      JWT_SECRET_KEY="test-secret-key-for-consult-stats")
+    db.init_app(app)
+    JWTManager(app)
+    app.register_blueprint(consult_bp, url_prefix="/api/consult")
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(register_id="patient-1", password="x", role="P"),
+            User(register_id="patient-2", password="x", role="P"),
+            Doctor(register_id="doctor-1", password="x", role="D"),
+        ])
+        db.session.commit()
+        yield app
+
+
+def _post(app, path, identity, body):
+    token = create_access_token(identity=identity)
+    return app.test_client().post(f"/api/consult{path}", json=body, headers={"Authorization": f"Bearer {token}"})
+
+
+def _create(app, user_id, image, day, hhmmss="100000"):
+    return _post(app, "", user_id, {"user_id": user_id, "original_image_url": image,
+                                    "request_datetime": day + hhmmss})
+
+
+def _request_id(user_id, image):
+    return ConsultRequest.query.filter_by(user_id=user_id, image_path=image).one().id
+
+
+def _table():
+    """집계 테이블 (모두 0 인 날짜 행은 신청이 없는 날과 같으므로 제외)."""
+    rows = ConsultDailyStats.query.all()
+    table = {row.day: {name: getattr(row, name) for name in consult_stats.BUCKETS} for row in rows}
+    return {day: counts for day, counts in table.items() if any(counts.values())}
+
+
+def _assert_in_sync():
+    db.session.expire_all()
+    assert _table() == consult_stats.aggregate()
+
+
+def test_routes_keep_daily_stats_in_sync(app):
+    assert _create(app, "patient-1", "/images/original/a.png", DAY1).status_code == 201
+    assert _create(app, "patient-2", "/images/original/b.png", DAY2).status_code == 201
+    _assert_in_sync()
+    assert _table()[date(2025, 7, 1)]["pending"] == 1
+
+    reply = _post(app, "/reply", "doctor-1", {"request_id": _request_id("patient-1", "/images/original/a.png"),
+                                              "comment": "ok", "reply_datetime": DAY1 + "120000"})
+    assert reply.status_code == 200
+    _assert_in_sync()
+    assert _table()[date(2025, 7, 1)] == {"pending": 0, "completed": 1, "canceled": 0, "other": 0}
+
+    assert _create(app, "patient-1", "/images/original/c.png", DAY1, "130000").status_code == 201
+    _assert_in_sync()
+    cancel = _post(app, "/cancel", "patient-1", {"user_id": "patient-1", "original_image_url": "/images/original/c.png"})
+    assert cancel.status_code == 200
+    _assert_in_sync()
+
+    delete = _post(app, "/delete", "patient-2", {"request_id": _request_id("patient-2", "/images/original/b.png")})
+    assert delete.status_code == 200
+    _assert_in_sync()
+    assert date(2025, 7, 2) not in _table()
+
+
+def test_rebuild_matches_incremental_counts(app):
+    _create(app, "patient-1", "/images/original/a.png", DAY1)
+    _create(app, "patient-2", "/images/original/b.png", DAY2)
+    _post(app, "/reply", "doctor-1", {"request_id": _request_id("patient-2", "/images/original/b.png")})
+    db.session.expire_all()
+    incremental = _table()
+
+    assert consult_stats.rebuild() == 2
+    assert _table() == incremental == consult_stats.aggregate()
+
+    # DB 를 직접 고친 경우 (집계 테이블과 어긋남) → rebuild 로 다시 맞춤
+    db.session.add(ConsultRequest(user_id="patient-1", image_path="/images/original/d.png",
+                                  request_datetime=datetime(2025, 7, 1, 9), is_requested="N", is_replied="N"))
+    db.session.commit()
+    assert _table() != consult_stats.aggregate()
+    consult_stats.rebuild(start=date(2025, 7, 1), end=date(2025, 7, 1))
+    _assert_in_sync()
+    assert _table()[date(2025, 7, 1)]["canceled"] == 1
+
+
+def test_cancel_rolls_back_stats_on_commit_failure(app, monkeypatch):
+    _create(app, "patient-1", "/images/original/a.png", DAY1)
+    db.session.expire_all()
+    before = _table()
+
+    def fail():
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(db.session, "commit", fail)
+    cancel = _post(app, "/cancel", "patient-1", {"user_id": "patient-1", "original_image_url": "/images/original/a.png"})
+    monkeypatch.undo()
+
+    assert cancel.status_code == 500
+    _assert_in_sync()
+    assert _table() == before
+    assert ConsultRequest.query.count() == 1
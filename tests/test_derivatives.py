@@ -0,0 +1,35 @@
+# tests/test_derivatives.py
+"""
+썸네일(파생본)이 EXIF 방향을 적용한 표시 방향으로 만들어지는지.
+"""
+import io
+
+import pytest
+from PIL import Image
+
+from services.derivatives import DerivativeCache
+
+ORIENTATION = 0x0112
+
+
+@pytest.mark.parametrize("orientation, expected", [
+    (1, (320, 240)),
+    (6, (240, 320)),  # 90° 회전해서 보여야 하는 세로 사진
+])
+def test_thumbnail_applies_exif_orientation(tmp_path, orientation, expected):
+    source = tmp_path / "photo.jpg"
+    exif = Image.Exif()
+    exif[ORIENTATION] = orientation
+    image = Image.new("RGB", (1600, 1200), "white")
+    image.paste((255, 0, 0), (0, 0, 800, 1200))  # 왼쪽 절반 빨강
+    image.save(source, format="JPEG", exif=exif)
+
+    path = DerivativeCache(str(tmp_path / "cache"), 10 * 1024 * 1024).get(str(source), 320, "png")
+
+    with Image.open(path) as thumb:
+        assert thumb.size == expected
+        assert thumb.getexif().get(ORIENTATION, 1) == 1
+        # 빨간 절반은 왼쪽(1) 또는 위쪽(6), 오른쪽 아래는 흰색
+        rgb = thumb.convert("RGB")
+        assert rgb.getpixel((5, 5))[1] < 60
+        assert rgb.getpixel((expected[0] - 5, expected[1] - 5))[1] > 200
@@ -0,0 +1,45 @@
+# tests/test_image_store.py
+"""
+ImageStore 의 인덱스 조회 캐시: 없는 키(기존 폴더/후보 이름)를 요청마다 Mongo 에 다시 묻지 않는지.
+"""
+from unittest import mock
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from services import image_store
+from services.image_store import ImageStore
+from services.object_storage import LocalBackend
+
+
+@pytest.fixture
+def store(tmp_path):
+    index = mock.MagicMock(wraps=mongomock.MongoClient().db.image_index)
+    return ImageStore(LocalBackend(str(tmp_path / "store")), index, legacy_base=str(tmp_path / "legacy"),
+                      legacy_dirs={}, miss_ttl=5.0)
+
+
+def test_missing_key_is_looked_up_once(store):
+    for _ in range(3):
+        assert store.path("model1/unknown.webp") is None
+    assert store.index.find_one.call_count == 1
+
+
+def test_put_in_same_process_clears_miss(store):
+    assert store.path("original/a.png") is None
+    store.put_bytes("original/a.png", b"png bytes")
+    assert store.read("original/a.png") == b"png bytes"
+
+
+def test_miss_expires_after_ttl(store, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(image_store.time, "monotonic", lambda: now[0])
+    assert store.path("original/b.png") is None
+    # 다른 워커가 저장 (이 프로세스의 캐시는 모름)
+    store.index.update_one({"_id": "original/b.png"}, {"$set": {"sha256": "0" * 64, "ext": ".png", "size": 1}},
+                           upsert=True)
+    assert not store.exists("original/b.png")
+    now[0] += 6
+    assert store.exists("original/b.png")
+    assert store.index.find_one.call_count == 2
@@ -0,0 +1,117 @@
+# tests/test_inference_sql_queries.py
+"""
+환자 기록 목록의 진료 신청 상태 조회가 문서 수와 무관하게 같은 수의 SQL 문으로 끝나는지 (N+1 방지).
+
+SQLite 메모리 DB + inference 블루프린트만 올린 앱, Mongo 컬렉션은 가짜 커서로 대신합니다.
+"""
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("flask_sqlalchemy")
+pytest.importorskip("bson")
+pytest.importorskip("PIL")
+
+from bson import ObjectId
+from flask import Flask
+from sqlalchemy import event
+
+from config import DevelopmentConfig
+from models.consult_model import ConsultRequest
+from models.model import db
+from routes.inference_routes import inference_bp
+
+USER_ID = "patient-1"
+BASE_URL = DevelopmentConfig.INTERNAL_BASE_URL
+
+
+class FakeCursor(list):
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        return FakeCursor(self[:n])
+
+
+def _documents(count):
+    now = datetime(2025, 7, 1, 12, 0, 0)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": USER_ID,
+            "original_image_path": f"/images/original/{i:04d}.png",
+            "image_type": "normal",
+            "timestamp": now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.from_object(DevelopmentConfig)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+    db.init_app(app)
+    app.register_blueprint(inference_bp, url_prefix="/api")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def statements(app):
+    """요청 중 실행된 SQL 문 (before_cursor_execute)."""
+    executed = []
+    listener = lambda conn, cursor, statement, *args: executed.append(statement)  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", listener)
+    yield executed
+    event.remove(db.engine, "before_cursor_execute", listener)
+
+
+def _prepare(app, size):
+    """size 건의 Mongo 문서(가짜 컬렉션)와, 그 절반에 대한 진료 신청 이력을 준비합니다."""
+    ConsultRequest.query.delete()
+    documents = _documents(size)
+    for doc in documents[::2]:
+        # 같은 이미지에 여러 번 신청 → 최신 행(답변 대기)의 상태가 쓰여야 함
+        path = BASE_URL + doc["original_image_path"]
+        db.session.add(ConsultRequest(user_id=USER_ID, image_path=path, request_datetime=datetime(2025, 7, 1, 9),
+                                      is_requested="Y", is_replied="Y"))
+        db.session.add(ConsultRequest(user_id=USER_ID, image_path=path, request_datetime=datetime(2025, 7, 2, 9),
+                                      is_requested="Y", is_replied="N"))
+    db.session.commit()
+
+    collection = mock.MagicMock()
+    collection.find.side_effect = lambda *args, **kwargs: FakeCursor(dict(d) for d in documents)
+    mongo_client = mock.MagicMock()
+    mongo_client.get_collection.return_value = collection
+    app.extensions["mongo_client"] = mongo_client
+    return documents
+
+
+@pytest.mark.parametrize("path, params, items", [
+    ("/api/inference_results", {"role": "P", "user_id": USER_ID}, lambda body: body),
+    ("/api/inference_results/history", {"user_id": USER_ID, "limit": 100}, lambda body: body["items"]),
+])
+def test_consult_status_statement_count_is_constant(app, statements, path, params, items):
+    counts = {}
+    for size in (1, 40):
+        documents = _prepare(app, size)
+        statements.clear()
+        response = app.test_client().get(path, query_string=params)
+        counts[size] = len(statements)
+
+        assert response.status_code == 200
+        body = items(response.get_json())
+        assert len(body) == size
+        requested = {doc["original_image_path"] for doc in documents[::2]}
+        for doc in body:
+            expected = ("Y", "N") if doc["original_image_path"] in requested else ("N", "N")
+            assert (doc["is_requested"], doc["is_replied"]) == expected
+
+    # 문서 수와 무관하게 페이지당 신청 상태 조회 1회
+    assert counts[1] == counts[40] == 1, counts
@@ -0,0 +1,71 @@
+# tests/test_mongo_indexes.py
+"""
+운영 조회(services/mongo_indexes.QUERIES)가 인덱스로 실행되는지 explain() 으로 확인.
+
+explain() 은 실제 MongoDB 가 필요합니다 (mongomock 은 explain 을 지원하지 않음).
+MONGO_TEST_URI (없으면 MONGO_URI, 기본 mongodb://localhost:27017) 에 연결할 수 없으면 건너뜁니다.
+CI 는 MongoDB 서비스와 함께 MONGO_TEST_REQUIRED=1 로 실행하며, 이때는 연결 실패가 테스트 실패입니다.
+임시 DB 에 문서를 채우고 인덱스를 만든 뒤 확인하고 지웁니다. 인덱스 없이 조회를 추가하면 실패합니다.
+"""
+import os
+import uuid
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from config import DevelopmentConfig
+from services import mongo_indexes
+
+
+def test_verify_flags_collscan_and_blocking_sort():
+    plans = {
+        "indexed": ["FETCH", "IXSCAN"],
+        "collscan": ["COLLSCAN"],
+        "sorted_in_memory": ["SORT", "FETCH", "IXSCAN"],
+    }
+    assert mongo_indexes.verify(plans) == ["collscan", "sorted_in_memory"]
+
+
+def test_stages_walks_nested_plans():
+    plan = {"stage": "FETCH", "inputStage": {"stage": "OR", "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}}
+    assert list(mongo_indexes._stages(plan)) == ["FETCH", "OR", "IXSCAN", "COLLSCAN"]
+
+
+@pytest.fixture
+def mongo():
+    uri = os.getenv("MONGO_TEST_URI") or os.getenv("MONGO_URI") or "mongodb://localhost:27017"
+    probe = MongoClient(uri, serverSelectionTimeoutMS=1000)
+    try:
+        probe.admin.command("ping")
+    except PyMongoError:
+        if os.getenv("MONGO_TEST_REQUIRED") == "1":
+            pytest.fail(f"MONGO_TEST_REQUIRED=1 인데 MongoDB 에 연결할 수 없습니다: {uri}")
+        pytest.skip(f"MongoDB 에 연결할 수 없습니다: {uri}")
+    finally:
+        probe.close()
+
+    from models.model import MongoDBClient
+
+    config = {k: getattr(DevelopmentConfig, k) for k in dir(DevelopmentConfig) if k.isupper()}
+    config.update(MONGO_URI=uri, MONGO_DB_NAME=f"toothai_index_test_{uuid.uuid4().hex[:8]}")
+    client = MongoDBClient.from_config(config)
+    try:
+        yield client, config
+    finally:
+        client.client.drop_database(config["MONGO_DB_NAME"])
+        client.close()
+
+
+@pytest.mark.mongo
+def test_production_queries_use_indexes(mongo):
+    client, config = mongo
+    mongo_indexes.seed(client, config, 2000)
+    mongo_indexes.ensure_indexes(client, config)
+
+    plans = mongo_indexes.explain_queries(client, config)
+    assert set(plans) == set(mongo_indexes.QUERIES)
+    assert mongo_indexes.verify(plans) == [], plans
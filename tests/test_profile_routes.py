@@ -0,0 +1,31 @@
+# tests/test_profile_routes.py
+"""
+관리자 프로파일 목록의 limit 파라미터: 잘못된 값은 500 이 아니라 400.
+"""
+import pytest
+from flask import Flask
+
+from routes.profile_routes import profile_bp
+from services.profiling import PROFILE_HEADER
+
+TOKEN = "test-admin-token"
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, PROFILE_ADMIN_TOKEN=TOKEN)
+    app.register_blueprint(profile_bp, url_prefix='/api')
+    return app.test_client()
+
+
+@pytest.mark.parametrize("limit, status", [("10", 200), ("9999", 200), ("abc", 400), ("0", 400), ("-3", 400)])
+def test_profile_list_limit(client, limit, status):
+    response = client.get(f"/api/admin/profiles?limit={limit}", headers={PROFILE_HEADER: TOKEN})
+    assert response.status_code == status
+    if status == 400:
+        assert "limit" in response.get_json()["error"]
+
+
+def test_profile_list_requires_admin(client):
+    assert client.get("/api/admin/profiles?limit=abc").status_code == 403
@@ -0,0 +1,69 @@
+# tests/test_retention.py
+"""
+보존 정책의 원본 재압축이 원본 해상도(EXIF 방향 적용)를 그대로 유지하는지.
+
+로컬 저장소 + mongomock 인덱스 컬렉션으로 Retention.originals 를 실행합니다.
+"""
+import io
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+pytest.importorskip("bson")
+
+from PIL import Image, features
+
+from services.image_store import ImageStore
+from services.object_storage import LocalBackend
+from services.retention import Retention
+
+pytestmark = pytest.mark.skipif(not features.check("webp"), reason="Pillow 에 WebP 지원이 없음")
+
+ORIENTATION = 0x0112
+
+
+def _encode(size, fmt, orientation=None):
+    # 부드러운 그라데이션 + 약한 잡음 (사진처럼 손실 압축이 잘 되는 내용)
+    x = np.linspace(0, 255, size[0])[None, :, None]
+    y = np.linspace(0, 255, size[1])[:, None, None]
+    noise = np.random.default_rng(0).integers(0, 8, (size[1], size[0], 3))
+    pixels = ((x + y) / 2 + noise).clip(0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    kwargs = {}
+    if orientation is not None:
+        exif = Image.Exif()
+        exif[ORIENTATION] = orientation
+        kwargs["exif"] = exif
+    Image.fromarray(pixels).save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path):
+    index = mongomock.MongoClient().db.image_index
+    return ImageStore(LocalBackend(str(tmp_path / "store")), index, legacy_base=str(tmp_path / "legacy"),
+                      legacy_dirs={})
+
+
+@pytest.mark.parametrize("size, fmt, orientation, expected", [
+    ((1200, 800), "PNG", None, (1200, 800)),
+    # 4000x3000 JPEG: 축소 디코딩(draft)이면 2000x1500 이 됨. EXIF 90° 회전 → 표시되는 방향의 크기
+    ((4000, 3000), "JPEG", 6, (3000, 4000)),
+])
+def test_recompressed_original_keeps_dimensions(store, size, fmt, orientation, expected):
+    key = "original/patient_20250701.png"
+    store.put_bytes(key, _encode(size, fmt, orientation))
+    store.index.update_one({"_id": key}, {"$set": {"created_at": datetime.utcnow() - timedelta(days=31)}})
+
+    report = Retention(store, mongomock.MongoClient().db.inference_results).run(
+        ["originals"],
+        {"RETENTION_ORIGINAL_DAYS": 30, "RETENTION_ORIGINAL_QUALITY": 30, "RETENTION_MIN_SAVING": 0.0},
+    )
+
+    assert report["originals"]["count"] == 1
+    assert store.index.find_one({"_id": key})["ext"] == ".webp"
+    recompressed = Image.open(io.BytesIO(store.read(key)))
+    assert recompressed.format == "WEBP"
+    assert recompressed.size == expected
@@ -0,0 +1,72 @@
+# tests/test_static_routes.py
+"""
+/images/<kind>/<name> 의 지연 렌더링 오버레이가 한 번 그려진 뒤에는 Mongo 조회 없이 디스크 캐시에서 제공되는지.
+
+로컬 저장소 + mongomock 컬렉션(호출 수를 세는 래퍼), X-ray 오버레이 렌더러는 원본을 그대로 돌려주는 가짜 함수.
+"""
+import io
+from unittest import mock
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from flask import Flask
+from PIL import Image
+
+from config import DevelopmentConfig
+from routes.static_routes import static_bp
+from services.disk_cache import DiskLRU
+from services.image_store import ImageStore
+from services.object_storage import LocalBackend
+from services.overlay_render import OverlayRenderer
+
+NAME = "patient_20250701.png"
+
+
+@pytest.fixture
+def app(tmp_path):
+    db = mongomock.MongoClient().db
+    index = mock.MagicMock(wraps=db.image_index)
+    results = mock.MagicMock(wraps=db.inference_results)
+    results.insert_one({
+        "image_type": "xray",
+        "original_image_path": f"/images/original/{NAME}",
+        "model1_image_path": f"/images/xmodel1/{NAME}",
+        "model2_image_path": f"/images/xmodel2/{NAME}",
+    })
+    store = ImageStore(LocalBackend(str(tmp_path / "store")), index, legacy_base=str(tmp_path / "legacy"),
+                       legacy_dirs={})
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), "gray").save(buffer, format="PNG")
+    store.put_bytes(f"original/{NAME}", buffer.getvalue())
+
+    mongo_client = mock.MagicMock()
+    mongo_client.get_collection.return_value = results
+    renderer = OverlayRenderer(mongo_client, store, None, DiskLRU(str(tmp_path / "overlay"), 1024 * 1024, "overlay"))
+    renderer.register_renderer("xmodel1", lambda doc, image: image)
+
+    app = Flask(__name__)
+    app.config.from_object(DevelopmentConfig)
+    app.config.update(TESTING=True)
+    app.extensions.update(image_store=store, overlay_renderer=renderer)
+    app.register_blueprint(static_bp)
+    app.mongo_calls = lambda: index.find_one.call_count + results.find_one.call_count
+    return app
+
+
+def test_rendered_overlay_is_served_without_mongo_lookups(app):
+    client = app.test_client()
+    first = client.get(f"/images/xmodel1/{NAME}")
+    assert first.status_code == 200
+    assert app.mongo_calls() > 0  # 첫 요청: 저장소 인덱스 + 문서 조회 후 렌더링
+
+    before = app.mongo_calls()
+    second = client.get(f"/images/xmodel1/{NAME}")
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert app.mongo_calls() == before
+
+
+def test_missing_overlay_is_404(app):
+    assert app.test_client().get("/images/xmodel1/unknown.png").status_code == 404
@@ -0,0 +1,57 @@
+# tests/test_upload_ingest.py
+"""
+업로드 수신 검증(크기 상한/매직 넘버)이 업로드 블루프린트에만 적용되고 다른 엔드포인트의 파일 파트는 그대로인지.
+"""
+import io
+
+from flask import Blueprint, Flask, jsonify, request
+from PIL import Image
+
+from services import upload_ingest
+
+LIMIT = 1024
+
+
+def _blueprint(name):
+    bp = Blueprint(name, __name__)
+
+    @bp.route(f"/{name}", methods=["POST"])
+    def receive():
+        return jsonify({"size": len(request.files["file"].read())})
+
+    return bp
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _post(client, path, data):
+    return client.post(path, data={"file": (io.BytesIO(data), "a.bin")}, content_type="multipart/form-data")
+
+
+def _client():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, UPLOAD_MAX_BYTES=LIMIT)
+    upload_ingest.init_app(app)
+    app.register_blueprint(_blueprint("upload"), url_prefix="/api")
+    app.register_blueprint(_blueprint("chatbot"), url_prefix="/api")
+    return app.test_client()
+
+
+def test_upload_endpoint_is_validated():
+    client = _client()
+    assert _post(client, "/api/upload", _png()).status_code == 200
+    assert _post(client, "/api/upload", b"plain text, not an image").status_code == 415
+    assert _post(client, "/api/upload", b"\x89PNG\r\n\x1a\n" + b"\0" * LIMIT).status_code == 413
+
+
+def test_other_endpoints_are_untouched():
+    client = _client()
+    text = _post(client, "/api/chatbot", b"plain text, not an image")
+    assert text.status_code == 200
+    large = _post(client, "/api/chatbot", b"x" * (LIMIT * 4))
+    assert large.status_code == 200
+    assert large.get_json() == {"size": LIMIT * 4}
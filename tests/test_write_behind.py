@@ -0,0 +1,63 @@
+# tests/test_write_behind.py
+"""
+write-behind 저널: 재시도 끝에 실패한 작업이 dead-letter.log 로 옮겨지고 다음 시작 때 재생되는지.
+"""
+import os
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("bson")
+
+from bson import ObjectId
+from prometheus_client import REGISTRY
+
+from services import write_behind
+from services.write_behind import DEAD_LETTER, Journal, WriteBehind, WriteJob
+
+
+def _dead_letters():
+    return REGISTRY.get_sample_value("toothai_write_behind_dead_letters_total") or 0
+
+
+def _writer(journal_dir, mongo_client):
+    writer = WriteBehind(mongo_client, mock.MagicMock(), str(journal_dir), workers=0)
+    writer.start()
+    return writer
+
+
+def _job():
+    oid = ObjectId()
+    return WriteJob(str(oid), "normal", "original/a.png", {"_id": oid, "original_image_path": "/images/original/a.png"})
+
+
+def test_record_round_trip():
+    job = _job()
+    job.overlay_keys = ["model1/a.png"]
+    restored = WriteJob.from_record(job.to_record())
+    assert (restored.id, restored.kind, restored.original_key, restored.collection, restored.overlay_keys) == (
+        job.id, "normal", "original/a.png", "inference_results", ["model1/a.png"],
+    )
+
+
+def test_failed_job_moves_to_dead_letter_and_replays(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_behind.time, "sleep", lambda seconds: None)
+    failing = mock.MagicMock()
+    failing.insert_into_collection.side_effect = RuntimeError("mongo down")
+    writer = _writer(tmp_path, failing)
+    before = _dead_letters()
+
+    job = _job()
+    writer.submit(job)
+
+    assert failing.insert_into_collection.call_count == write_behind.MAX_ATTEMPTS
+    assert _dead_letters() == before + 1
+    dead = tmp_path / DEAD_LETTER
+    assert [r["id"] for r in Journal.read_pending(str(dead))] == [job.id]
+    assert os.path.getsize(writer.journal.path) == 0  # 저널에서는 완료 처리 (비워짐)
+    assert writer.pending_documents() == []
+
+    working = mock.MagicMock()
+    _writer(tmp_path, working)  # 다음 시작: dead-letter.log 재생
+    working.insert_into_collection.assert_called_once_with("inference_results", job.document)
+    assert not dead.exists()